@@ -12,10 +12,8 @@ from ..config import SETTINGS
 from ..models import Signal
 from ..engine.command_bus import CommandBus
 from ..engine.collector import Collector
-from ..features.fvg import fvg_scores, atr
+from ..features.pipeline import FeaturePipeline
 from ..features.rr import rr_coeff
-from ..features.obi import obi_coeff
-from ..engine.fusion import fuse_edge
 from ..exchanges.binance import BinanceX
 from ..exchanges.bitget import BitgetX
 
@@ -35,6 +33,7 @@ class AdvisorBot(discord.Client):
         self.bitget  = BitgetX(SETTINGS.bitget_key, SETTINGS.bitget_secret, SETTINGS.bitget_password)
         self.bus: Optional[CommandBus] = None
         self.collector = Collector()
+        self.pipeline = FeaturePipeline(SETTINGS)
         self.bg_task = None
         self.last_autoscan = 0
 
@@ -123,26 +122,23 @@ class AdvisorBot(discord.Client):
 
         for sym in symbols:
             try:
-                ohlcv, ob, _ = await self.collector.get_market(sym, tf=tf, limit=200)
+                ohlcv, ticker, ob = await self.collector.get_market(sym, tf, 200)
                 if not ohlcv:
                     continue
-                a = atr(ohlcv, period=14)
-                long_edge, short_edge = fvg_scores(ohlcv)
-                rr_long, rr_long_coeff = rr_coeff(ohlcv, side="LONG")
-                rr_short, rr_short_coeff = rr_coeff(ohlcv, side="SHORT")
-                obi = obi_coeff(ob)
-                edge_long, edge_short = fuse_edge(long_edge, short_edge, rr_long_coeff, rr_short_coeff, obi, news=0.5, whale=0.5, onchain=0.5)
+                last = float((ticker or {}).get("last") or ohlcv[-1][4])
+                # FVG -> ATR -> OBI -> RR -> edge przez wspólny pipeline (makro neutral)
+                fx = self.pipeline.run({"ohlcv": ohlcv, "book": ob, "last": last}, ("edge",))
+                edge_long, edge_short = fx["edge"]
 
                 # pick best side
                 side = "LONG" if edge_long >= edge_short else "SHORT"
-                rr = rr_long if side == "LONG" else rr_short
                 edge = max(edge_long, edge_short)
-                last = ohlcv[-1][4]
                 entry = float(last)
                 sl = float(last * (0.99 if side=="LONG" else 1.01))
                 tp1 = float(last * (1.01 if side=="LONG" else 0.99))
                 tp2 = float(last * (1.02 if side=="LONG" else 0.98))
                 tp3 = float(last * (1.03 if side=="LONG" else 0.97))
+                rr, _rr_c = rr_coeff(entry, sl, tp1)
                 conf = float(min(1.0, max(0.0, edge)))
 
                 # gate behavior
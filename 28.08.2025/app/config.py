@@ -56,6 +56,15 @@ class Settings:
     w_news: float = _get_float("W_NEWS", 0.10)
     w_whale: float = _get_float("W_WHALE", 0.10)
     w_onc: float = _get_float("W_ONCHAIN", 0.05)
+    # feature'y booka (features/book.py) – domyślnie wyłączone (waga 0)
+    w_wobi: float = _get_float("W_WOBI", 0.0)
+    w_depth: float = _get_float("W_DEPTH", 0.0)
+    w_micro: float = _get_float("W_MICRO", 0.0)
+    book_band_pct: float = _get_float("BOOK_BAND_PCT", 0.5)
+    book_decay_bps: float = _get_float("BOOK_DECAY_BPS", 10.0)
+    # pipeline feature'ów: moduły z @feature (po przecinku) i wagi węzłów edge_input ("nazwa=0.05,...")
+    feature_plugins: str = os.getenv("FEATURE_PLUGINS", "")
+    feature_weights: str = os.getenv("FEATURE_WEIGHTS", "")
     auto_approve_conf: float = _get_float("AUTO_APPROVE_CONF", 0.8)
     auto_approve_after: int = _get_int("AUTO_APPROVE_AFTER_SEC", 120)
     auto_reject_conf: float = _get_float("AUTO_REJECT_CONF", 0.6)
@@ -79,7 +88,45 @@ class Settings:
     groq_key: str = os.getenv("GROQ_API_KEY","")
     hf_key: str = os.getenv("HF_API_KEY","")
     gems_max: int = int(os.getenv("GEMS_MAX", "5"))
-    
+    gems_refresh_sec: float = _get_float("GEMS_REFRESH_SEC", 60.0)
+    # --- Collector: równoległy / hedged fetch CEX ---
+    hedge_enabled: bool = _get_bool("HEDGE_ENABLED", False)
+    hedge_delay_ms: int = _get_int("HEDGE_DELAY_MS", 400)
+    ohlcv_cache_capacity: int = _get_int("OHLCV_CACHE_CAPACITY", 500)
+    feature_cache_entries: int = _get_int("FEATURE_CACHE_ENTRIES", 4096)
+    feature_cache_max_kb: int = _get_int("FEATURE_CACHE_MAX_KB", 2048)
+    feature_cache_max_age_sec: float = _get_float("FEATURE_CACHE_MAX_AGE_SEC", 60.0)  # 0 = cały bar
+    # --- Skan (/scan, autoskan) ---
+    scan_concurrency_per_venue: int = _get_int("SCAN_CONCURRENCY_PER_VENUE", 4)
+    scan_symbol_deadline_sec: float = _get_float("SCAN_SYMBOL_DEADLINE_SEC", 8.0)  # 0 = bez limitu
+    prefilter_enabled: bool = _get_bool("PREFILTER_ENABLED", True)  # etap 1: ranking altów z samych tickerów
+    prefilter_max_spread_bps: float = _get_float("PREFILTER_MAX_SPREAD_BPS", 50.0)
+    scan_topk_margin: int = _get_int("SCAN_TOPK_MARGIN", 5)  # zapas shortlisty ponad limit
+    # stop, gdy bramki przeszło limit×factor par – szybciej, ale wynik zależy od kolejności
+    # pobrań (nie prawdziwy top-K po EDGE); 0 = pełny skan (domyślnie)
+    scan_enough_factor: float = _get_float("SCAN_ENOUGH_FACTOR", 0.0)
+    candle_archive_enabled: bool = _get_bool("CANDLE_ARCHIVE_ENABLED", True)
+    candle_archive_dir: str = os.getenv("CANDLE_ARCHIVE_DIR", "")  # "" -> <katalog DB>/candles
+    market_fresh_sec: float = _get_float("MARKET_FRESH_SEC", 5.0)
+    tickers_ttl_sec: float = _get_float("TICKERS_TTL_SEC", 60.0)
+    markets_ttl_sec: float = _get_float("MARKETS_TTL_SEC", 6 * 3600)
+    # --- Strumień WS (kline/ticker/depth) ---
+    stream_enabled: bool = _get_bool("STREAM_ENABLED", False)
+    stream_url: str = os.getenv("STREAM_URL", "wss://stream.binance.com:9443/stream")
+    stream_max_age_sec: float = _get_float("STREAM_MAX_AGE_SEC", 5.0)
+    stream_record_path: str = os.getenv("STREAM_RECORD_PATH", "")
+    stream_l2_replica: bool = _get_bool("STREAM_L2_REPLICA", True)  # diff depth + snapshot REST (tylko URL Binance)
+    # --- Wspólna sesja HTTP źródeł danych ---
+    http_pool_limit: int = _get_int("HTTP_POOL_LIMIT", 100)
+    http_pool_per_host: int = _get_int("HTTP_POOL_PER_HOST", 10)
+    http_dns_ttl_sec: int = _get_int("HTTP_DNS_TTL_SEC", 300)
+    http_timeout_sec: float = _get_float("HTTP_TIMEOUT_SEC", 15.0)
+    http_retries: int = _get_int("HTTP_RETRIES", 2)
+    # --- Router giełd (latencja / circuit breaker) ---
+    router_window: int = _get_int("ROUTER_WINDOW", 200)
+    breaker_fail_threshold: int = _get_int("BREAKER_FAIL_THRESHOLD", 5)
+    breaker_cooldown_sec: float = _get_float("BREAKER_COOLDOWN_SEC", 30.0)
+
 
 
 SETTINGS = Settings()
@@ -1,7 +1,7 @@
 # app/datasources/coinapi.py
-import aiohttp
 from typing import Tuple
 from ..config import SETTINGS
+from .http import request_json
 
 COINAPI_URL = "https://rest.coinapi.io/v1/exchangerate/BTC/USDT"
 
@@ -14,9 +14,8 @@ async def ping_coinapi() -> Tuple[float, bool]:
         return 0.5, False
     headers = {"X-CoinAPI-Key": SETTINGS.coinapi_key}
     try:
-        async with aiohttp.ClientSession() as sess:
-            async with sess.get(COINAPI_URL, headers=headers, timeout=10) as r:
-                ok = r.status == 200
-                return (0.6 if ok else 0.5), ok
+        status, _ = await request_json("GET", COINAPI_URL, headers=headers, timeout=10)
+        ok = status == 200
+        return (0.6 if ok else 0.5), ok
     except Exception:
         return 0.5, False
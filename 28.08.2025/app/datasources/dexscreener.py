@@ -3,7 +3,7 @@ from __future__ import annotations
 import time
 from typing import Any, Dict, List, Tuple
 
-import aiohttp
+from .http import request_json
 
 DEX_HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
@@ -53,15 +53,17 @@ def safe_gem_with_thresholds(
     return True, "ok"
 
 
-async def fetch_trending_filtered(session, limit: int, min_liq: int, min_vol: int, min_tx: int):
-    """Zwrot już przefiltrowanych gemów wg progów."""
+async def fetch_trending_raw() -> List[Dict[str, Any]]:
+    """Surowa lista par 'trending' (jedno zapytanie – progi filtruje wołający)."""
     url = "https://api.dexscreener.com/latest/dex/search?q=trending"
-    async with session.get(url, headers=DEX_HEADERS, timeout=15) as resp:
-        if resp.status != 200:
-            raise RuntimeError(f"HTTP {resp.status}: {(await resp.text())[:180]}")
-        data = await resp.json(content_type=None)
+    status, data = await request_json("GET", url, headers=DEX_HEADERS, timeout=15)
+    if status != 200:
+        raise RuntimeError(f"HTTP {status}")
+    return data.get("pairs", []) if isinstance(data, dict) else []
+
 
-    pairs = data.get("pairs", []) if isinstance(data, dict) else []
+def filter_trending(pairs: List[Dict[str, Any]], limit: int, min_liq: int, min_vol: int, min_tx: int):
+    """Filtr progów + format wyniku (bez sieci – /gem luzuje progi na tej samej liście)."""
     out: list[dict] = []
     for p in pairs:
         ok, _ = safe_gem_with_thresholds(p, min_liq=min_liq, min_vol=min_vol, min_tx=min_tx)
@@ -88,17 +90,44 @@ async def fetch_trending_filtered(session, limit: int, min_liq: int, min_vol: in
     return out[:limit]
 
 
-async def fetch_candles(session: aiohttp.ClientSession, pair_addr: str, minutes: int = 12*60, resolution: str = "15") -> List[Dict[str, Any]]:
+async def fetch_trending_filtered(limit: int, min_liq: int, min_vol: int, min_tx: int):
+    """Zwrot już przefiltrowanych gemów wg progów."""
+    return filter_trending(await fetch_trending_raw(), limit, min_liq, min_vol, min_tx)
+
+
+PAIRS_BATCH_MAX = 30  # limit adresów w jednym zapytaniu /latest/dex/pairs
+
+
+async def fetch_pairs_batch(chain: str, pair_addrs: List[str]) -> List[Dict[str, Any]]:
+    """
+    Dane wielu par jednym zapytaniem: /latest/dex/pairs/{chain}/{a1,a2,...}
+    (max PAIRS_BATCH_MAX adresów). Zwraca listę obiektów `pair` Dexscreenera.
+    """
+    addrs = [a for a in pair_addrs if a][:PAIRS_BATCH_MAX]
+    if not addrs:
+        return []
+    url = f"https://api.dexscreener.com/latest/dex/pairs/{chain}/{','.join(addrs)}"
+    status, data = await request_json("GET", url, headers=DEX_HEADERS, timeout=15)
+    if status != 200:
+        raise RuntimeError(f"HTTP {status}")
+    if not isinstance(data, dict):
+        return []
+    pairs = data.get("pairs")
+    if pairs is None and data.get("pair"):
+        pairs = [data["pair"]]
+    return pairs or []
+
+
+async def fetch_candles(pair_addr: str, minutes: int = 12*60, resolution: str = "15") -> List[Dict[str, Any]]:
     """
     Pobierz świece (candles) z Dexscreener Chart API.
     """
     now = int(time.time())
     fr = now - minutes * 60
     url = f"https://api.dexscreener.com/chart/candles?pairAddress={pair_addr}&from={fr}&to={now}&resolution={resolution}"
-    async with session.get(url, headers=DEX_HEADERS, timeout=20) as resp:
-        if resp.status != 200:
-            # zwróć pustą listę – pozwoli to pokazać embed bez obrazka
-            return []
-        data = await resp.json(content_type=None)
+    status, data = await request_json("GET", url, headers=DEX_HEADERS, timeout=20)
+    if status != 200:
+        # zwróć pustą listę – pozwoli to pokazać embed bez obrazka
+        return []
     # spodziewamy się listy słowników {"t":ts,"o":..,"h":..,"l":..,"c":..}
     return data if isinstance(data, list) else []
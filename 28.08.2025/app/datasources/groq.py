@@ -1,7 +1,7 @@
 # app/datasources/groq.py
-import aiohttp
 from typing import Tuple
 from ..config import SETTINGS
+from .http import request_json
 
 GROQ_CHAT_URL = "https://api.groq.com/openai/v1/chat/completions"
 
@@ -27,18 +27,16 @@ async def score_groq_sentiment() -> Tuple[float, bool]:
         "max_tokens": 4
     }
     try:
-        async with aiohttp.ClientSession() as sess:
-            async with sess.post(GROQ_CHAT_URL, headers=headers, json=payload, timeout=12) as r:
-                ok = r.status == 200
-                data = await r.json()
-                txt = (data.get("choices", [{}])[0]
-                         .get("message", {})
-                         .get("content", "")
-                         .strip().lower())
-                if "bull" in txt:
-                    return 0.75, ok
-                if "bear" in txt:
-                    return 0.25, ok
-                return 0.5, ok
+        status, data = await request_json("POST", GROQ_CHAT_URL, headers=headers, json=payload, timeout=12)
+        ok = status == 200
+        txt = (data.get("choices", [{}])[0]
+                 .get("message", {})
+                 .get("content", "")
+                 .strip().lower())
+        if "bull" in txt:
+            return 0.75, ok
+        if "bear" in txt:
+            return 0.25, ok
+        return 0.5, ok
     except Exception:
         return 0.5, False
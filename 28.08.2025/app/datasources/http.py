@@ -0,0 +1,206 @@
+# app/datasources/http.py
+"""
+Wspólna warstwa HTTP dla źródeł danych (news, whale, etherscan, groq, HF,
+CoinAPI, Dexscreener, /gem).
+
+Jedna sesja aiohttp na proces (pętlę zdarzeń): pula keep-alive z limitem
+per host, cache DNS, jednolity timeout i retry z jitterem (błędy sieci,
+timeout, 429/5xx). Liczniki per host (zapytania, błędy, retry, latencja)
+zbiera TraceConfig – także dla kodu, który używa sesji bezpośrednio.
+
+    from .http import request_json
+    status, data = await request_json("GET", url, headers=..., timeout=10)
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from ..config import SETTINGS
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class HttpClient:
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 10,
+        dns_ttl_sec: int = 300,
+        timeout_sec: float = 15.0,
+        retries: int = 2,
+        backoff_sec: float = 0.3,
+    ):
+        self.limit = int(limit)
+        self.limit_per_host = int(limit_per_host)
+        self.dns_ttl_sec = int(dns_ttl_sec)
+        self.timeout_sec = float(timeout_sec)
+        self.retries = int(retries)
+        self.backoff_sec = float(backoff_sec)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.host_stats: Dict[str, Dict[str, float]] = {}
+
+    # ----------------------- sesja -----------------------
+
+    def session(self) -> aiohttp.ClientSession:
+        """Sesja dla bieżącej pętli (tworzona leniwie; nowa pętla -> nowa sesja)."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_ttl_sec,
+                enable_cleanup_closed=True,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout_sec),
+                trace_configs=[self._trace_config()],
+            )
+            self._loop = loop
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+    # ----------------------- liczniki -----------------------
+
+    def _stats(self, host: str) -> Dict[str, float]:
+        s = self.host_stats.get(host)
+        if s is None:
+            s = self.host_stats[host] = {
+                "requests": 0, "errors": 0, "retries": 0,
+                "lat_ms_sum": 0.0, "lat_ms_max": 0.0, "last_status": 0,
+            }
+        return s
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        tc = aiohttp.TraceConfig()
+
+        async def on_start(_sess, ctx, params):
+            ctx.t0 = time.perf_counter()
+
+        async def on_end(_sess, ctx, params):
+            s = self._stats(params.url.host or "?")
+            lat = (time.perf_counter() - ctx.t0) * 1000.0
+            s["requests"] += 1
+            s["lat_ms_sum"] += lat
+            s["lat_ms_max"] = max(s["lat_ms_max"], lat)
+            s["last_status"] = params.response.status
+            if params.response.status >= 400:
+                s["errors"] += 1
+
+        async def on_exc(_sess, ctx, params):
+            s = self._stats(params.url.host or "?")
+            s["requests"] += 1
+            s["errors"] += 1
+
+        tc.on_request_start.append(on_start)
+        tc.on_request_end.append(on_end)
+        tc.on_request_exception.append(on_exc)
+        return tc
+
+    def stats_snapshot(self) -> Dict[str, Dict[str, float]]:
+        out: Dict[str, Dict[str, float]] = {}
+        for host, s in self.host_stats.items():
+            ok = max(1, int(s["requests"] - s["errors"]))
+            out[host] = dict(s, lat_ms_avg=s["lat_ms_sum"] / ok)
+        return out
+
+    # ----------------------- zapytania -----------------------
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after:
+            try:
+                return min(10.0, float(retry_after))
+            except ValueError:
+                pass
+        # wykładniczo z jitterem (0.5x..1.5x), żeby równoległe zapytania się rozjechały
+        return self.backoff_sec * (2 ** attempt) * (0.5 + random.random())
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        **kwargs,
+    ) -> Tuple[int, bytes]:
+        """
+        (status, body). Retry przy błędzie sieci/timeout i statusach 429/5xx;
+        po wyczerpaniu prób zwraca ostatni status albo rzuca ostatni wyjątek.
+        """
+        n_retries = self.retries if retries is None else int(retries)
+        if timeout:
+            kwargs["timeout"] = aiohttp.ClientTimeout(total=float(timeout))
+        host = urlsplit(url).hostname or "?"
+        attempt = 0
+        while True:
+            try:
+                async with self.session().request(method, url, **kwargs) as r:
+                    body = await r.read()
+                    if r.status not in RETRY_STATUSES or attempt >= n_retries:
+                        return r.status, body
+                    delay = self._backoff(attempt, r.headers.get("Retry-After"))
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt >= n_retries:
+                    raise
+                delay = self._backoff(attempt)
+            attempt += 1
+            self._stats(host)["retries"] += 1
+            await asyncio.sleep(delay)
+
+    async def request_json(self, method: str, url: str, **kwargs) -> Tuple[int, Any]:
+        """(status, zdekodowany JSON lub None)."""
+        status, body = await self.request(method, url, **kwargs)
+        try:
+            return status, json.loads(body) if body else None
+        except ValueError:
+            return status, None
+
+
+# ----------------------- klient procesu -----------------------
+
+_CLIENT: Optional[HttpClient] = None
+
+
+def get_client() -> HttpClient:
+    global _CLIENT
+    if _CLIENT is None:
+        st = SETTINGS
+        _CLIENT = HttpClient(
+            limit=int(getattr(st, "http_pool_limit", 100)),
+            limit_per_host=int(getattr(st, "http_pool_per_host", 10)),
+            dns_ttl_sec=int(getattr(st, "http_dns_ttl_sec", 300)),
+            timeout_sec=float(getattr(st, "http_timeout_sec", 15.0)),
+            retries=int(getattr(st, "http_retries", 2)),
+        )
+    return _CLIENT
+
+
+def get_session() -> aiohttp.ClientSession:
+    return get_client().session()
+
+
+async def request_json(method: str, url: str, **kwargs) -> Tuple[int, Any]:
+    return await get_client().request_json(method, url, **kwargs)
+
+
+async def close_client() -> None:
+    if _CLIENT is not None:
+        await _CLIENT.close()
+
+
+def http_stats() -> Dict[str, Dict[str, float]]:
+    return get_client().stats_snapshot() if _CLIENT is not None else {}
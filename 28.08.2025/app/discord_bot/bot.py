@@ -1,13 +1,14 @@
 # app/discord_bot/bot.py
 from __future__ import annotations
 
+import asyncio
 import traceback
-import aiohttp
 import discord
 from discord.ext import commands
 
 from ..config import SETTINGS
 from ..engine.runner import Engine
+from ..engine.ratelimit import set_task_priority, PRIO_INTERACTIVE
 from ..engine.reporter import (
     Reporter,
     build_full_selftest_text,
@@ -39,6 +40,7 @@ class DexGemView(discord.ui.View):
         )
         self.conn.commit()
         await interaction.response.send_message(f"✅ Dodano {self.display} do watchlisty (DEX).", ephemeral=True)
+        asyncio.create_task(bot.engine.gems_watch.refresh())  # od razu w snapshot
 
     @discord.ui.button(label="➖ skip", style=discord.ButtonStyle.danger, emoji="➖")
     async def skip(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -57,13 +59,22 @@ class DexGemView(discord.ui.View):
         )
         self.conn.commit()
         await interaction.response.send_message(f"🧪 {self.display} dodano do sandbox (DEX).", ephemeral=True)
+        asyncio.create_task(bot.engine.gems_watch.refresh())
+
+
+# ====== Drzewo komend ======
+class AdvisorTree(discord.app_commands.CommandTree):
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        # slash command = najwyższy priorytet w limiterze giełd (ten sam task co komenda)
+        set_task_priority(PRIO_INTERACTIVE)
+        return True
 
 
 # ====== Główny bot ======
 class AdvisorBot(commands.Bot):
     def __init__(self):
         # WAŻNE: command_prefix wymagany przez BotBase
-        super().__init__(command_prefix="!", intents=INTENTS)
+        super().__init__(command_prefix="!", intents=INTENTS, tree_cls=AdvisorTree)
         self.engine = Engine(bot=self)
         self.reporter = Reporter(self, self.engine.conn, SETTINGS)
 
@@ -71,6 +82,14 @@ class AdvisorBot(commands.Bot):
         # start pętli silnika
         await self.engine.start(self.reporter)
 
+    async def close(self):
+        # najpierw silnik (pętle + sesje giełd), potem połączenie z Discordem
+        try:
+            await self.engine.close()
+        except Exception as e:
+            print(f"[close] engine close error: {e}")
+        await super().close()
+
     async def on_ready(self):
         print(f"Logged in as {self.user} (ID: {self.user.id})")
 
@@ -291,14 +310,31 @@ async def gem_cmd(
     min_liq: int = 20000,   # USD
     min_vol: int = 50000,   # USD (24h)
     min_tx: int = 30,       # liczba transakcji (24h)
-    limit: int = 3          # ile wyników zwrócić
+    limit: int = 3,         # ile wyników zwrócić
+    watchlist: bool = False # pokaż pary z watchlisty (snapshot w pamięci, bez zapytań)
 ):
+    if watchlist:
+        quotes = bot.engine.gems_watch.items()[:max(1, limit)]
+        if not quotes:
+            await interaction.response.send_message("Watchlista DEX pusta (dodaj parę przyciskiem ➕).", ephemeral=True)
+            return
+        age = bot.engine.gems_watch.age()
+        lines = [
+            f"• **{q.symbol}** ({q.chain}) ${q.price_usd:.6g} · LIQ ${q.liquidity_usd:,.0f} · "
+            f"VOL24 ${q.volume_h24:,.0f} · TX24 {q.buys_h24}/{q.sells_h24} · {q.change_h24:+.1f}%"
+            for q in quotes
+        ]
+        head = f"💎 Watchlista DEX (snapshot {age:.0f}s temu):" if age != float("inf") else "💎 Watchlista DEX:"
+        await interaction.response.send_message(head + "\n" + "\n".join(lines), ephemeral=True)
+        return
+
     await interaction.response.defer(ephemeral=True, thinking=True)
 
     from ..datasources.dexscreener import (
-        fetch_trending_filtered, fetch_candles, DEX_HEADERS
+        fetch_trending_raw, filter_trending, fetch_candles
     )
     from ..utils.charts import render_candles_png
+    from ..features.ohlcv import OHLCV
     from io import BytesIO
 
     def as_embed(g, png_bytes: bytes | None):
@@ -319,49 +355,49 @@ async def gem_cmd(
             e.set_image(url=f"attachment://{fname}")
         return e, files
 
-    found = []
+    # jedno zapytanie o listę – progi (także poluzowane) filtrujemy lokalnie
     try:
-        async with aiohttp.ClientSession(headers=DEX_HEADERS) as session:
-            found = await fetch_trending_filtered(session, limit=limit, min_liq=min_liq, min_vol=min_vol, min_tx=min_tx)
+        pairs = await fetch_trending_raw()
     except Exception as e:
         await interaction.followup.send(f"❌ Błąd Dexscreener: {e}", ephemeral=True)
         return
+    found = filter_trending(pairs, limit=limit, min_liq=min_liq, min_vol=min_vol, min_tx=min_tx)
 
     if not found:
         relax_steps = [
             (min_liq // 2, min_vol // 2, max(10, min_tx // 2)),
             (min_liq // 4, min_vol // 4, max(5,  min_tx // 3)),
         ]
-        async with aiohttp.ClientSession(headers=DEX_HEADERS) as session:
-            for liq_r, vol_r, tx_r in relax_steps:
-                try:
-                    found = await fetch_trending_filtered(session, limit=limit, min_liq=liq_r, min_vol=vol_r, min_tx=tx_r)
-                except Exception:
-                    found = []
-                if found:
-                    await interaction.followup.send(
-                        f"ℹ️ Brak wyników dla progów bazowych, pokazuję przy poluzowanych progach: "
-                        f"liquidity≥{liq_r}, volume≥{vol_r}, tx≥{tx_r}.",
-                        ephemeral=True
-                    )
-                    break
+        for liq_r, vol_r, tx_r in relax_steps:
+            found = filter_trending(pairs, limit=limit, min_liq=liq_r, min_vol=vol_r, min_tx=tx_r)
+            if found:
+                await interaction.followup.send(
+                    f"ℹ️ Brak wyników dla progów bazowych, pokazuję przy poluzowanych progach: "
+                    f"liquidity≥{liq_r}, volume≥{vol_r}, tx≥{tx_r}.",
+                    ephemeral=True
+                )
+                break
 
     if not found:
         await interaction.followup.send("Brak perełek – spróbuj obniżyć progi lub wróć za chwilę.", ephemeral=True)
         return
 
-    async with aiohttp.ClientSession(headers=DEX_HEADERS) as s2:
-        for g in found:
+    # świece do wykresów – równolegle, przez wspólną pulę połączeń
+    all_candles = await asyncio.gather(
+        *(fetch_candles(g["pair"], minutes=12*60, resolution="15") for g in found),
+        return_exceptions=True,
+    )
+    for g, candles in zip(found, all_candles):
+        png_bytes = b""
+        try:
+            if not isinstance(candles, Exception):
+                png_bytes = render_candles_png(OHLCV.from_dex(candles))
+        except Exception:
             png_bytes = b""
-            try:
-                candles = await fetch_candles(s2, g["pair"], minutes=12*60, resolution="15")
-                png_bytes = render_candles_png(candles)
-            except Exception:
-                png_bytes = b""
 
-            embed, files = as_embed(g, png_bytes)
-            view = DexGemView(g["display"], bot.engine.conn, chain=g["chain"], pair_addr=g["pair"])
-            await interaction.followup.send(embed=embed, files=files, view=view, ephemeral=True)
+        embed, files = as_embed(g, png_bytes)
+        view = DexGemView(g["display"], bot.engine.conn, chain=g["chain"], pair_addr=g["pair"])
+        await interaction.followup.send(embed=embed, files=files, view=view, ephemeral=True)
 
 
 @bot.tree.command(name="test_send", description="Test: wyślij prosty embed na TEN kanał (bez silnika).")
@@ -485,13 +521,24 @@ async def autoscan_cmd(
 @bot.tree.command(name="autoscan_status", description="Pokaż status i progi autoskanu altów.")
 async def autoscan_status_cmd(interaction: discord.Interaction):
     st = SETTINGS
+    last = getattr(bot.engine, "autoscan_last", None) or {}
+    if last:
+        step = last["step"]
+        last_txt = (f"\nOstatni cykl: **{last['signals']}** sygnałów, "
+                    + (f"relax **{step}x** (RR≥{last['rr_min']:.2f}, EDGE≥{last['edge_th']:.2f})" if step >= 0 else "brak wyniku"))
+        rho = last.get("prefilter_rho")
+        if rho is not None and rho == rho:  # NaN = za mało par
+            last_txt += f"\nPrefiltr vs EDGE (Spearman): **{rho:+.2f}**"
+    else:
+        last_txt = ""
     await interaction.response.send_message(
         f"Autoscan: **{st.autoscan_enabled}**\n"
         f"Interwał: **{st.autoscan_interval_min} min**\n"
         f"Limit sygnałów: **{st.autoscan_limit}**\n"
         f"Volume USD: **{st.autoscan_min_vol:,.0f} – {st.autoscan_max_vol:,.0f}**\n"
         f"Progi: RR≥**{st.autoscan_rr_min:.2f}**, EDGE≥**{st.autoscan_edge_th:.2f}**\n"
-        f"Wykluczenia: {', '.join(getattr(st,'autoscan_exclude', []))}",
+        f"Wykluczenia: {', '.join(getattr(st,'autoscan_exclude', []))}"
+        f"{last_txt}",
         ephemeral=True
     )
 @bot.tree.command(
@@ -527,7 +574,8 @@ async def autoscan_now_cmd(interaction: discord.Interaction):
             max_quote_vol=float(st.autoscan_max_vol),
             rr_min=float(st.autoscan_rr_min),
             edge_th=float(st.autoscan_edge_th),
-            exclude=set(getattr(st, "autoscan_exclude", {"BTC/USDT","ETH/USDT"}))
+            exclude=set(getattr(st, "autoscan_exclude", {"BTC/USDT","ETH/USDT"})),
+            create_signals=False,  # zapis/wysyłka niżej
         )
 
         if not results:
@@ -1,15 +1,22 @@
 # app/engine/analyzer.py
 from __future__ import annotations
 
-import asyncio
 from dataclasses import dataclass
-from typing import Iterable, List, Optional, Tuple
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
 
 from ..config import SETTINGS
-from ..features.fvg import fvg_scores, atr
-from ..features.rr import rr_coeff
-from ..features.obi import obi_coeff
-from ..engine.fusion import fuse_edge
+from ..features.fvg import FVG_RANGE, fvg_scores
+from ..features.resample import resample_ohlcv
+from ..features.batch import (
+    FusionWeights, edge_upper_bound, feature_matrix, features_batch, fuse_edge_batch,
+)
+from ..engine.candle_cache import tf_to_ms
+from ..engine.feature_cache import FEATURE_PARAMS
+from ..engine.ranking import TopK
+from ..features.book import book_features_or_neutral
+from ..features.prefilter import rank_corr, ticker_prefilter
 from ..engine.planner_ai import plan_openai
 from ..models import Signal
 
@@ -26,7 +33,18 @@ class AnalysisRow:
     atr: float
     entry: float  # last price used for planning reference
     reason: str
+    prefilter: Optional[float] = None  # score etapu 1 (features/prefilter.py), jeśli para przeszła prefiltr
+
+
+def _last_price(ticker, ohlcv) -> float:
+    return float((ticker or {}).get("last") or (ticker or {}).get("close") or (ohlcv[-1][4]))
+
 
+# bonus/kara za zgodność kierunku FVG z wyższym TF
+MTF_BONUS = 0.05
+
+# rr_seed = rr_coeff(last, last - 0.5×ATR, last + 0.8×ATR) -> RR 1.6 / 3 (0 tylko przy ATR = 0)
+RR_SEED_COEFF = (0.8 / 0.5) / 3.0
 
 # Zbiór majorów, które wycinamy przy wyszukiwaniu altów
 MAJORS = {
@@ -46,29 +64,30 @@ class Analyzer:
         self.st = SETTINGS
         self.conn = engine.conn
         self.risk = engine.risk
+        # prefiltr tickerów (etap 1): symbol -> score 0..1, z ostatniego _alt_volumes()
+        self.prefilter_scores: Dict[str, float] = {}
+        self.prefilter_rho: float = float("nan")
 
     # --------------------------------------------------------------------- #
     #                         ODKRYWANIE SYMBOLI                             #
     # --------------------------------------------------------------------- #
     async def autodiscover_symbols(self, max_symbols: int = 20) -> List[str]:
         """
-        Pobiera top pary USDT wg wolumenu z Binance + Bitget.
+        Top pary USDT wg wolumenu z Binance + Bitget (zrzut z engine.tickers).
         Zwraca unikatowe symbole (np. "BTC/USDT").
         """
         got: List[Tuple[str, float]] = []
 
-        async def from_ex(ex):
+        # wspólny zrzut tickerów (TickersService) – bez fetch_tickers per wywołanie
+        snap = await self.engine.tickers.get()
+        for _venue, sym, t in snap.items():
+            if "/USDT" not in sym:
+                continue
             try:
-                tickers = await ex.fetch_tickers()  # dict symbol -> ticker
-                for sym, t in tickers.items():
-                    if "/USDT" not in sym:
-                        continue
-                    vol = float(t.get("quoteVolume", 0) or 0.0)
-                    got.append((sym, vol))
+                vol = float(t.get("quoteVolume", 0) or 0.0)
             except Exception:
-                pass
-
-        await asyncio.gather(from_ex(self.engine.binance), from_ex(self.engine.bitget))
+                continue
+            got.append((sym, vol))
 
         got.sort(key=lambda x: x[1], reverse=True)
         uniq: List[str] = []
@@ -95,7 +114,7 @@ class Analyzer:
 
         # Binance
         try:
-            bals = await self.engine.binance.fetch_balances()
+            bals = await self.engine.collector._cex_call(self.engine.binance, "fetch_balances")
             for coin, amt in bals.items():
                 try:
                     if float(amt) > 0 and coin not in ("USDT", "BUSD", "USD"):
@@ -107,7 +126,7 @@ class Analyzer:
 
         # Bitget
         try:
-            bals = await self.engine.bitget.fetch_balances()
+            bals = await self.engine.collector._cex_call(self.engine.bitget, "fetch_balances")
             for coin, amt in bals.items():
                 try:
                     if float(amt) > 0 and coin not in ("USDT", "USD"):
@@ -119,52 +138,82 @@ class Analyzer:
 
         return sorted(syms)
 
-    async def autodiscover_alt_symbols(
-        self,
-        max_symbols: int = 40,
-        min_quote_vol: float = 3_000_000,   # 3M USDT/24h - nie trup
-        max_quote_vol: float = 60_000_000,  # 60M USDT/24h - nie mega bluechip
-    ) -> List[str]:
+    async def _alt_volumes(self) -> List[Tuple[str, float]]:
         """
-        Zbiera tickery USDT z Binance+Bitget, wyrzuca majory, zostawia alt-y z umiarkowanym wolumenem.
-        Zwraca do max_symbols symboli w formacie 'XXX/USDT'.
+        (symbol, quoteVolume) altów USDT ze zrzutu tickerów, malejąco wg wolumenu.
+        Przy okazji etap 1 skanu: prefiltr całego rynku altów z tego samego zrzutu
+        -> self.prefilter_scores (PREFILTER_ENABLED).
         """
         pool: List[Tuple[str, float]] = []
-
-        async def from_ex(ex):
+        best: Dict[str, dict] = {}
+        snap = await self.engine.tickers.get()
+        for _venue, sym, tk in snap.items():
+            if "/USDT" not in sym:
+                continue
+            base = sym.split("/")[0].upper()
+            if base in MAJORS:
+                continue
             try:
-                t = await ex.fetch_tickers()
-                for sym, tk in t.items():
-                    if "/USDT" not in sym:
-                        continue
-                    base = sym.split("/")[0].upper()
-                    if base in MAJORS:
-                        continue
-                    qv = float(tk.get("quoteVolume", 0) or 0.0)
-                    if qv < min_quote_vol or qv > max_quote_vol:
-                        continue
-                    pool.append((sym, qv))
+                qv = float(tk.get("quoteVolume", 0) or 0.0)
             except Exception:
-                pass
-
-        await asyncio.gather(from_ex(self.engine.binance), from_ex(self.engine.bitget))
-
+                continue
+            pool.append((sym, qv))
+            if sym not in best or qv > float(best[sym].get("quoteVolume") or 0.0):
+                best[sym] = tk  # para z kilku giełd – ticker z największym wolumenem
         pool.sort(key=lambda x: x[1], reverse=True)
+        if bool(getattr(self.st, "prefilter_enabled", True)):
+            self.prefilter_scores = ticker_prefilter(
+                best, max_spread_bps=float(getattr(self.st, "prefilter_max_spread_bps", 50.0))
+            )
+        else:
+            self.prefilter_scores = {}
+        return pool
+
+    def _pick_alts(
+        self,
+        vols: List[Tuple[str, float]],
+        max_symbols: int,
+        min_quote_vol: float,
+        max_quote_vol: float,
+        exclude: Iterable[str] = (),
+    ) -> List[str]:
+        """
+        Top `max_symbols` z `vols` w paśmie wolumenu (bez wykluczeń): wg score
+        prefiltra, gdy jest (etap 2 dostaje tylko najlepszych), inaczej wg wolumenu.
+        Pusto -> SETTINGS.symbols.
+        """
+        skip = set(exclude)
         uniq: List[str] = []
-        seen = set()
-        for sym, _ in pool:
-            if sym in seen:
+        for sym, qv in vols:
+            if qv < min_quote_vol or qv > max_quote_vol or sym in skip:
                 continue
-            seen.add(sym)
+            skip.add(sym)  # ta sama para z drugiej giełdy
             uniq.append(sym)
-            if len(uniq) >= max_symbols:
-                break
-
+        if self.prefilter_scores:
+            # sort stabilny – przy remisie zostaje kolejność wg wolumenu
+            uniq.sort(key=lambda s: self.prefilter_scores.get(s, 0.0), reverse=True)
+        uniq = uniq[:max_symbols]
         if not uniq:
-            src = [s for s in getattr(self.st, "symbols", []) if "/USDT" in s]
+            src = [s for s in getattr(self.st, "symbols", []) if "/USDT" in s and s not in skip]
             uniq = [s for s in src if s.split("/")[0].upper() not in MAJORS][:max_symbols]
         return uniq
 
+    async def autodiscover_alt_symbols(
+        self,
+        max_symbols: int = 40,
+        min_quote_vol: float = 3_000_000,   # 3M USDT/24h - nie trup
+        max_quote_vol: float = 60_000_000,  # 60M USDT/24h - nie mega bluechip
+        exclude: Iterable[str] = (),
+    ) -> List[str]:
+        """
+        Tickery USDT z Binance+Bitget (zrzut z engine.tickers), wyrzuca majory, zostawia alt-y z umiarkowanym wolumenem.
+        Zwraca do max_symbols symboli w formacie 'XXX/USDT'.
+        """
+        uniq = self._pick_alts(await self._alt_volumes(), max_symbols, min_quote_vol, max_quote_vol, exclude)
+        # strumień WS subskrybuje też aktualne uniwersum altów
+        self.engine.autoscan_universe = list(uniq)
+        return uniq
+
     # --------------------------------------------------------------------- #
     #                           SKAN „GEMS / ALTS”                          #
     # --------------------------------------------------------------------- #
@@ -175,83 +224,305 @@ class Analyzer:
         max_quote_vol: float = 60_000_000,
         rr_min: float = 0.90,      # lekkie rozluźnienie
         edge_th: float = 0.55,
+        exclude: Iterable[str] = (),
+        create_signals: bool = True,
     ) -> List[Signal]:
         """
         Dobiera alt-y, skanuje, filtruje przez bramki i generuje do `limit` sygnałów (paper),
-        wysyłając je przez reportera (jeśli podpięty).
+        wysyłając je przez reportera (jeśli podpięty i create_signals=True).
         """
         syms = await self.autodiscover_alt_symbols(
             max_symbols=limit * 6,
             min_quote_vol=min_quote_vol,
             max_quote_vol=max_quote_vol,
+            exclude=exclude,
         )
 
         results = await self.scan_and_rank(
             symbols=syms,
             tf="15m",
             limit=limit,
-            create_signals=True,
-            reporter=self.engine.reporter,
+            create_signals=create_signals,
+            reporter=self.engine.reporter if create_signals else None,
             rr_min_override=rr_min,
             edge_th_override=edge_th,
         )
         return results
 
+    async def scan_alt_gems_relaxed(
+        self,
+        steps: List[Tuple[float, float, float, float]],  # [(min_vol, max_vol, rr_min, edge_th), ...]
+        limit: int = 5,
+        exclude: Iterable[str] = (),
+        tf: str = "15m",
+    ) -> Tuple[List[Signal], int]:
+        """
+        scan_alt_gems dla kolejnych kroków luzowania progów w jednym przebiegu:
+        uniwersum każdego kroku wybierane lokalnie z jednego zrzutu tickerów,
+        wiersze analizy (rynki + feature'y) cache'owane między krokami – kolejny
+        krok analizuje tylko pary, których jeszcze nie było, a progi nakłada na
+        gotowe wiersze. Zwraca (sygnały bez zapisu/wysyłki, indeks kroku, który
+        dał wynik; -1 = żaden).
+        """
+        vols = await self._alt_volumes()
+        rows: Dict[str, Optional[AnalysisRow]] = {}
+        for i, (min_vol, max_vol, rr_min, edge_th) in enumerate(steps):
+            uni = self._pick_alts(vols, limit * 6, min_vol, max_vol, exclude)
+            if i == 0:
+                self.engine.autoscan_universe = list(uni)
+            todo = [s for s in uni if s not in rows]
+            if todo:
+                rows.update(dict.fromkeys(todo))
+                rows.update((r.symbol, r) for r in await self.analyze_many(todo, tf=tf))
+            cand = sorted((rows[s] for s in uni if rows[s] is not None), key=lambda r: r.edge, reverse=True)
+            picks = self._select(cand, [(rr_min, edge_th)], limit)
+            if picks:
+                print(f"[autoscan] krok {i}: {len(picks)} sygnałów, przeanalizowano {len(rows)} par")
+                self._measure_prefilter(rows.values())
+                return self._plan_signals(picks), i
+        print(f"[autoscan] brak wyniku po {len(steps)} krokach, przeanalizowano {len(rows)} par")
+        self._measure_prefilter(rows.values())
+        return [], -1
+
+    def _measure_prefilter(self, rows: Iterable[Optional[AnalysisRow]]) -> float:
+        """Spearman(prefilter, EDGE) po przeanalizowanych parach -> self.prefilter_rho."""
+        pairs = [(r.prefilter, r.edge) for r in rows if r is not None and r.prefilter is not None]
+        self.prefilter_rho = rank_corr([p for p, _ in pairs], [e for _, e in pairs])
+        if pairs:
+            print(f"[prefilter] rho(prefilter, EDGE)={self.prefilter_rho:+.2f} na {len(pairs)} parach")
+        return self.prefilter_rho
+
     # --------------------------------------------------------------------- #
     #                         ANALIZA JEDNEJ PARY                           #
     # --------------------------------------------------------------------- #
     async def analyze_symbol(self, symbol: str, tf: str = "15m") -> Optional[AnalysisRow]:
         """
         Wczytuje rynek (OHLCV/ticker/OB), liczy feature'y i oddaje wiersz analizy.
+        Feature'y przez Engine.features() – w obrębie świecy z FeatureCache.
         """
         try:
             ohlcv, ticker, obook = await self.engine.collector.get_market(symbol, tf, 200)
-            last = float((ticker or {}).get("last") or (ticker or {}).get("close") or (ohlcv[-1][4]))
-            atr_val = atr(ohlcv, 14)
-            f_long, f_short = fvg_scores(ohlcv)
-            obi = obi_coeff(obook)
+            last = _last_price(ticker, ohlcv)
+            atr_val, f_long, f_short, obi, rr_c = self.engine.features(symbol, tf, ohlcv, obook, last)
+            return await self._build_row(symbol, tf, ohlcv, last, atr_val, f_long, f_short, obi, rr_c, book=obook)
+        except Exception:
+            return None
+
+    async def analyze_many(self, symbols: List[str], tf: str = "15m") -> List[AnalysisRow]:
+        """
+        Jak analyze_symbol dla wielu par: rynki przez ScanExecutor (limit per giełda,
+        deadline per symbol), trafienia z FeatureCache bez liczenia, reszta
+        (ATR/FVG/OBI/RR) wektorowo (features/batch.py) i zapis do cache.
+        """
+        rows: List[AnalysisRow] = []
+        async for chunk in self.analyze_stream(symbols, tf=tf):
+            rows.extend(chunk)
+        return rows
+
+    async def analyze_stream(self, symbols: Iterable[str], tf: str = "15m") -> AsyncIterator[List[AnalysisRow]]:
+        """
+        Wiersze analizy paczkami w kolejności ukończenia pobrań – każda paczka
+        gotowych rynków liczona wektorowo. Przerwanie iteracji anuluje resztę pobrań.
+        """
+        batches = self.engine.scan_executor.batches(symbols, tf, 200)
+        try:
+            async for batch in batches:
+                live = [(sym, m) for sym, m in batch if m is not None and m[0]]
+                if not live:
+                    continue
+                rows = await self._score_markets(live, tf)
+                if rows:
+                    yield rows
+        finally:
+            await batches.aclose()
+
+    async def _score_markets(self, live: List[Tuple[str, tuple]], tf: str) -> List[AnalysisRow]:
+        """Feature'y + fusion macierzowo dla [(symbol, (ohlcv, ticker, book))]."""
+        collector = self.engine.collector
+        fcache = self.engine.feature_cache
+
+        lasts = [_last_price(m[1], m[0]) for _s, m in live]
+        keys = [fcache.key(collector.last_venue.get(sym, "?"), sym, tf, m[0], FEATURE_PARAMS) for sym, m in live]
+        feats: List[Optional[Tuple[float, float, float, float, float]]] = [fcache.get(k) for k in keys]
+
+        miss = [i for i, f in enumerate(feats) if f is None]
+        if miss:
+            batch = features_batch(
+                [live[i][1][0] for i in miss],
+                [live[i][1][2] for i in miss],
+                last=np.array([lasts[i] for i in miss], dtype=np.float64),
+            )
+            for j, i in enumerate(miss):
+                sym, (ohlcv, _ticker, obook) = live[i]
+                try:
+                    if not batch["ok"][j]:
+                        # krótka/nietypowa historia – skalarnie (Engine.features zapisze do cache)
+                        feats[i] = self.engine.features(sym, tf, ohlcv, obook, lasts[i])
+                        continue
+                    feats[i] = (
+                        float(batch["atr"][j]), float(batch["f_long"][j]), float(batch["f_short"][j]),
+                        float(batch["obi"][j]), float(batch["rr_seed"][j]),
+                    )
+                    fcache.put(keys[i], feats[i])
+                except Exception:
+                    feats[i] = None
+
+        # fusion macierzowo: (symbole x kolumny) @ wagi – jedno mnożenie dla całej listy
+        ok_idx = [i for i, f in enumerate(feats) if f is not None]
+        if not ok_idx:
+            return []
+        pipeline = self.engine.pipeline
+        extras = pipeline.edge_inputs()
+        fw = FusionWeights(self.st, {n: pipeline.weights[n] for n in extras})
+        use_book = any(float(getattr(self.st, k, 0.0)) for k in ("w_wobi", "w_depth", "w_micro"))
+        macro = self.engine.macro()
+
+        frows: List[dict] = []
+        books: List[Optional[dict]] = []
+        for i in ok_idx:
+            sym, (ohlcv, _ticker, obook) = live[i]
+            atr_val, f_long, f_short, obi, rr_c = feats[i]
+            bf = book_features_or_neutral(obook, self.st) if use_book else None
+            r = {"fvg_long": f_long, "fvg_short": f_short, "rr": rr_c, "obi": obi}
+            if bf is not None:
+                r.update(wobi=bf["wobi"], depth=bf["depth_coeff"], micro=bf["micro_coeff"])
+            if extras:
+                # węzły-pluginy z FEATURE_WEIGHTS – per symbol przez pipeline, jako dodatkowe kolumny
+                fx = await pipeline.arun(
+                    {"ohlcv": ohlcv, "book": obook, "last": lasts[i], "macro": macro,
+                     "atr": atr_val, "fvg": (f_long, f_short), "obi": obi, "rr_seed": rr_c},
+                    extras,
+                )
+                r.update({n: fx[n] for n in extras})
+            frows.append(r)
+            books.append(bf)
+
+        X = feature_matrix(frows, fw.columns, defaults=macro)
+        long_e, short_e = fuse_edge_batch(X, fw)
 
-            # Multi-TF bonus/penalty: zgodność 15m vs 1h
+        rows: List[AnalysisRow] = []
+        for j, i in enumerate(ok_idx):
+            sym, (ohlcv, _ticker, _obook) = live[i]
+            atr_val, f_long, f_short, obi, rr_c = feats[i]
             try:
-                ohlcv_h, _, _ = await self.engine.collector.get_market(symbol, "1h", 200)
-                fL_h, fS_h = fvg_scores(ohlcv_h)
-                mtf_bonus = 0.05 if ((f_long > f_short and fL_h > fS_h) or (f_short > f_long and fS_h > fL_h)) else -0.05
+                mtf = self._mtf_bonus(ohlcv, tf, f_long, f_short)
+                rows.append(self._make_row(
+                    sym, float(long_e[j]), float(short_e[j]), mtf,
+                    lasts[i], atr_val, f_long, f_short, obi, rr_c, books[j],
+                ))
             except Exception:
-                mtf_bonus = 0.0
+                continue
+        return rows
+
+    def _mtf_bonus(self, ohlcv, tf: str, f_long: float, f_short: float) -> float:
+        """Multi-TF bonus/penalty: zgodność 15m vs 1h – 1h składane lokalnie z 15m (bez 2. zapytania)."""
+        try:
+            htf = "1h" if tf_to_ms(tf) < 3_600_000 else "4h"
+            ohlcv_h = resample_ohlcv(ohlcv, tf, htf)
+            fL_h, fS_h = fvg_scores(ohlcv_h)
+            agree = (f_long > f_short and fL_h > fS_h) or (f_short > f_long and fS_h > fL_h)
+            return MTF_BONUS if agree else -MTF_BONUS
+        except Exception:
+            return 0.0
 
-            # makro (selftest może nie mieć kluczy – neutral 0.5)
-            news = getattr(self.engine, "news_score", 0.5) if hasattr(self.engine, "news_score") else 0.5
-            whale = getattr(self.engine, "whale_score", 0.5) if hasattr(self.engine, "whale_score") else 0.5
-            onc = getattr(self.engine, "onchain_score", 0.5) if hasattr(self.engine, "onchain_score") else 0.5
+    def _edge_upper_bound(self, rr_min: float) -> float:
+        """
+        Maks. EDGE, jaki może dostać jeszcze niepoliczona para przechodząca bramkę RR,
+        z rzeczywistych zakresów kolumn: FVG w FVG_RANGE, rr_seed stały (RR_SEED_COEFF;
+        0 tylko przy ATR = 0, które bramka rr_min > 0 i tak odrzuca), makro znane
+        (wspólne dla wszystkich par), OBI/book/pluginy w [0, 1], + bonus MTF.
+        """
+        pipeline = self.engine.pipeline
+        fw = FusionWeights(self.st, {n: pipeline.weights[n] for n in pipeline.edge_inputs()})
+        bounds = {k: (v, v) for k, v in self.engine.macro().items()}
+        bounds["fvg_long"] = bounds["fvg_short"] = FVG_RANGE
+        bounds["rr"] = (RR_SEED_COEFF, RR_SEED_COEFF) if rr_min > 0 else (0.0, RR_SEED_COEFF)
+        return edge_upper_bound(fw, bounds) + MTF_BONUS
+
+    def _make_row(
+        self, symbol: str, long_edge: float, short_edge: float, mtf_bonus: float,
+        last: float, atr_val: float, f_long: float, f_short: float, obi: float, rr_c: float,
+        bf: Optional[dict] = None,
+    ) -> AnalysisRow:
+        long_edge += mtf_bonus
+        short_edge += mtf_bonus
+        side = "LONG" if long_edge >= short_edge else "SHORT"
+        wobi = f" WOBI={bf['wobi']:.2f};" if bf else ""
+        pre = self.prefilter_scores.get(symbol)
+        return AnalysisRow(
+            symbol=symbol,
+            side=side,
+            edge_long=long_edge,
+            edge_short=short_edge,
+            edge=max(long_edge, short_edge),
+            rr_seed=rr_c,
+            obi=obi,
+            atr=atr_val,
+            entry=last,
+            reason=f"FVG L/S={f_long:.2f}/{f_short:.2f}; OBI={obi:.2f};{wobi} MTF={mtf_bonus:+.2f}"
+                   + (f"; PRE={pre:.2f}" if pre is not None else ""),
+            prefilter=pre,
+        )
 
-            # RR – seed do skali
-            _rr_val, rr_c = rr_coeff(last, last - atr_val * 0.5, last + atr_val * 0.8)
+    async def _build_row(
+        self, symbol: str, tf: str, ohlcv, last: float, atr_val: float,
+        f_long: float, f_short: float, obi: float, rr_c: float, book=None,
+    ) -> AnalysisRow:
+        """Pojedynczy symbol: MTF + fusion przez węzeł `edge` pipeline (makro, book_feats, pluginy)."""
+        mtf_bonus = self._mtf_bonus(ohlcv, tf, f_long, f_short)
+        # bazowe feature'y podajemy gotowe (FeatureCache)
+        fx = await self.engine.pipeline.arun(
+            {"ohlcv": ohlcv, "book": book, "last": last, "macro": self.engine.macro(),
+             "atr": atr_val, "fvg": (f_long, f_short), "obi": obi, "rr_seed": rr_c},
+            ("edge",),
+        )
+        long_edge, short_edge = fx["edge"]
+        return self._make_row(
+            symbol, long_edge, short_edge, mtf_bonus, last, atr_val, f_long, f_short, obi, rr_c,
+            fx["book_feats"] if book is not None else None,
+        )
 
-            # EDGE
-            long_edge, short_edge = fuse_edge(
-                f_long, f_short, rr_c, obi, news, whale, onc,
-                self.st.w_fvg, self.st.w_rr, self.st.w_obi, self.st.w_news, self.st.w_whale, self.st.w_onc
-            )
-            long_edge += mtf_bonus
-            short_edge += mtf_bonus
-
-            side = "LONG" if long_edge >= short_edge else "SHORT"
-            edge = max(long_edge, short_edge)
-
-            return AnalysisRow(
-                symbol=symbol,
-                side=side,
-                edge_long=long_edge,
-                edge_short=short_edge,
-                edge=edge,
-                rr_seed=rr_c,
-                obi=obi,
-                atr=atr_val,
-                entry=last,
-                reason=f"FVG L/S={f_long:.2f}/{f_short:.2f}; OBI={obi:.2f}; MTF={mtf_bonus:+.2f}"
+    def _select(
+        self, rows: List[AnalysisRow], steps: List[Tuple[float, float]], limit: int,
+    ) -> List[Tuple[AnalysisRow, str]]:
+        """Do `limit` wierszy (od najlepszego EDGE) przez Risk/Gating; kolejne progi tylko, gdy poprzednie dały pusto."""
+        picks: List[Tuple[AnalysisRow, str]] = []
+        for rr_min, edge_th in steps:
+            for row in rows:
+                ok, why = self.risk.can_open(row.symbol, row.rr_seed, row.edge, rr_min=rr_min, edge_th=edge_th)
+                if ok:
+                    picks.append((row, why))
+                    if len(picks) >= limit:
+                        break
+            if picks:
+                break
+        return picks
+
+    def _plan_signals(self, picks: List[Tuple[AnalysisRow, str]]) -> List[Signal]:
+        """AI plan (plan_openai) dla wybranych wierszy -> Signal (pending)."""
+        results: List[Signal] = []
+        for row, why in picks:
+            ctx = dict(
+                f_long=row.edge_long,
+                f_short=row.edge_short,
+                rr_c=row.rr_seed,
+                obi=row.obi,
+                news=0.5, whale=0.5, onc=0.5
             )
-        except Exception:
-            return None
+            plan = plan_openai(ctx, row.side, row.entry, row.atr)
+            results.append(Signal(
+                symbol=row.symbol,
+                side=row.side,
+                entry=plan["entry"],
+                sl=plan["sl"],
+                tp1=plan["tp1"], tp2=plan["tp2"], tp3=plan["tp3"],
+                rr=plan["rr"], edge=row.edge,
+                confidence=plan["conf"], success=plan["success"],
+                reason=f"{why}; {row.reason}",
+                status="pending",
+                auto_ttl=__import__("time").time().__int__()
+            ))
+        return results
 
     # --------------------------------------------------------------------- #
     #                        SKAN ZBIORCZY + RANKING                        #
@@ -266,80 +537,80 @@ class Analyzer:
         rr_min_override: Optional[float] = None,
         edge_th_override: Optional[float] = None,
         relax_steps: Optional[List[Tuple[float, float]]] = None,  # [(RR_MIN, EDGE_TH), ...]
+        enough_factor: Optional[float] = None,  # None -> SCAN_ENOUGH_FACTOR (domyślnie 0 = pełny skan)
     ) -> List[Signal]:
         """
-        Skanuje listę par (lub auto-odkrywa), sortuje po EDGE i filtruje przez Risk/Gating.
+        Skanuje listę par (lub auto-odkrywa), trzyma top EDGE (TopK) i filtruje przez Risk/Gating;
+        plan_openai woła tylko dla finalnie wybranych.
         Jeśli create_signals=True – tworzy sygnały (pending) i opcjonalnie wysyła przez reporter.
         Zwraca listę `Signal` (gdy create_signals=True) lub kandydatów (gdy tylko ranking).
 
         Parametr `relax_steps` pozwala przekazać listę par (rr_min, edge_th),
         po których będziemy schodzić, jeśli bazowe progi nie dadzą żadnego wyniku.
+
+        `enough_factor` > 0 kończy skan, gdy bramki przeszło limit × factor par – wynik
+        zależy wtedy od tego, które pary pobrały się pierwsze (przybliżony top-K).
         """
         # 1) przygotuj listę symboli
         if not symbols:
             symbols = await self.autodiscover_symbols(max_symbols=max(limit * 3, 20))
         symbols = list(symbols)
 
-        # 2) policz analizy
-        tasks = [self.analyze_symbol(sym, tf=tf) for sym in symbols]
-        rows = [r for r in await asyncio.gather(*tasks) if r is not None]
-
-        # 3) ranking
-        rows.sort(key=lambda r: r.edge, reverse=True)
         base_rr = rr_min_override if rr_min_override is not None else float(self.st.rr_min)
         base_edge = edge_th_override if edge_th_override is not None else float(self.st.edge_threshold)
-
-        def _try_pick(rows_in: List[AnalysisRow], rr_min: float, edge_th: float) -> List[Signal]:
-            out: List[Signal] = []
-            for row in rows_in:
-                ok, why = self.risk.can_open(
-                    row.symbol,
-                    row.rr_seed,
-                    row.edge,
-                    rr_min=rr_min,
-                    edge_th=edge_th
-                )
-                if not ok:
-                    continue
-
-                # AI plan – konkretny plan transakcji
-                ctx = dict(
-                    f_long=row.edge_long,
-                    f_short=row.edge_short,
-                    rr_c=row.rr_seed,
-                    obi=row.obi,
-                    news=0.5, whale=0.5, onc=0.5
-                )
-                plan = plan_openai(ctx, row.side, row.entry, row.atr)
-
-                sig = Signal(
-                    symbol=row.symbol,
-                    side=row.side,
-                    entry=plan["entry"],
-                    sl=plan["sl"],
-                    tp1=plan["tp1"], tp2=plan["tp2"], tp3=plan["tp3"],
-                    rr=plan["rr"], edge=row.edge,
-                    confidence=plan["conf"], success=plan["success"],
-                    reason=f"{why}; {row.reason}",
-                    status="pending",
-                    auto_ttl=__import__("time").time().__int__()
-                )
-                out.append(sig)
-                if len(out) >= limit:
+        steps = [(base_rr, base_edge)] + list(relax_steps or [])
+
+        # najpierw pary z najlepszym prefiltrem (jeśli jest) – executor startuje pobrania
+        # w tej kolejności, więc mocni kandydaci (zwykle) przychodzą pierwsi i stop niżej
+        # może zadziałać wcześniej; to tylko kolejność, ograniczeniem jest _edge_upper_bound
+        if self.prefilter_scores:
+            symbols.sort(key=lambda s: self.prefilter_scores.get(s, 0.0), reverse=True)
+
+        # 2) analizy strumieniem (ScanExecutor) + ranking ograniczonymi kopcami:
+        #    - shortlists[i]: top (limit + SCAN_TOPK_MARGIN) wierszy przechodzących progi kroku i
+        #      (osobny kopiec na poziom – wiersz z bazowych progów nie wypadnie przez luźniejsze),
+        #    - best: top `limit` wierszy przechodzących bazowe progi.
+        #    Stop, gdy k-ty EDGE w `best` >= górne ograniczenie EDGE dla par jeszcze niepoliczonych
+        #    (_edge_upper_bound) albo (opcjonalnie) gdy przeszło limit × enough_factor.
+        margin = max(0, int(getattr(self.st, "scan_topk_margin", 5)))
+        shortlists: List[TopK[AnalysisRow]] = [TopK(limit + margin, key=lambda r: r.edge) for _ in steps]
+        best: TopK[AnalysisRow] = TopK(limit, key=lambda r: r.edge)
+        ub = self._edge_upper_bound(base_rr)
+        factor = float(getattr(self.st, "scan_enough_factor", 0.0) if enough_factor is None else enough_factor)
+        enough = max(limit, int(round(limit * factor))) if factor > 0 else 0
+        seen = passed = 0
+        stream = self.analyze_stream(symbols, tf=tf)
+        try:
+            async for chunk in stream:
+                for row in chunk:
+                    seen += 1
+                    for i, (rr_min, edge_th) in enumerate(steps):
+                        if not self.risk.can_open(row.symbol, row.rr_seed, row.edge, rr_min=rr_min, edge_th=edge_th)[0]:
+                            continue
+                        shortlists[i].push(row)
+                        if i == 0:
+                            passed += 1
+                            best.push(row)
+                if best.full and best.threshold() >= ub:
+                    print(f"[scan] top-{limit} EDGE>={best.threshold():.2f} >= limit {ub:.2f} po {seen}/{len(symbols)} parach – stop")
                     break
-            return out
-
-        # 4) próba z bazowymi progami
-        results: List[Signal] = _try_pick(rows, base_rr, base_edge)
-
-        # 5) jeśli pusto, a podano relax_steps – schodź po progach
-        if not results and relax_steps:
-            for rr_min, edge_th in relax_steps:
-                results = _try_pick(rows, rr_min, edge_th)
-                if results:
+                if enough and passed >= enough:
+                    print(f"[scan] {passed} kandydatów po {seen}/{len(symbols)} parach – stop")
                     break
+        finally:
+            await stream.aclose()
+
+        # 3) wybór: bazowe progi, a jeśli pusto – kolejne relax_steps (bez planowania)
+        picks: List[Tuple[AnalysisRow, str]] = []
+        for shortlist, step in zip(shortlists, steps):
+            picks = self._select(shortlist.sorted(), [step], limit)
+            if picks:
+                break
+
+        # 4) AI plan – konkretny plan transakcji, tylko dla finalnej listy
+        results = self._plan_signals(picks)
 
-        # 6) jeżeli tworzymy sygnały – zapisz/wyślij
+        # 5) jeżeli tworzymy sygnały – zapisz/wyślij
         if create_signals and results:
             cur = self.conn.cursor()
             for sig in results[:limit]:
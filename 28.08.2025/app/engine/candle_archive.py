@@ -0,0 +1,288 @@
+# app/engine/candle_archive.py
+"""
+Archiwum świec na dysku – append-only, stała szerokość rekordu, mmap.
+
+Plik per (venue, symbol, tf): `<root>/<venue>/<BASE_QUOTE>_<tf>.bin`,
+rekord = 6 x float64 little-endian (ts_ms, o, h, l, c, v) = 48 B,
+posortowany rosnąco po ts. Zapisujemy tylko ZAMKNIĘTE świece (otwarta żyje
+w CandleCache), więc plik tylko rośnie; jedyny wyjątek to backfill dziur,
+który przepisuje plik atomowo (tmp + os.replace).
+
+Odczyt przez mmap + memoryview.cast("d") – bez kopiowania całego pliku;
+tail(n) kopiuje tylko ostatnie n rekordów.
+
+CLI (analiza offline):
+    python -m app.engine.candle_archive data/candles            # lista serii
+    python -m app.engine.candle_archive data/candles binance BTC/USDT 15m
+"""
+from __future__ import annotations
+
+import argparse
+import mmap
+import os
+import struct
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .candle_cache import CacheKey, tf_to_ms
+
+RECORD = struct.Struct("<6d")
+FIELDS = 6
+
+
+def _safe_symbol(symbol: str) -> str:
+    return symbol.replace("/", "_").replace(":", "_")
+
+
+class _Series:
+    """Jeden plik serii: fd do dopisywania + leniwie odświeżany mmap do odczytu."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.fh = open(path, "a+b")
+        self._mm: Optional[mmap.mmap] = None
+        self._mm_size = 0
+        self._last: Optional[int] = None
+        self._last_known = False  # cache last_ts – write-through woła go przy każdej ramce WS
+
+    def size_bytes(self) -> int:
+        return os.fstat(self.fh.fileno()).st_size
+
+    def count(self) -> int:
+        return self.size_bytes() // RECORD.size
+
+    def view(self) -> memoryview:
+        """memoryview float64 (n*6) na cały plik – zero-copy."""
+        size = self.count() * RECORD.size
+        if size == 0:
+            return memoryview(b"").cast("d")
+        if self._mm is None or self._mm_size != size:
+            self._unmap()
+            self._mm = mmap.mmap(self.fh.fileno(), size, access=mmap.ACCESS_READ)
+            self._mm_size = size
+        return memoryview(self._mm).cast("d")
+
+    def last_ts(self) -> Optional[int]:
+        if not self._last_known:
+            n = self.count()
+            self._last = int(self.view()[(n - 1) * FIELDS]) if n else None
+            self._last_known = True
+        return self._last
+
+    def append(self, bars: List[List[float]]) -> None:
+        if not bars:
+            return
+        self.fh.seek(0, os.SEEK_END)
+        self.fh.write(b"".join(RECORD.pack(*(float(x) for x in b[:FIELDS])) for b in bars))
+        self.fh.flush()
+        self._last, self._last_known = int(bars[-1][0]), True
+
+    def rewrite(self, bars: List[List[float]]) -> None:
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as out:
+            out.write(b"".join(RECORD.pack(*(float(x) for x in b[:FIELDS])) for b in bars))
+        self._unmap()
+        self.fh.close()
+        os.replace(tmp, self.path)
+        self.fh = open(self.path, "a+b")
+        self._last_known = False
+
+    def _unmap(self) -> None:
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                pass  # ktoś trzyma jeszcze view() – mmap zamknie GC
+            self._mm = None
+            self._mm_size = 0
+
+    def close(self) -> None:
+        self._unmap()
+        self.fh.close()
+
+
+FetchFn = Callable[[Optional[int], int], Awaitable[List[List[float]]]]
+
+
+class CandleArchive:
+    """
+    - append(key, bars)       – dopisz zamknięte świece nowsze od ostatniej w pliku,
+    - tail(key, n) / range()  – odczyt z mmap,
+    - gaps(key)               – dziury w sekwencji (brakujące świece),
+    - backfill(key, fetch_fn) – dociągnięcie dziur z giełdy (fetch_fn jak w CandleCache.fetch).
+    Klucz jak w CandleCache: (venue, symbol, tf).
+    """
+
+    def __init__(self, root: str = "data/candles"):
+        self.root = root
+        self._series: Dict[CacheKey, _Series] = {}
+        self.stats = {"appended": 0, "backfilled": 0}
+
+    def path(self, key: CacheKey) -> str:
+        venue, symbol, tf = key
+        return os.path.join(self.root, venue, f"{_safe_symbol(symbol)}_{tf}.bin")
+
+    def _get(self, key: CacheKey, create: bool = False) -> Optional[_Series]:
+        s = self._series.get(key)
+        if s is None and (create or os.path.exists(self.path(key))):
+            s = self._series[key] = _Series(self.path(key))
+        return s
+
+    def keys(self) -> List[CacheKey]:
+        """Wszystkie serie na dysku (także nieotwarte)."""
+        out: List[CacheKey] = []
+        if not os.path.isdir(self.root):
+            return out
+        for venue in sorted(os.listdir(self.root)):
+            vdir = os.path.join(self.root, venue)
+            if not os.path.isdir(vdir):
+                continue
+            for fn in sorted(os.listdir(vdir)):
+                if not fn.endswith(".bin"):
+                    continue
+                stem, _, tf = fn[:-4].rpartition("_")
+                base, _, quote = stem.partition("_")
+                out.append((venue, f"{base}/{quote}" if quote else base, tf))
+        return out
+
+    # ----------------------- odczyt -----------------------
+
+    def count(self, key: CacheKey) -> int:
+        s = self._get(key)
+        return s.count() if s else 0
+
+    def last_ts(self, key: CacheKey) -> Optional[int]:
+        s = self._get(key)
+        return s.last_ts() if s else None
+
+    def tail(self, key: CacheKey, n: int) -> List[List[float]]:
+        s = self._get(key)
+        if s is None:
+            return []
+        v = s.view()
+        total = len(v) // FIELDS
+        start = max(0, total - int(n))
+        return [
+            [int(v[i * FIELDS]), *v[i * FIELDS + 1:(i + 1) * FIELDS].tolist()]
+            for i in range(start, total)
+        ]
+
+    def range(self, key: CacheKey, since_ms: int, until_ms: Optional[int] = None) -> List[List[float]]:
+        """Świece z ts w [since_ms, until_ms) – wyszukiwanie binarne po mmap."""
+        s = self._get(key)
+        if s is None:
+            return []
+        v = s.view()
+        total = len(v) // FIELDS
+
+        def lower(ts: float) -> int:
+            lo, hi = 0, total
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if v[mid * FIELDS] < ts:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            return lo
+
+        a = lower(since_ms)
+        b = total if until_ms is None else lower(until_ms)
+        return [[int(v[i * FIELDS]), *v[i * FIELDS + 1:(i + 1) * FIELDS].tolist()] for i in range(a, b)]
+
+    def gaps(self, key: CacheKey) -> List[Tuple[int, int]]:
+        """Lista (od_ts, n_brakujących) – ts pierwszej brakującej świecy i ile ich brakuje."""
+        s = self._get(key)
+        if s is None:
+            return []
+        step = tf_to_ms(key[2])
+        v = s.view()
+        total = len(v) // FIELDS
+        out: List[Tuple[int, int]] = []
+        prev = None
+        for i in range(total):
+            ts = int(v[i * FIELDS])
+            if prev is not None and ts - prev > step:
+                out.append((prev + step, (ts - prev) // step - 1))
+            prev = ts
+        return out
+
+    # ----------------------- zapis -----------------------
+
+    def append(self, key: CacheKey, bars: List[List[float]], now_ms: Optional[int] = None) -> int:
+        """Dopisz zamknięte świece nowsze od ostatniej w pliku. Zwraca liczbę dopisanych."""
+        if not bars:
+            return 0
+        step = tf_to_ms(key[2])
+        now_ms = int(now_ms if now_ms is not None else time.time() * 1000)
+        s = self._get(key, create=True)
+        last = s.last_ts()
+        if last is not None and int(bars[-1][0]) <= last:
+            return 0  # nic nowego (typowa ramka kline otwartej świecy)
+        new = [b for b in bars if (last is None or int(b[0]) > last) and int(b[0]) + step <= now_ms]
+        s.append(new)
+        self.stats["appended"] += len(new)
+        return len(new)
+
+    def _insert(self, key: CacheKey, bars: List[List[float]]) -> int:
+        """Wstaw świece w środek serii (backfill) – przepisuje plik."""
+        s = self._get(key, create=True)
+        merged: Dict[int, List[float]] = {int(b[0]): b for b in self.tail(key, s.count())}
+        added = 0
+        for b in bars:
+            if int(b[0]) not in merged:
+                merged[int(b[0])] = b
+                added += 1
+        if added:
+            s.rewrite([merged[ts] for ts in sorted(merged)])
+        return added
+
+    async def backfill(self, key: CacheKey, fetch_fn: FetchFn, max_bars: int = 1000) -> int:
+        """
+        Dociągnij brakujące świece (dziury z gaps()) przez `fetch_fn(since, limit)`.
+        Zwraca liczbę wstawionych świec.
+        """
+        step = tf_to_ms(key[2])
+        budget = int(max_bars)
+        got: List[List[float]] = []
+        for since, n in self.gaps(key):
+            if budget <= 0:
+                break
+            n = min(n, budget)
+            bars = await fetch_fn(since, n) or []
+            got.extend(b for b in bars if since <= int(b[0]) < since + n * step)
+            budget -= n
+        added = self._insert(key, got) if got else 0
+        self.stats["backfilled"] += added
+        return added
+
+    def close(self) -> None:
+        for s in self._series.values():
+            s.close()
+        self._series.clear()
+
+
+# ----------------------- CLI -----------------------
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Podgląd archiwum świec")
+    ap.add_argument("root", nargs="?", default="data/candles")
+    ap.add_argument("venue", nargs="?")
+    ap.add_argument("symbol", nargs="?")
+    ap.add_argument("tf", nargs="?", default="15m")
+    ap.add_argument("--tail", type=int, default=5)
+    args = ap.parse_args()
+
+    arch = CandleArchive(args.root)
+    if not args.venue:
+        for key in arch.keys():
+            print(f"{key[0]:8} {key[1]:14} {key[2]:4} bars={arch.count(key):7} gaps={len(arch.gaps(key))}")
+        return
+    key = (args.venue, args.symbol, args.tf)
+    print(f"{key}: {arch.count(key)} świec, dziury: {arch.gaps(key)[:10]}")
+    for b in arch.tail(key, args.tail):
+        print(b)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+# app/engine/candle_cache.py
+from __future__ import annotations
+
+import time
+from collections import deque
+from itertools import islice
+from typing import Deque, Dict, List, Optional, Tuple
+
+from ..features.ohlcv import OHLCV
+
+from .indicators import IndicatorState
+
+CacheKey = Tuple[str, str, str]  # (venue, symbol, timeframe)
+
+_TF_UNITS_MS = {"m": 60_000, "h": 3_600_000, "d": 86_400_000, "w": 604_800_000}
+
+
+def tf_to_ms(tf: str) -> int:
+    """'15m' -> 900000, '1h' -> 3600000 itd. (jak ccxt.parse_timeframe, ale w ms)."""
+    tf = (tf or "").strip()
+    try:
+        return int(tf[:-1]) * _TF_UNITS_MS[tf[-1]]
+    except Exception:
+        raise ValueError(f"nieznany timeframe: {tf!r}")
+
+
+class CandleCache:
+    """
+    Pamięć świec w RAM: ring-buffer o stałej pojemności per (venue, symbol, tf).
+
+    Po pierwszym pełnym pobraniu dociągamy tylko świece nowsze od ostatniej
+    zapisanej (ccxt `since=`) i scalamy je – ostatnia (jeszcze otwarta) świeca
+    jest nadpisywana nową wersją.
+
+    Z podpiętym CandleArchive (engine/candle_archive.py): zimny klucz startuje
+    z dysku, a każda zamknięta świeca jest dopisywana do archiwum (write-through).
+
+    Obok bufora każdy klucz ma IndicatorState (engine/indicators.py) – ATR/FVG/
+    high-low aktualizowane w O(1) przy każdym merge, czytane przez indicators().
+    """
+
+    def __init__(self, capacity: int = 500, archive=None):
+        self.capacity = max(1, int(capacity))
+        self.archive = archive
+        self._store: Dict[CacheKey, Deque[List[float]]] = {}
+        self._ind: Dict[CacheKey, IndicatorState] = {}
+        self.stats = {"full": 0, "incremental": 0, "bars_fetched": 0, "warm": 0}
+
+    # ----------------------- odczyt -----------------------
+
+    def get(self, key: CacheKey, limit: int) -> OHLCV:
+        """Ostatnie `limit` świec jako kolumnowy OHLCV (jedna konwersja na odczyt)."""
+        buf = self._store.get(key)
+        if not buf:
+            return OHLCV()
+        return OHLCV.from_rows(islice(buf, max(0, len(buf) - int(limit)), None))
+
+    def size(self, key: CacheKey) -> int:
+        return len(self._store.get(key) or ())
+
+    def last_ts(self, key: CacheKey) -> Optional[int]:
+        buf = self._store.get(key)
+        return int(buf[-1][0]) if buf else None
+
+    def indicators(self, key: CacheKey) -> Optional[IndicatorState]:
+        return self._ind.get(key)
+
+    # ----------------------- zapis -----------------------
+
+    def keys(self) -> List[CacheKey]:
+        return list(self._store)
+
+    def replace(self, key: CacheKey, bars: List[List[float]]) -> None:
+        """Pełne załadowanie klucza (cold start / zbyt duża dziura)."""
+        self._store[key] = buf = deque((list(b) for b in bars), maxlen=self.capacity)
+        self._ind[key] = IndicatorState().rebuild(list(buf))
+        self._archive(key, bars)
+
+    def _archive(self, key: CacheKey, bars: List[List[float]]) -> None:
+        if self.archive is None or not bars:
+            return
+        try:
+            self.archive.append(key, bars)
+        except Exception as e:
+            print(f"[candles] archive {key} error: {e}")
+
+    def warm(self, key: CacheKey) -> int:
+        """Zimny klucz -> ostatnie `capacity` świec z archiwum (bez sieci)."""
+        if self.archive is None or key in self._store:
+            return self.size(key)
+        bars = self.archive.tail(key, self.capacity)
+        if bars:
+            self._store[key] = deque(bars, maxlen=self.capacity)
+            self._ind[key] = IndicatorState().rebuild(bars)
+            self.stats["warm"] += 1
+        return len(bars)
+
+    def merge(self, key: CacheKey, bars: List[List[float]]) -> None:
+        """
+        Scala nowe świece: starsze od ostatniej są pomijane, ta sama świeca
+        (ten sam ts) jest podmieniana, nowsze są dopisywane na koniec.
+        """
+        buf = self._store.get(key)
+        if buf is None:
+            self.replace(key, bars)
+            return
+        ind = self._ind.get(key)
+        if ind is None:
+            ind = self._ind[key] = IndicatorState().rebuild(list(buf))
+        closed: List[List[float]] = []
+        for bar in bars:
+            ts = int(bar[0])
+            if buf and ts < int(buf[-1][0]):
+                continue
+            if buf and ts == int(buf[-1][0]):
+                buf[-1] = list(bar)
+            else:
+                if buf:
+                    # nowa świeca zamyka poprzednią – ramka WS niesie tylko nową (otwartą),
+                    # więc zamkniętą do archiwum bierzemy z bufora
+                    closed.append(list(buf[-1]))
+                buf.append(list(bar))
+            ind.update(buf[-1])
+        if closed:
+            out = {int(b[0]): b for b in closed}
+            out.update((int(b[0]), list(b)) for b in bars)
+            bars = [out[ts] for ts in sorted(out)]
+        self._archive(key, bars)
+
+    # ----------------------- planowanie fetchu -----------------------
+
+    def plan_fetch(self, key: CacheKey, tf: str, limit: int, now_ms: Optional[int] = None) -> Tuple[Optional[int], int]:
+        """
+        Zwraca (since, fetch_limit) dla kolejnego zapytania:
+          - (None, limit)        -> pełne pobranie,
+          - (last_ts, n)         -> dociągnięcie n świec od ostatniej zapisanej.
+        """
+        last = self.last_ts(key)
+        if last is None or self.size(key) < limit:
+            return None, limit
+        now_ms = int(now_ms if now_ms is not None else time.time() * 1000)
+        missing = max(0, (now_ms - last) // tf_to_ms(tf)) + 2  # +otwarta +zapas
+        if missing >= limit:
+            return None, limit
+        return last, int(missing)
+
+    async def fetch(self, key: CacheKey, tf: str, limit: int, fetch_fn) -> List[List[float]]:
+        """
+        Wspólny przepływ dla Collectora. `fetch_fn(since, limit)` to korutyna
+        zwracająca listę świec w formacie ccxt.
+        """
+        self.warm(key)
+        since, n = self.plan_fetch(key, tf, limit)
+        bars = await fetch_fn(since, n) or []
+        self.stats["bars_fetched"] += len(bars)
+        if since is None:
+            self.stats["full"] += 1
+            self.replace(key, bars)
+        else:
+            self.stats["incremental"] += 1
+            self.merge(key, bars)
+        return self.get(key, limit)
@@ -1,11 +1,22 @@
 # app/engine/collector.py
 import asyncio
-from typing import Tuple, List, Any, Optional
+import inspect
+import time
+from typing import Tuple, List, Any, Optional, Dict
 
-# Uwaga: Twoje klasy BinanceX/BitgetX są synchronizowane (ccxt)
-# – więc zawołamy je w wątku (asyncio.to_thread).
+# Uwaga: Engine podaje adaptery async (BinanceAX/BitgetAX, ccxt.async_support)
+# – wołamy je bezpośrednio. Synchroniczne BinanceX/BitgetX nadal działają:
+# takie wywołania idą do wątku (asyncio.to_thread).
 # DEX OHLCV pobierzemy przez dexscreener (async).
 from ..datasources.dexscreener import fetch_candles
+from ..config import SETTINGS
+from ..features.ohlcv import OHLCV
+from .candle_cache import CandleCache
+from .ratelimit import get_limiter, request_cost
+from .venue_router import VenueRouter
+
+# endpointy pobierane równolegle w _fetch_bundle – po nich router ocenia giełdę
+BUNDLE_ENDPOINTS = ("fetch_ohlcv", "fetch_ticker", "fetch_order_book")
 
 
 class Collector:
@@ -16,11 +27,53 @@ class Collector:
       - ohlcv: List[List[ts, o, h, l, c, v]] (ts w sekundach)
       - ticker: dict(last/close)
       - orderbook: dict(bids, asks) lub {} dla DEX
+
+    CEX: trzy zapytania (OHLCV/ticker/OB) idą równolegle. Kolejność giełd
+    wybiera VenueRouter (latencja p50/p99, błędy, circuit breaker). W trybie
+    hedged (SETTINGS.hedge_enabled) po `hedge_delay_ms` startuje to samo
+    zapytanie na drugiej najlepszej giełdzie i wygrywa pierwsza odpowiedź.
     """
 
     def __init__(self, binance, bitget):
         self.binance = binance
         self.bitget = bitget
+        self.st = SETTINGS
+        # kolejność = priorytet (pierwsza giełda to primary w trybie hedged)
+        self.venues: Dict[str, Any] = {"binance": binance, "bitget": bitget}
+        # liczniki per giełda – do strojenia hedge_delay_ms
+        self.venue_stats: Dict[str, Dict[str, float]] = {
+            name: {"requests": 0, "ok": 0, "wins": 0, "errors": 0, "lat_ms_sum": 0.0, "lat_ms_last": 0.0}
+            for name in self.venues
+        }
+        # świece per (venue, symbol, tf) – po pierwszym pobraniu tylko dociągamy nowe
+        self.candles = CandleCache(capacity=int(getattr(self.st, "ohlcv_cache_capacity", 500)))
+        # zdrowie giełd per endpoint + circuit breaker
+        self.router = VenueRouter(
+            self.venues,
+            window=int(getattr(self.st, "router_window", 200)),
+            fail_threshold=int(getattr(self.st, "breaker_fail_threshold", 5)),
+            cooldown_sec=float(getattr(self.st, "breaker_cooldown_sec", 30.0)),
+        )
+        # metadane rynków (MarketsCache) – podpinane przez Engine
+        self.markets = None
+        # z której giełdy przyszedł ostatni rynek symbolu (klucz FeatureCache)
+        self.last_venue: Dict[str, str] = {}
+        # opcjonalny MarketStream (WS) – podpinany przez Engine, gdy STREAM_ENABLED
+        self.stream = None
+        # single-flight get_market: (symbol, tf, limit) -> task w locie / (ts, wynik)
+        self._inflight: Dict[Tuple[str, str, int], asyncio.Future] = {}
+        self._recent: Dict[Tuple[str, str, int], Tuple[float, Any]] = {}
+        self.coalesce_stats = {"hits": 0, "coalesced": 0, "misses": 0}
+
+    @property
+    def markets(self):
+        return self._markets
+
+    @markets.setter
+    def markets(self, value) -> None:
+        # router filtruje giełdy po tym, czy notują symbol
+        self._markets = value
+        self.router.markets = value
 
     # ----------------------- helpers -----------------------
 
@@ -32,20 +85,25 @@ class Collector:
         """
         True jeśli symbol jest obsługiwalny:
         - DEX:<chain>:<pairAddr> -> True (OHLCV z Dexscreener)
-        - CEX: sprawdź ticker na Binance/Bitget
+        - CEX: O(1) lookup w indeksie MarketsCache (cache na dysku, bez sieci),
+        - bez indeksu (pierwszy start, cache jeszcze pusty): adapter sync – ping
+          tickera; adapter async – zakładamy True (nie blokujemy pętli zdarzeń,
+          błąd wyjdzie przy get_market).
         """
         if self._is_dex_symbol(symbol):
             return True
-        # CEX ping
-        try:
-            self.binance.fetch_ticker(symbol)
-            return True
-        except Exception:
+        if self.markets is not None and self.markets.known():
+            return self.markets.has(symbol)
+        for ex in self.venues.values():
+            if inspect.iscoroutinefunction(getattr(ex, "fetch_ticker", None)):
+                return True
+            # CEX ping
             try:
-                self.bitget.fetch_ticker(symbol)
+                ex.fetch_ticker(symbol)
                 return True
             except Exception:
-                return False
+                continue
+        return False
 
     # ----------------------- DEX path -----------------------
 
@@ -53,21 +111,19 @@ class Collector:
         """
         DEX:<chain>:<pairAddress> -> pobiera świece z Dexscreener.
         """
-        
-        
         try:
             _, chain, pair_addr = symbol.split(":", 2)
         except ValueError:
             return [], None, None
 
-        bars = await fetch_candles(chain, pair_addr, lookback_hours=48, resolution_sec=900)  # 15m
+        bars = await fetch_candles(pair_addr, minutes=48 * 60, resolution="15")  # 15m
         if not bars:
             return [], None, None
 
         # bars: [{"t":ts,"o":..,"h":..,"l":..,"c":..,"v":..},...]
-        ohlcv = [[int(b["t"]), float(b["o"]), float(b["h"]), float(b["l"]), float(b["c"]), float(b.get("v", 0.0))] for b in bars]
-        ohlcv = ohlcv[-limit:]
-        last = ohlcv[-1][4]
+        ohlcv = OHLCV.from_dex(bars[-limit:])
+        self.last_venue[symbol] = "dex"
+        last = ohlcv.close[-1]
         ticker = {"last": last, "close": last}
         # DEX: bez orderbooka na tym etapie (OBI ustawiamy neutralnie 0.5 w runnerze)
         orderbook = {"bids": [], "asks": []}
@@ -75,47 +131,277 @@ class Collector:
 
     # ----------------------- CEX path -----------------------
 
-    async def _cex_fetch_ohlcv(self, ex, symbol: str, tf: str, limit: int):
-        return await asyncio.to_thread(ex.fetch_ohlcv, symbol, timeframe=tf, limit=limit)
+    def _venue_name(self, ex) -> Optional[str]:
+        for name, v in self.venues.items():
+            if v is ex:
+                return name
+        return None
+
+    async def _cex_call(self, ex, method: str, *args, **kwargs):
+        """
+        Każde zapytanie CEX przechodzi przez wspólny limiter giełdy (waga wg metody,
+        priorytet z kontekstu – patrz engine/ratelimit.py), a jego latencja
+        i wynik trafiają do VenueRouter.
+        Adapter async -> await; adapter sync (ccxt) -> asyncio.to_thread.
+        """
+        venue = self._venue_name(ex)
+        if venue is not None:
+            limit = kwargs.get("limit")
+            if limit is None and len(args) > 1 and isinstance(args[1], int):
+                limit = args[1]
+            await get_limiter(venue).acquire(request_cost(method, limit))
+        fn = getattr(ex, method)
+        t0 = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(fn):
+                res = await fn(*args, **kwargs)
+            else:
+                res = await asyncio.to_thread(fn, *args, **kwargs)
+        except Exception:
+            if venue is not None:
+                self.router.record(venue, method, (time.perf_counter() - t0) * 1000.0, False)
+            raise
+        if venue is not None:
+            self.router.record(venue, method, (time.perf_counter() - t0) * 1000.0, True)
+        return res
+
+    async def _cex_fetch_ohlcv(self, ex, symbol: str, tf: str, limit: int, since: Optional[int] = None):
+        return await self._cex_call(ex, "fetch_ohlcv", symbol, timeframe=tf, limit=limit, since=since)
+
+    async def _cex_fetch_ohlcv_cached(self, venue: str, symbol: str, tf: str, limit: int):
+        """
+        OHLCV przez CandleCache: pełne pobranie tylko na zimno, potem `since=`.
+        """
+        ex = self.venues[venue]
+
+        async def _fetch(since, n):
+            return await self._cex_fetch_ohlcv(ex, symbol, tf, n, since=since)
+
+        return await self.candles.fetch((venue, symbol, tf), tf, limit, _fetch)
 
     async def _cex_fetch_ticker(self, ex, symbol: str):
-        return await asyncio.to_thread(ex.fetch_ticker, symbol)
+        return await self._cex_call(ex, "fetch_ticker", symbol)
 
     async def _cex_fetch_order_book(self, ex, symbol: str, limit: int = 100):
-        return await asyncio.to_thread(ex.fetch_order_book, symbol, limit)
+        return await self._cex_call(ex, "fetch_order_book", symbol, limit)
 
-    async def _get_market_cex(self, symbol: str, tf: str, limit: int):
+    async def _fetch_bundle(self, venue: str, symbol: str, tf: str, limit: int):
         """
-        Najpierw próbujemy Binance, potem Bitget (fallback).
+        OHLCV + ticker + orderbook z jednej giełdy – trzy zapytania równolegle.
+        Rzuca wyjątek, jeśli giełda nie zwróciła OHLCV/tickera.
         """
-        # --- Binance ---
+        ex = self.venues[venue]
+        stats = self.venue_stats[venue]
+        stats["requests"] += 1
+        t0 = time.perf_counter()
         try:
-            ohlcv = await self._cex_fetch_ohlcv(self.binance, symbol, tf, limit)
-            ticker = await self._cex_fetch_ticker(self.binance, symbol)
-            obook = await self._cex_fetch_order_book(self.binance, symbol, 100)
-            if ohlcv and ticker:
-                return ohlcv, ticker, obook
+            ohlcv, ticker, obook = await asyncio.gather(
+                self._cex_fetch_ohlcv_cached(venue, symbol, tf, limit),
+                self._cex_fetch_ticker(ex, symbol),
+                self._cex_fetch_order_book(ex, symbol, 100),
+            )
+            if not (ohlcv and ticker):
+                raise ValueError(f"{venue}: pusty OHLCV/ticker dla {symbol}")
+        except asyncio.CancelledError:
+            self.router.abort(venue)
+            raise
         except Exception:
-            pass
+            stats["errors"] += 1
+            self.router.outcome(venue, False)
+            raise
+        self.router.outcome(venue, True)
+        self.last_venue[symbol] = venue
+        lat_ms = (time.perf_counter() - t0) * 1000.0
+        stats["ok"] += 1
+        stats["lat_ms_sum"] += lat_ms
+        stats["lat_ms_last"] = lat_ms
+        return ohlcv, ticker, obook
+
+    async def _get_market_hedged(self, symbol: str, tf: str, limit: int):
+        """
+        Hedged request: primary (najzdrowsza giełda) startuje od razu, backup
+        (druga) po hedge_delay_ms albo natychmiast, jeśli primary padnie
+        wcześniej. Wygrywa pierwsza poprawna odpowiedź, przegrany jest anulowany.
+        """
+        ranked = self.router.rank(symbol, BUNDLE_ENDPOINTS)
+        primary = next((v for v in ranked if self.router.allow(v)), None)
+        if primary is None:
+            return [], None, None  # wszystkie breakery otwarte
+        ranked = [v for v in ranked if v != primary]
+        delay = max(0, int(getattr(self.st, "hedge_delay_ms", 400))) / 1000.0
 
-        # --- Bitget fallback ---
+        tasks = {asyncio.create_task(self._fetch_bundle(primary, symbol, tf, limit)): primary}
+        done, _ = await asyncio.wait(tasks.keys(), timeout=delay)
+        for t in done:
+            if t.exception() is None:
+                self.venue_stats[primary]["wins"] += 1
+                return t.result()
+            tasks.pop(t)
+
+        backup = next((v for v in ranked if self.router.allow(v)), None)
+        if backup is not None:
+            tasks[asyncio.create_task(self._fetch_bundle(backup, symbol, tf, limit))] = backup
+        pending = set(tasks)
         try:
-            ohlcv = await self._cex_fetch_ohlcv(self.bitget, symbol, tf, limit)
-            ticker = await self._cex_fetch_ticker(self.bitget, symbol)
-            obook = await self._cex_fetch_order_book(self.bitget, symbol, 100)
-            if ohlcv and ticker:
-                return ohlcv, ticker, obook
-        except Exception:
-            pass
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for t in done:
+                    if t.exception() is None:
+                        self.venue_stats[tasks[t]]["wins"] += 1
+                        return t.result()
+        finally:
+            for t in pending:
+                t.cancel()
 
         return [], None, None
 
+    async def _get_market_cex(self, symbol: str, tf: str, limit: int):
+        """
+        Najpierw lokalny stan ze strumienia WS (jeśli świeży), potem REST:
+        giełdy notujące symbol od najzdrowszej (VenueRouter), kolejna jako fallback.
+        Giełdy z otwartym breakerem są pomijane.
+        W trybie hedged – wyścig dwóch najlepszych (patrz _get_market_hedged).
+        """
+        if self.stream is not None:
+            snap = self.stream.snapshot(symbol, tf, limit)
+            if snap is not None:
+                self.last_venue[symbol] = self.stream.venue
+                return snap
+
+        if bool(getattr(self.st, "hedge_enabled", False)):
+            return await self._get_market_hedged(symbol, tf, limit)
+
+        for venue in self.router.rank(symbol, BUNDLE_ENDPOINTS):
+            if not self.router.allow(venue):
+                continue
+            try:
+                res = await self._fetch_bundle(venue, symbol, tf, limit)
+                self.venue_stats[venue]["wins"] += 1
+                return res
+            except Exception:
+                continue
+
+        return [], None, None
+
+    def indicators(self, symbol: str, tf: str, ohlcv: List[List[float]]):
+        """
+        IndicatorState z CandleCache opisujący dokładnie `ohlcv` (ta sama ostatnia
+        świeca) albo None – wtedy liczymy atr()/fvg_scores() po całej serii.
+        """
+        for venue in self.router.rank(symbol):
+            ind = self.candles.indicators((venue, symbol, tf))
+            if ind is not None and ind.matches(ohlcv):
+                return ind
+        return None
+
+    def get_history(self, symbol: str, tf: str = "15m", limit: int = 200) -> OHLCV:
+        """
+        Świece bez sieci: CandleCache, a gdy w pamięci za mało – archiwum na dysku
+        (giełdy w kolejności routera). [] jeśli nic nie ma – wtedy get_market().
+        """
+        best = OHLCV()
+        for venue in self.router.rank(symbol):
+            key = (venue, symbol, tf)
+            bars = self.candles.get(key, limit)
+            if len(bars) < limit and self.candles.archive is not None:
+                arch = self.candles.archive.tail(key, limit)
+                if len(arch) > len(bars):
+                    bars = OHLCV.from_rows(arch)
+            if len(bars) > len(best):
+                best = bars
+            if len(best) >= limit:
+                break
+        return best
+
+    async def backfill_archive(self, max_bars: int = 1000) -> int:
+        """Uzupełnij dziury w archiwum dla kluczy aktywnych w CandleCache."""
+        arch = self.candles.archive
+        if arch is None:
+            return 0
+        added = 0
+        for key in self.candles.keys():
+            venue, symbol, tf = key
+            ex = self.venues.get(venue)
+            if ex is None:
+                continue
+
+            async def _fetch(since, n, ex=ex, symbol=symbol, tf=tf):
+                return await self._cex_fetch_ohlcv(ex, symbol, tf, n, since=since)
+
+            try:
+                added += await arch.backfill(key, _fetch, max_bars=max_bars)
+            except Exception as e:
+                print(f"[candles] backfill {key} error: {e}")
+        return added
+
+    def venue_stats_snapshot(self) -> Dict[str, Dict[str, float]]:
+        """
+        Liczniki per giełda: requests / ok / wins / errors / śr. i ostatnia latencja (ms).
+        `requests - ok - errors` = zapytania anulowane (przegrane wyścigi hedged).
+        """
+        out: Dict[str, Dict[str, float]] = {}
+        for venue, s in self.venue_stats.items():
+            out[venue] = dict(s, lat_ms_avg=s["lat_ms_sum"] / max(1, s["ok"]))
+        return out
+
     # ----------------------- public API -----------------------
 
+    async def close(self):
+        """Zamyka sesje HTTP adapterów async (no-op dla sync)."""
+        for ex in self.venues.values():
+            close = getattr(ex, "close", None)
+            if close and inspect.iscoroutinefunction(close):
+                await close()
+
     async def get_market(self, symbol: str, tf: str = "15m", limit: int = 200):
         """
         Wspólny interfejs dla Runnera.
+
+        Single-flight: równoległe zapytania o ten sam (symbol, tf, limit) dzielą
+        jedno zapytanie w locie, a wynik jest używany ponownie przez
+        `market_fresh_sec` (np. wykres w Reporterze tuż po tick_symbol).
         """
+        key = (symbol, tf, int(limit))
+        fresh = float(getattr(self.st, "market_fresh_sec", 5.0))
+        hit = self._recent.get(key)
+        if hit is not None and time.monotonic() - hit[0] <= fresh:
+            self.coalesce_stats["hits"] += 1
+            return hit[1]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesce_stats["coalesced"] += 1
+            return await asyncio.shield(task)
+
+        self.coalesce_stats["misses"] += 1
+        task = asyncio.ensure_future(self._get_market_uncached(symbol, tf, limit))
+        self._inflight[key] = task
+        task.add_done_callback(lambda t, k=key: self._on_market_done(k, t))
+        # shield: anulowanie pierwszego wołającego nie zabija zapytania pozostałym
+        return await asyncio.shield(task)
+
+    async def _get_market_uncached(self, symbol: str, tf: str, limit: int):
         if self._is_dex_symbol(symbol):
             return await self._get_market_dex(symbol, tf, limit)
         return await self._get_market_cex(symbol, tf, limit)
+
+    def _on_market_done(self, key, task: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        res = task.result()
+        if not res or not res[0]:
+            return  # pustych wyników nie cache'ujemy
+        now = time.monotonic()
+        if len(self._recent) > 1024:
+            fresh = float(getattr(self.st, "market_fresh_sec", 5.0))
+            for k in [k for k, (ts, _) in self._recent.items() if now - ts > fresh]:
+                del self._recent[k]
+        self._recent[key] = (now, res)
+
+    def coalesce_stats_snapshot(self) -> Dict[str, float]:
+        """hits (świeży wynik) / coalesced (wspólne zapytanie w locie) / misses + hit rate."""
+        s = dict(self.coalesce_stats)
+        total = s["hits"] + s["coalesced"] + s["misses"]
+        s["hit_rate"] = (s["hits"] + s["coalesced"]) / total if total else 0.0
+        return s
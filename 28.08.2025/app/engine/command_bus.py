@@ -3,6 +3,8 @@ import time
 import sqlite3
 from typing import Optional, Dict, Any
 
+from .ratelimit import get_limiter, request_cost, PRIO_INTERACTIVE
+
 class CommandBus:
     """
     Prosty dispatcher komend z tabeli `commands`.
@@ -22,6 +24,11 @@ class CommandBus:
     def _now(self) -> int:
         return int(time.time())
 
+    def _ex_call(self, venue: str, ex, method: str, *args):
+        """Zapytanie do giełdy przez wspólny limiter (komendy = priorytet interaktywny)."""
+        get_limiter(venue).acquire_blocking(request_cost(method), PRIO_INTERACTIVE)
+        return getattr(ex, method)(*args)
+
     def _log_health(self, scope: str, status: str, note: str = ""):
         cur = self.conn.cursor()
         cur.execute("INSERT INTO health(ts, scope, status, note) VALUES(?, ?, ?, ?)",
@@ -65,15 +72,15 @@ class CommandBus:
                     # szybki public/auth check przez klasy exchange
                     b_pub = g_pub = 1
                     try:
-                        _ = self.binance.fetch_ticker('BTC/USDT')
+                        _ = self._ex_call("binance", self.binance, "fetch_ticker", 'BTC/USDT')
                     except Exception:
                         b_pub = 0
                     try:
-                        _ = self.bitget.fetch_ticker('BTC/USDT')
+                        _ = self._ex_call("bitget", self.bitget, "fetch_ticker", 'BTC/USDT')
                     except Exception:
                         g_pub = 0
-                    b_auth = 1 if self.binance.fetch_balance_safe() else 0
-                    g_auth = 1 if self.bitget.fetch_balance_safe() else 0
+                    b_auth = 1 if self._ex_call("binance", self.binance, "fetch_balance_safe") else 0
+                    g_auth = 1 if self._ex_call("bitget", self.bitget, "fetch_balance_safe") else 0
                     self._log_health("binance", "ok" if b_pub else "fail", f"auth={b_auth}")
                     self._log_health("bitget", "ok" if g_pub else "fail", f"auth={g_auth}")
 
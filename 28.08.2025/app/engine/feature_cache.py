@@ -0,0 +1,105 @@
+# app/engine/feature_cache.py
+"""
+Cache wyników feature'ów (ATR/FVG/OBI/RR) w obrębie jednej świecy.
+
+Ten sam symbol bywa liczony kilka razy w ciągu świecy (rotacja loop_tick,
+/scan, autoscan z relaxem progów, /analyze_pair). Klucz:
+(venue, symbol, tf, ts ostatniej ZAMKNIĘTEJ świecy, parametry) – nowa
+świeca = nowy klucz, więc stare wpisy po prostu wypadają z LRU.
+
+Dodatkowo `max_age_sec`: OBI i otwarta świeca zmieniają się w trakcie baru,
+więc wpis starszy niż max_age jest liczony od nowa (0 = cały bar).
+Limit: liczba wpisów i przybliżony rozmiar w bajtach; ewikcja LRU.
+"""
+from __future__ import annotations
+
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+FeatureKey = Tuple[str, str, str, int, Hashable]
+
+# parametry standardowego zestawu (ATR 14, seed RR: SL 0.5xATR / TP 0.8xATR, OBI top-20)
+FEATURE_PARAMS = ("atr", 14, "rr", 0.5, 0.8, "obi", 20)
+
+
+def last_closed_ts(ohlcv) -> int:
+    """ts przedostatniej świecy (ostatnia jest otwarta); 0 dla pustej serii."""
+    if not ohlcv:
+        return 0
+    return int(ohlcv[-2][0]) if len(ohlcv) >= 2 else int(ohlcv[-1][0])
+
+
+class FeatureCache:
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 2 * 1024 * 1024, max_age_sec: float = 60.0):
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1024, int(max_bytes))
+        self.max_age_sec = float(max_age_sec)
+        self._data: "OrderedDict[FeatureKey, Tuple[float, int, Any]]" = OrderedDict()  # key -> (ts, size, value)
+        self.bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+
+    @staticmethod
+    def key(venue: str, symbol: str, tf: str, ohlcv, params: Hashable = ()) -> FeatureKey:
+        return (venue or "?", symbol, tf, last_closed_ts(ohlcv), params)
+
+    @staticmethod
+    def _size(key: FeatureKey, value: Any) -> int:
+        size = sys.getsizeof(key) + sys.getsizeof(value)
+        if isinstance(value, (tuple, list)):
+            size += sum(sys.getsizeof(v) for v in value)
+        elif isinstance(value, dict):
+            size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+        return size
+
+    # ----------------------- odczyt / zapis -----------------------
+
+    def get(self, key: FeatureKey) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            self.stats["misses"] += 1
+            return None
+        ts, _size, value = item
+        if self.max_age_sec > 0 and time.monotonic() - ts > self.max_age_sec:
+            self._drop(key)
+            self.stats["expired"] += 1
+            self.stats["misses"] += 1
+            return None
+        self._data.move_to_end(key)
+        self.stats["hits"] += 1
+        return value
+
+    def put(self, key: FeatureKey, value: Any) -> None:
+        if key in self._data:
+            self._drop(key)
+        size = self._size(key, value)
+        self._data[key] = (time.monotonic(), size, value)
+        self.bytes += size
+        while self._data and (len(self._data) > self.max_entries or self.bytes > self.max_bytes):
+            self._drop(next(iter(self._data)))
+            self.stats["evictions"] += 1
+
+    def get_or_compute(self, key: FeatureKey, fn: Callable[[], Any]) -> Any:
+        value = self.get(key)
+        if value is None:
+            value = fn()
+            self.put(key, value)
+        return value
+
+    def _drop(self, key: FeatureKey) -> None:
+        _ts, size, _value = self._data.pop(key)
+        self.bytes -= size
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.bytes = 0
+
+    # ----------------------- statystyki -----------------------
+
+    def hit_rate(self) -> float:
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return dict(self.stats, entries=len(self._data), bytes=self.bytes, hit_rate=self.hit_rate())
@@ -1,7 +1,21 @@
-from typing import Tuple
+from typing import Dict, Tuple
 def fuse_edge(long_fvg: float, short_fvg: float, rr_coeff: float, obi: float,
               news: float, whale: float, onchain: float,
-              w_fvg: float, w_rr: float, w_obi: float, w_news: float, w_whale: float, w_onc: float) -> Tuple[float, float]:
+              w_fvg: float, w_rr: float, w_obi: float, w_news: float, w_whale: float, w_onc: float,
+              wobi: float = 0.5, depth: float = 0.5, micro: float = 0.5,
+              w_wobi: float = 0.0, w_depth: float = 0.0, w_micro: float = 0.0) -> Tuple[float, float]:
     long_edge = (w_fvg*long_fvg + w_rr*rr_coeff + w_obi*obi + w_news*news + w_whale*whale + w_onc*onchain)
     short_edge = (w_fvg*short_fvg + w_rr*(1-rr_coeff) + w_obi*(1-obi) + w_news*(1-news) + w_whale*(1-whale) + w_onc*(1-onchain))
+    # feature'y booka (features/book.py) – domyślnie wagi 0, czyli bez zmian
+    long_edge += w_wobi*wobi + w_depth*depth + w_micro*micro
+    short_edge += w_wobi*(1-wobi) + w_depth*(1-depth) + w_micro*(1-micro)
     return long_edge, short_edge
+
+def book_inputs(bf: Dict[str, float], st) -> Dict[str, float]:
+    """kwargs dla fuse_edge z wyniku book_features() i wag z SETTINGS."""
+    return dict(
+        wobi=bf["wobi"], depth=bf["depth_coeff"], micro=bf["micro_coeff"],
+        w_wobi=float(getattr(st, "w_wobi", 0.0)),
+        w_depth=float(getattr(st, "w_depth", 0.0)),
+        w_micro=float(getattr(st, "w_micro", 0.0)),
+    )
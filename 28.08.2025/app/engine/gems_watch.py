@@ -0,0 +1,138 @@
+# app/engine/gems_watch.py
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+from ..datasources.dexscreener import PAIRS_BATCH_MAX, fetch_pairs_batch
+
+
+@dataclass
+class GemQuote:
+    """Stan pary DEX z ostatniego odświeżenia (price / liquidity / volume / txns)."""
+    chain: str
+    pair_addr: str
+    symbol: str = ""
+    price_usd: float = 0.0
+    liquidity_usd: float = 0.0
+    volume_h24: float = 0.0
+    buys_h24: int = 0
+    sells_h24: int = 0
+    change_h24: float = 0.0
+    url: str = ""
+    ts: float = field(default_factory=time.time)
+
+    @classmethod
+    def from_pair(cls, p: Dict[str, Any]) -> "GemQuote":
+        tx = (p.get("txns") or {}).get("h24") or {}
+        base = (p.get("baseToken") or {}).get("symbol", "?")
+        quote = (p.get("quoteToken") or {}).get("symbol", "?")
+        return cls(
+            chain=str(p.get("chainId") or p.get("chain") or ""),
+            pair_addr=str(p.get("pairAddress") or ""),
+            symbol=f"{base}/{quote}",
+            price_usd=float(p.get("priceUsd") or 0.0),
+            liquidity_usd=float((p.get("liquidity") or {}).get("usd") or 0.0),
+            volume_h24=float((p.get("volume") or {}).get("h24") or 0.0),
+            buys_h24=int(tx.get("buys") or 0),
+            sells_h24=int(tx.get("sells") or 0),
+            change_h24=float((p.get("priceChange") or {}).get("h24") or 0.0),
+            url=str(p.get("url") or ""),
+        )
+
+    def age(self) -> float:
+        return time.time() - self.ts
+
+
+class GemsWatch:
+    """
+    Lokalny snapshot par z watchlisty `gems` (status watch/sandbox).
+
+    - refresh()      – batch po max 30 adresów na zapytanie, chainy równolegle,
+    - loop_refresh() – odświeżanie w tle co `ttl_sec` (task w Engine),
+    - get(addr)      – odczyt z pamięci (bez sieci) dla /gem i analyze_dex_pair.
+    Błąd jednego chainu nie kasuje jego poprzednich danych.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, ttl_sec: float = 60.0):
+        self.conn = conn
+        self.ttl_sec = float(ttl_sec)
+        self.quotes: Dict[str, GemQuote] = {}  # pair_addr (lower) -> GemQuote
+        self.last_refresh = 0.0
+        self.stats = {"refreshes": 0, "requests": 0, "errors": 0}
+
+    # ----------------------- watchlista -----------------------
+
+    def watchlist(self) -> Dict[str, List[str]]:
+        """chain -> [pair_addr, ...] z tabeli gems."""
+        cur = self.conn.cursor()
+        cur.execute(
+            "SELECT chain, pair_addr FROM gems "
+            "WHERE pair_addr IS NOT NULL AND pair_addr != '' AND chain IS NOT NULL "
+            "AND COALESCE(status, 'watch') IN ('watch', 'sandbox')"
+        )
+        out: Dict[str, List[str]] = {}
+        for chain, addr in cur.fetchall():
+            out.setdefault(str(chain).lower(), []).append(str(addr))
+        return out
+
+    # ----------------------- odświeżanie -----------------------
+
+    async def _fetch_chain(self, chain: str, addrs: List[str]) -> List[Dict[str, Any]]:
+        chunks = [addrs[i:i + PAIRS_BATCH_MAX] for i in range(0, len(addrs), PAIRS_BATCH_MAX)]
+        self.stats["requests"] += len(chunks)
+        results = await asyncio.gather(*(fetch_pairs_batch(chain, c) for c in chunks), return_exceptions=True)
+        pairs: List[Dict[str, Any]] = []
+        for res in results:
+            if isinstance(res, Exception):
+                self.stats["errors"] += 1
+                print(f"[gems] {chain} batch error: {res}")
+                continue
+            pairs.extend(res)
+        return pairs
+
+    async def refresh(self) -> int:
+        """Odśwież całą watchlistę. Zwraca liczbę zaktualizowanych par."""
+        wl = self.watchlist()
+        results = await asyncio.gather(*(self._fetch_chain(ch, a) for ch, a in wl.items()))
+        n = self.update_from_pairs(p for pairs in results for p in pairs)
+        # pary usunięte z watchlisty wypadają ze snapshotu
+        keep = {a.lower() for addrs in wl.values() for a in addrs}
+        for addr in [a for a in self.quotes if a not in keep]:
+            del self.quotes[addr]
+        self.last_refresh = time.time()
+        self.stats["refreshes"] += 1
+        return n
+
+    def update_from_pairs(self, pairs: Iterable[Dict[str, Any]]) -> int:
+        """Wpisz obiekty `pair` Dexscreenera do snapshotu (np. z /gem trending)."""
+        n = 0
+        for p in pairs:
+            q = GemQuote.from_pair(p)
+            if q.pair_addr:
+                self.quotes[q.pair_addr.lower()] = q
+                n += 1
+        return n
+
+    async def loop_refresh(self) -> None:
+        while True:
+            try:
+                if self.watchlist():
+                    await self.refresh()
+            except Exception as e:
+                print(f"[gems] refresh error: {e}")
+            await asyncio.sleep(max(10.0, self.ttl_sec))
+
+    # ----------------------- odczyt -----------------------
+
+    def get(self, pair_addr: str) -> Optional[GemQuote]:
+        return self.quotes.get((pair_addr or "").lower())
+
+    def items(self) -> List[GemQuote]:
+        return sorted(self.quotes.values(), key=lambda q: q.liquidity_usd, reverse=True)
+
+    def age(self) -> float:
+        return time.time() - self.last_refresh if self.last_refresh else float("inf")
@@ -0,0 +1,212 @@
+# app/engine/indicators.py
+"""
+Inkrementalne wskaźniki dla strumienia świec – O(1) na aktualizację.
+
+Konwencja jak w features/fvg.py: ostatnia świeca serii to świeca "otwarta"
+(może się jeszcze zmieniać), wszystkie wcześniejsze są zamknięte.
+
+    update(bar) z nowym ts      -> poprzednia otwarta zostaje zamknięta, `bar` jest nową otwartą,
+    update(bar) z tym samym ts  -> podmiana otwartej (kolejna ramka kline / incremental fetch),
+    starszy ts                  -> ignorowany.
+
+IndicatorState trzyma komplet (ATR simple + Wilder, FVG, rolling high/low)
+per klucz CandleCache i jest aktualizowany razem z ring-bufferem.
+Wartości simple ATR / FVG odpowiadają atr() / fvg_scores() policzonym
+na tej samej serii (z dokładnością do zaokrągleń sumy bieżącej).
+"""
+from __future__ import annotations
+
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+from ..features.fvg import fvg_from_window
+
+Bar = List[float]
+
+
+def true_range(bar: Bar, prev_close: float) -> float:
+    high, low = bar[2], bar[3]
+    return max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+
+class IncrementalATR:
+    """
+    ATR(period) – `mode="simple"` (średnia z okna, jak fvg.atr) albo
+    `mode="wilder"` (RMA: atr = (atr*(p-1) + tr) / p, seed = średnia pierwszych p TR).
+    """
+
+    RESYNC_EVERY = 1000  # co ile zamknięć przeliczyć sumę okna od nowa (dryf float)
+
+    def __init__(self, period: int = 14, mode: str = "simple"):
+        if mode not in ("simple", "wilder"):
+            raise ValueError(f"nieznany tryb ATR: {mode!r}")
+        self.period = max(1, int(period))
+        self.mode = mode
+        # simple: TR zamkniętych świec (okno bez otwartej)
+        self._trs: Deque[float] = deque(maxlen=self.period - 1)
+        self._sum = 0.0
+        self._closes = 0
+        # wilder
+        self._seed: List[float] = []
+        self._rma: Optional[float] = None
+        # otwarta świeca
+        self._prev_close: Optional[float] = None
+        self._open: Optional[Bar] = None
+        self._open_tr: Optional[float] = None
+
+    def update(self, bar: Bar, new: bool = True) -> None:
+        if new and self._open is not None:
+            self._close(self._open_tr)
+            self._prev_close = self._open[4]
+        self._open = bar
+        self._open_tr = true_range(bar, self._prev_close) if self._prev_close is not None else None
+
+    def _close(self, tr: Optional[float]) -> None:
+        if tr is None:
+            return  # pierwsza świeca serii nie ma TR
+        if self._trs.maxlen:
+            if len(self._trs) == self._trs.maxlen:
+                self._sum -= self._trs[0]
+            self._trs.append(tr)
+            self._sum += tr
+        self._closes += 1
+        if self._closes % self.RESYNC_EVERY == 0:
+            self._sum = sum(self._trs)
+        if self._rma is None:
+            self._seed.append(tr)
+            if len(self._seed) == self.period:
+                self._rma = sum(self._seed) / self.period
+                self._seed = []
+        else:
+            self._rma = (self._rma * (self.period - 1) + tr) / self.period
+
+    @property
+    def value(self) -> float:
+        if self.mode == "wilder" and self._rma is not None:
+            if self._open_tr is None:
+                return self._rma
+            return (self._rma * (self.period - 1) + self._open_tr) / self.period
+        if self.mode == "wilder":
+            # jeszcze bez seeda – średnia z tego, co jest
+            trs = self._seed + ([self._open_tr] if self._open_tr is not None else [])
+            return sum(trs) / len(trs) if trs else 0.0
+        n = len(self._trs) + (1 if self._open_tr is not None else 0)
+        if n == 0:
+            return 0.0
+        return (self._sum + (self._open_tr or 0.0)) / n
+
+
+class FvgTracker:
+    """Ostatnie 4 świece + licznik – fvg_scores() bez skanowania historii."""
+
+    def __init__(self):
+        self._bars: Deque[Bar] = deque(maxlen=4)
+        self.count = 0
+
+    def update(self, bar: Bar, new: bool = True) -> None:
+        if new or not self._bars:
+            self._bars.append(bar)
+            self.count += 1
+        else:
+            self._bars[-1] = bar
+
+    def scores(self, atr_val: float) -> Tuple[float, float]:
+        if self.count < 5:
+            return 0.5, 0.5
+        return fvg_from_window(list(self._bars), atr_val or 1e-6)
+
+
+class RollingHighLow:
+    """Max high / min low z ostatnich `window` świec (z otwartą) – kolejki monotoniczne."""
+
+    def __init__(self, window: int = 20):
+        self.window = max(1, int(window))
+        self._hi: Deque[Tuple[int, float]] = deque()  # (idx, high) malejąco
+        self._lo: Deque[Tuple[int, float]] = deque()  # (idx, low) rosnąco
+        self._n_closed = 0
+        self._open: Optional[Bar] = None
+
+    def update(self, bar: Bar, new: bool = True) -> None:
+        if new and self._open is not None:
+            idx, hi, lo = self._n_closed, self._open[2], self._open[3]
+            while self._hi and self._hi[-1][1] <= hi:
+                self._hi.pop()
+            self._hi.append((idx, hi))
+            while self._lo and self._lo[-1][1] >= lo:
+                self._lo.pop()
+            self._lo.append((idx, lo))
+            self._n_closed += 1
+            oldest = self._n_closed - (self.window - 1)  # zamknięte w oknie: idx >= oldest
+            while self._hi and self._hi[0][0] < oldest:
+                self._hi.popleft()
+            while self._lo and self._lo[0][0] < oldest:
+                self._lo.popleft()
+        self._open = bar
+
+    @property
+    def high(self) -> float:
+        if self._open is None:
+            return 0.0
+        return max(self._open[2], self._hi[0][1]) if self._hi else self._open[2]
+
+    @property
+    def low(self) -> float:
+        if self._open is None:
+            return 0.0
+        return min(self._open[3], self._lo[0][1]) if self._lo else self._open[3]
+
+
+class IndicatorState:
+    """Komplet wskaźników dla jednej serii (venue, symbol, tf)."""
+
+    def __init__(self, atr_period: int = 14, hl_window: int = 20):
+        self.atr = IncrementalATR(atr_period, "simple")
+        self.atr_wilder = IncrementalATR(atr_period, "wilder")
+        self.fvg = FvgTracker()
+        self.hl = RollingHighLow(hl_window)
+        self.last_ts: Optional[int] = None
+        self.last_close: Optional[float] = None
+
+    def update(self, bar: Bar) -> None:
+        ts = int(bar[0])
+        if self.last_ts is not None and ts < self.last_ts:
+            return
+        new = self.last_ts is None or ts > self.last_ts
+        self.atr.update(bar, new)
+        self.atr_wilder.update(bar, new)
+        self.fvg.update(bar, new)
+        self.hl.update(bar, new)
+        self.last_ts = ts
+        self.last_close = float(bar[4])
+
+    def rebuild(self, bars: List[Bar]) -> "IndicatorState":
+        for bar in bars:
+            self.update(bar)
+        return self
+
+    @property
+    def bars(self) -> int:
+        return self.fvg.count
+
+    def matches(self, ohlcv: List[Bar]) -> bool:
+        """Czy stan opisuje dokładnie tę serię (ta sama ostatnia świeca, dość historii)."""
+        if not ohlcv or self.last_ts is None:
+            return False
+        last = ohlcv[-1]
+        return (
+            int(last[0]) == self.last_ts
+            and float(last[4]) == self.last_close
+            and self.bars >= min(len(ohlcv), self.atr.period + 1)
+        )
+
+    def fvg_scores(self) -> Tuple[float, float]:
+        return self.fvg.scores(self.atr.value)
+
+    def snapshot(self) -> dict:
+        return {
+            "atr": self.atr.value,
+            "atr_wilder": self.atr_wilder.value,
+            "high": self.hl.high,
+            "low": self.hl.low,
+            "bars": self.bars,
+        }
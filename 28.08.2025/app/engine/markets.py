@@ -0,0 +1,124 @@
+# app/engine/markets.py
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from .ratelimit import set_task_priority, PRIO_BACKGROUND
+
+
+def _compact_market(m: Dict[str, Any]) -> Dict[str, Any]:
+    """Z pełnej struktury ccxt zostawiamy tylko to, czego potrzebujemy."""
+    return {
+        "id": m.get("id"),
+        "base": m.get("base"),
+        "quote": m.get("quote"),
+        "type": m.get("type"),
+        "active": m.get("active"),
+        "precision": m.get("precision") or {},
+        "limits": m.get("limits") or {},
+    }
+
+
+class MarketsCache:
+    """
+    Metadane rynków (symbole, precyzja, limity, status) per giełda – na dysku
+    (`<dir>/<venue>.json`) i w pamięci.
+
+    - load_disk()      – ciepły start: natychmiastowe wczytanie z pliku (sync, przy starcie),
+    - loop_refresh()   – odświeżanie load_markets() w tle, gdy plik starszy niż ttl,
+    - has(symbol)      – O(1) lookup w indeksie, bez zapytań do giełdy.
+    """
+
+    def __init__(self, collector, cache_dir: str = "data/markets", ttl_sec: float = 6 * 3600):
+        self.collector = collector
+        self.cache_dir = cache_dir
+        self.ttl_sec = float(ttl_sec)
+        self.markets: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.loaded_at: Dict[str, float] = {}
+        self._index: Dict[str, Set[str]] = {}  # symbol -> {venue, ...} (tylko aktywne)
+
+    def _path(self, venue: str) -> str:
+        return os.path.join(self.cache_dir, f"{venue}.json")
+
+    def _set(self, venue: str, markets: Dict[str, Dict[str, Any]], ts: float) -> None:
+        self.markets[venue] = markets
+        self.loaded_at[venue] = ts
+        for venues in self._index.values():
+            venues.discard(venue)
+        for sym, m in markets.items():
+            if m.get("active") is False:
+                continue
+            self._index.setdefault(sym, set()).add(venue)
+
+    # ----------------------- dysk -----------------------
+
+    def load_disk(self) -> int:
+        """Wczytaj wszystkie giełdy z dysku. Zwraca liczbę wczytanych giełd."""
+        n = 0
+        for venue in self.collector.venues:
+            try:
+                with open(self._path(venue), "r", encoding="utf-8") as fh:
+                    data = json.load(fh)
+                self._set(venue, data.get("markets") or {}, float(data.get("ts") or 0.0))
+                n += 1
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                print(f"[markets] {venue}: uszkodzony cache ({e}) – pobiorę od nowa")
+        return n
+
+    def _write_disk(self, venue: str, markets: Dict[str, Dict[str, Any]], ts: float) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = self._path(venue) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"ts": ts, "markets": markets}, fh)
+        os.replace(tmp, self._path(venue))  # atomowo – bez pół-zapisanych plików
+
+    # ----------------------- odświeżanie -----------------------
+
+    async def refresh(self, venue: str) -> None:
+        ex = self.collector.venues[venue]
+        raw = await self.collector._cex_call(ex, "load_markets", True)
+        markets = {sym: _compact_market(m) for sym, m in (raw or {}).items()}
+        if not markets:
+            return
+        ts = time.time()
+        self._set(venue, markets, ts)
+        await asyncio.to_thread(self._write_disk, venue, markets, ts)
+
+    def age(self, venue: str) -> float:
+        ts = self.loaded_at.get(venue)
+        return time.time() - ts if ts else float("inf")
+
+    async def loop_refresh(self) -> None:
+        set_task_priority(PRIO_BACKGROUND)
+        while True:
+            for venue in list(self.collector.venues):
+                if self.age(venue) < self.ttl_sec:
+                    continue
+                try:
+                    await self.refresh(venue)
+                except Exception as e:
+                    print(f"[markets] refresh {venue} error: {e}")
+            await asyncio.sleep(60)
+
+    # ----------------------- odczyt -----------------------
+
+    def known(self) -> bool:
+        return bool(self._index)
+
+    def has(self, symbol: str, venue: Optional[str] = None) -> bool:
+        venues = self._index.get(symbol)
+        if not venues:
+            return False
+        return venue is None or venue in venues
+
+    def venues_for(self, symbol: str) -> List[str]:
+        return sorted(self._index.get(symbol) or ())
+
+    def market(self, venue: str, symbol: str) -> Optional[Dict[str, Any]]:
+        return (self.markets.get(venue) or {}).get(symbol)
@@ -0,0 +1,210 @@
+# app/engine/orderbook.py
+"""
+Lokalna replika order booka L2 (snapshot + diff updates).
+
+Protokół jak w Binance diff-depth (`<sym>@depth@100ms`):
+  1) buforujemy eventy, pobieramy snapshot REST (lastUpdateId = L),
+  2) odrzucamy eventy z u <= L, pierwszy zastosowany musi mieć U <= L+1 <= u,
+  3) każdy kolejny musi mieć U == poprzednie u + 1 – inaczej dziura -> resync.
+
+LocalOrderBook daje tanie akcesory (top_sums, mid, spread) i zachowuje się
+jak dict ccxt (`ob.get("bids")`), więc obi_coeff i reszta kodu czytają replikę
+zamiast pobierać pełny book przez REST.
+"""
+from __future__ import annotations
+
+import asyncio
+from bisect import bisect_left, insort
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+Level = List[float]
+
+
+class _Side:
+    """Jedna strona booka: dict cena->ilość + posortowana lista kluczy."""
+
+    def __init__(self, descending: bool):
+        self.sign = -1.0 if descending else 1.0
+        self.qty: Dict[float, float] = {}
+        self._keys: List[float] = []  # sign*price rosnąco => najlepsza cena pierwsza
+
+    def clear(self) -> None:
+        self.qty.clear()
+        self._keys.clear()
+
+    def set(self, price: float, qty: float) -> None:
+        k = self.sign * price
+        if qty <= 0.0:
+            if price in self.qty:
+                del self.qty[price]
+                i = bisect_left(self._keys, k)
+                if i < len(self._keys) and self._keys[i] == k:
+                    self._keys.pop(i)
+            return
+        if price not in self.qty:
+            insort(self._keys, k)
+        self.qty[price] = qty
+
+    def best(self) -> Optional[float]:
+        return self.sign * self._keys[0] if self._keys else None
+
+    def levels(self, n: int) -> List[Level]:
+        return [[self.sign * k, self.qty[self.sign * k]] for k in self._keys[:n]]
+
+    def size_sum(self, n: int) -> float:
+        return sum(self.qty[self.sign * k] for k in self._keys[:n])
+
+
+class LocalOrderBook:
+    def __init__(self, symbol: str, depth: int = 100):
+        self.symbol = symbol
+        self.depth = depth  # ile poziomów oddaje get("bids"/"asks")
+        self.bids = _Side(descending=True)
+        self.asks = _Side(descending=False)
+        self.last_update_id: Optional[int] = None
+        self.synced = False
+
+    # ----------------------- aktualizacje -----------------------
+
+    def apply_snapshot(self, snap: Dict[str, Any]) -> None:
+        """Snapshot ccxt/Binance (nonce / lastUpdateId)."""
+        self.bids.clear()
+        self.asks.clear()
+        for p, q in snap.get("bids", []):
+            self.bids.set(float(p), float(q))
+        for p, q in snap.get("asks", []):
+            self.asks.set(float(p), float(q))
+        uid = snap.get("lastUpdateId", snap.get("nonce"))
+        self.last_update_id = int(uid) if uid is not None else None
+        self.synced = self.last_update_id is not None
+
+    def apply_diff(self, first_id: int, final_id: int, bids, asks) -> bool:
+        """
+        Zastosuj event diff (U=first_id, u=final_id). Zwraca False przy dziurze
+        w sekwencji – book jest wtedy oznaczony jako niezsynchronizowany.
+        """
+        if not self.synced or self.last_update_id is None:
+            return False
+        if final_id <= self.last_update_id:
+            return True  # event sprzed snapshotu
+        if first_id > self.last_update_id + 1:
+            self.synced = False
+            return False
+        for p, q in bids:
+            self.bids.set(float(p), float(q))
+        for p, q in asks:
+            self.asks.set(float(p), float(q))
+        self.last_update_id = final_id
+        return True
+
+    # ----------------------- akcesory -----------------------
+
+    def top_sums(self, n: int = 20) -> Tuple[float, float]:
+        """(suma ilości top-N bid, suma ilości top-N ask)."""
+        return self.bids.size_sum(n), self.asks.size_sum(n)
+
+    def best_bid(self) -> Optional[float]:
+        return self.bids.best()
+
+    def best_ask(self) -> Optional[float]:
+        return self.asks.best()
+
+    def mid(self) -> Optional[float]:
+        b, a = self.bids.best(), self.asks.best()
+        if b is None or a is None:
+            return None
+        return (b + a) / 2.0
+
+    def spread(self) -> Optional[float]:
+        b, a = self.bids.best(), self.asks.best()
+        if b is None or a is None:
+            return None
+        return a - b
+
+    def get(self, key: str, default=None):
+        """Zgodność z dict ccxt: ob.get('bids') / ob.get('asks')."""
+        if key == "bids":
+            return self.bids.levels(self.depth)
+        if key == "asks":
+            return self.asks.levels(self.depth)
+        if key == "nonce":
+            return self.last_update_id
+        return default
+
+    def __getitem__(self, key: str):
+        if key not in ("bids", "asks", "nonce"):
+            raise KeyError(key)
+        return self.get(key)
+
+    def __bool__(self) -> bool:
+        return self.synced
+
+    def to_dict(self, depth: Optional[int] = None) -> Dict[str, Any]:
+        n = depth or self.depth
+        return {"bids": self.bids.levels(n), "asks": self.asks.levels(n), "nonce": self.last_update_id}
+
+
+SnapshotFn = Callable[[str], Awaitable[Dict[str, Any]]]
+
+
+class OrderBookReplicas:
+    """
+    Repliki per symbol + buforowanie diffów i automatyczny resync
+    (snapshot przez `snapshot_fn(symbol)`, np. REST fetch_order_book(limit=1000)).
+    """
+
+    def __init__(self, snapshot_fn: SnapshotFn, depth: int = 100, max_buffer: int = 1000):
+        self.snapshot_fn = snapshot_fn
+        self.depth = depth
+        self.max_buffer = max_buffer
+        self.books: Dict[str, LocalOrderBook] = {}
+        self._buffer: Dict[str, List[Dict[str, Any]]] = {}
+        self._resync: Dict[str, asyncio.Task] = {}
+        self.stats = {"diffs": 0, "gaps": 0, "resyncs": 0}
+
+    def get(self, symbol: str) -> Optional[LocalOrderBook]:
+        ob = self.books.get(symbol)
+        return ob if ob is not None and ob.synced else None
+
+    def drop(self, symbol: str) -> None:
+        self.books.pop(symbol, None)
+        self._buffer.pop(symbol, None)
+        t = self._resync.pop(symbol, None)
+        if t:
+            t.cancel()
+
+    def on_diff(self, symbol: str, ev: Dict[str, Any]) -> None:
+        """Event `depthUpdate` (U, u, b, a) ze strumienia."""
+        self.stats["diffs"] += 1
+        ob = self.books.setdefault(symbol, LocalOrderBook(symbol, self.depth))
+        if ob.synced:
+            if ob.apply_diff(int(ev["U"]), int(ev["u"]), ev.get("b", []), ev.get("a", [])):
+                return
+            self.stats["gaps"] += 1
+        buf = self._buffer.setdefault(symbol, [])
+        buf.append(ev)
+        if len(buf) > self.max_buffer:
+            del buf[: len(buf) - self.max_buffer]
+        self._schedule_resync(symbol)
+
+    def _schedule_resync(self, symbol: str) -> None:
+        t = self._resync.get(symbol)
+        if t is not None and not t.done():
+            return
+        self._resync[symbol] = asyncio.get_running_loop().create_task(self._do_resync(symbol))
+
+    async def _do_resync(self, symbol: str) -> None:
+        self.stats["resyncs"] += 1
+        try:
+            snap = await self.snapshot_fn(symbol)
+        except Exception as e:
+            print(f"[orderbook] snapshot {symbol} error: {e}")
+            return
+        ob = self.books.setdefault(symbol, LocalOrderBook(symbol, self.depth))
+        ob.apply_snapshot(snap or {})
+        pending = self._buffer.pop(symbol, [])
+        for ev in pending:
+            if not ob.apply_diff(int(ev["U"]), int(ev["u"]), ev.get("b", []), ev.get("a", [])):
+                # snapshot starszy niż bufor albo dziura – spróbujemy przy następnym evencie
+                self.stats["gaps"] += 1
+                break
@@ -0,0 +1,47 @@
+# app/engine/ranking.py
+"""
+Ranking kandydatów ograniczonym kopcem: trzyma tylko `k` najlepszych
+elementów wg klucza (min-heap – korzeń to najsłabszy z zatrzymanych),
+push = O(log k), bez sortowania całej listy.
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+from typing import Callable, Generic, List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class TopK(Generic[T]):
+    def __init__(self, k: int, key: Callable[[T], float]):
+        self.k = max(1, int(k))
+        self.key = key
+        self._heap: List[Tuple[float, int, T]] = []
+        self._seq = itertools.count()  # remis klucza – wcześniejszy zostaje
+
+    def push(self, item: T) -> bool:
+        """Dodaj element; False, jeśli nie mieści się w top-k."""
+        entry = (self.key(item), -next(self._seq), item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+            return True
+        if entry[:2] <= self._heap[0][:2]:
+            return False
+        heapq.heapreplace(self._heap, entry)
+        return True
+
+    @property
+    def full(self) -> bool:
+        return len(self._heap) >= self.k
+
+    def threshold(self) -> float:
+        """Klucz k-tego (najsłabszego zatrzymanego) elementu; -inf, dopóki kopiec niepełny."""
+        return self._heap[0][0] if self.full else float("-inf")
+
+    def sorted(self) -> List[T]:
+        """Zatrzymane elementy od najlepszego."""
+        return [e[2] for e in sorted(self._heap, key=lambda e: e[:2], reverse=True)]
+
+    def __len__(self) -> int:
+        return len(self._heap)
@@ -0,0 +1,223 @@
+# app/engine/ratelimit.py
+"""
+Wspólny limiter zapytań per giełda (token bucket) z klasami priorytetu.
+
+Priorytet (mniejsza liczba = ważniejsze):
+    INTERACTIVE (slash command) > LIVE (loop_tick) > AUTOSCAN > BACKGROUND
+
+Priorytet płynie przez contextvar – komenda/pętla ustawia go raz:
+
+    with request_priority(PRIO_INTERACTIVE):
+        await analyzer.scan_and_rank(...)
+
+a wszystkie zapytania Collectora/Analyzera w tym kontekście dziedziczą klasę.
+Koszt zapytania = waga wg tabeli podobnej do wag Binance (klines, depth, tickers).
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from typing import Dict, List, Optional
+
+PRIO_INTERACTIVE = 0
+PRIO_LIVE = 1
+PRIO_AUTOSCAN = 2
+PRIO_BACKGROUND = 3
+
+PRIO_NAMES = {
+    PRIO_INTERACTIVE: "interactive",
+    PRIO_LIVE: "live",
+    PRIO_AUTOSCAN: "autoscan",
+    PRIO_BACKGROUND: "background",
+}
+
+_current_priority: contextvars.ContextVar[int] = contextvars.ContextVar("request_priority", default=PRIO_LIVE)
+
+
+@contextlib.contextmanager
+def request_priority(prio: int):
+    """Ustaw klasę priorytetu dla wszystkich zapytań w tym kontekście (także w taskach potomnych)."""
+    token = _current_priority.set(prio)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def set_task_priority(prio: int) -> None:
+    """Ustaw priorytet na resztę bieżącego taska (np. na początku pętli w tle)."""
+    _current_priority.set(prio)
+
+
+def current_priority() -> int:
+    return _current_priority.get()
+
+
+def request_cost(method: str, limit: Optional[int] = None) -> float:
+    """Przybliżone wagi zapytań (wg tabeli Binance)."""
+    n = int(limit or 0)
+    if method == "fetch_ohlcv":
+        return 1.0 if n <= 100 else 2.0 if n <= 500 else 5.0
+    if method == "fetch_order_book":
+        return 5.0 if n <= 100 else 10.0 if n <= 500 else 50.0
+    if method == "fetch_tickers":
+        return 80.0
+    if method == "load_markets":
+        return 20.0
+    if method in ("fetch_balance", "fetch_balance_safe", "fetch_balances"):
+        return 10.0
+    return 2.0  # fetch_ticker i reszta
+
+
+class TokenBucketLimiter:
+    """
+    Token bucket (rate tokenów/s, pojemność burst) z kolejką priorytetową.
+    Czekający obsługiwani ściśle wg (priorytet, kolejność) – duży skan nie
+    zagłodzi ticku ani komendy interaktywnej.
+
+    acquire()          – async (Collector/Analyzer),
+    acquire_blocking() – sync, z innego wątku/procesu-demona (CommandBus).
+    """
+
+    def __init__(self, name: str, rate: float, burst: float):
+        self.name = name
+        self.rate = max(float(rate), 1e-6)
+        self.burst = max(float(burst), 1.0)
+        self._tokens = self.burst
+        self._ts = time.monotonic()
+        self._lock = threading.Lock()
+        self._waiters: List[list] = []  # [prio, seq, cost, future]
+        self._seq = itertools.count()
+        self._pump: Optional[asyncio.Task] = None
+        self._wait_stats: Dict[int, Dict[str, float]] = {
+            p: {"requests": 0, "wait_sum": 0.0, "wait_max": 0.0} for p in PRIO_NAMES
+        }
+
+    # ----------------------- tokeny -----------------------
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._ts) * self.rate)
+        self._ts = now
+
+    def _take(self, cost: float) -> float:
+        """Pod lockiem: pobierz tokeny albo zwróć ile sekund czekać."""
+        self._refill()
+        cost = min(cost, self.burst)  # droższe niż burst – i tak musi przejść
+        if self._tokens >= cost:
+            self._tokens -= cost
+            return 0.0
+        return (cost - self._tokens) / self.rate
+
+    def _record(self, prio: int, waited: float) -> None:
+        s = self._wait_stats.setdefault(prio, {"requests": 0, "wait_sum": 0.0, "wait_max": 0.0})
+        s["requests"] += 1
+        s["wait_sum"] += waited
+        s["wait_max"] = max(s["wait_max"], waited)
+
+    # ----------------------- async -----------------------
+
+    async def acquire(self, cost: float = 1.0, priority: Optional[int] = None) -> float:
+        """Czekaj na tokeny. Zwraca czas oczekiwania (s)."""
+        prio = current_priority() if priority is None else int(priority)
+        t0 = time.monotonic()
+        if not self._waiters:
+            with self._lock:
+                delay = self._take(cost)
+            if delay == 0.0:
+                self._record(prio, 0.0)
+                return 0.0
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, [prio, next(self._seq), float(cost), fut])
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.get_running_loop().create_task(self._run_pump())
+        try:
+            await fut
+        except asyncio.CancelledError:
+            # anulowany czekający – zwolnij miejsce w kolejce
+            self._waiters = [w for w in self._waiters if w[3] is not fut]
+            heapq.heapify(self._waiters)
+            raise
+        waited = time.monotonic() - t0
+        self._record(prio, waited)
+        return waited
+
+    async def _run_pump(self) -> None:
+        while self._waiters:
+            prio, _seq, cost, fut = self._waiters[0]
+            if fut.done():
+                heapq.heappop(self._waiters)
+                continue
+            with self._lock:
+                delay = self._take(cost)
+            if delay == 0.0:
+                heapq.heappop(self._waiters)
+                fut.set_result(None)
+            else:
+                await asyncio.sleep(delay)
+
+    # ----------------------- sync -----------------------
+
+    def acquire_blocking(self, cost: float = 1.0, priority: Optional[int] = None) -> float:
+        prio = current_priority() if priority is None else int(priority)
+        t0 = time.monotonic()
+        while True:
+            with self._lock:
+                delay = self._take(cost)
+            if delay == 0.0:
+                break
+            time.sleep(delay)
+        waited = time.monotonic() - t0
+        self._record(prio, waited)
+        return waited
+
+    # ----------------------- metryki -----------------------
+
+    def metrics(self) -> Dict[str, object]:
+        depth: Dict[str, int] = {name: 0 for name in PRIO_NAMES.values()}
+        for prio, _seq, _cost, fut in self._waiters:
+            if not fut.done():
+                depth[PRIO_NAMES.get(prio, str(prio))] += 1
+        waits = {}
+        for prio, s in self._wait_stats.items():
+            n = max(1, int(s["requests"]))
+            waits[PRIO_NAMES.get(prio, str(prio))] = {
+                "requests": int(s["requests"]),
+                "wait_avg_ms": s["wait_sum"] / n * 1000.0,
+                "wait_max_ms": s["wait_max"] * 1000.0,
+            }
+        with self._lock:
+            self._refill()
+            tokens = self._tokens
+        return {"venue": self.name, "tokens": round(tokens, 2), "queue_depth": depth, "wait": waits}
+
+
+# ----------------------- rejestr per proces -----------------------
+
+# domyślne limity (waga/s, burst) – Binance: 6000 wagi/min, Bitget: ~20 req/s
+DEFAULT_LIMITS = {
+    "binance": (80.0, 400.0),
+    "bitget": (15.0, 60.0),
+}
+
+_LIMITERS: Dict[str, TokenBucketLimiter] = {}
+_REG_LOCK = threading.Lock()
+
+
+def get_limiter(venue: str) -> TokenBucketLimiter:
+    """Jeden limiter na giełdę w całym procesie (Collector, Analyzer, CommandBus)."""
+    with _REG_LOCK:
+        lim = _LIMITERS.get(venue)
+        if lim is None:
+            rate, burst = DEFAULT_LIMITS.get(venue, (10.0, 40.0))
+            lim = _LIMITERS[venue] = TokenBucketLimiter(venue, rate, burst)
+        return lim
+
+
+def all_metrics() -> List[Dict[str, object]]:
+    return [lim.metrics() for lim in list(_LIMITERS.values())]
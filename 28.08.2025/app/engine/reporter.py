@@ -19,6 +19,7 @@ from __future__ import annotations
 
 import math
 import sqlite3
+import time
 from io import BytesIO
 from typing import Optional
 
@@ -26,6 +27,8 @@ import discord
 from discord.ui import View, button, Button
 
 from ..config import SETTINGS
+from ..datasources.http import http_stats
+from ..features.ohlcv import OHLCV
 
 
 # ====================== Control Panel (persistent view) ======================
@@ -178,7 +181,10 @@ class Reporter:
         if not ohlcv:
             return b""
 
-        closes = [float(c[4]) for c in ohlcv[-100:] if c and len(c) >= 5]
+        if isinstance(ohlcv, OHLCV):
+            closes = ohlcv.close[-100:].tolist()
+        else:
+            closes = [float(c[4]) for c in ohlcv[-100:] if c and len(c) >= 5]
         if len(closes) < 5:
             return b""
 
@@ -260,7 +266,12 @@ class Reporter:
         # ----- wykres -----
         png_bytes = b""
         try:
-            ohlcv, _ticker, _ob = await self.bot.engine.collector.get_market(sig.symbol, "15m", 200)
+            # historia z pamięci/archiwum na dysku; sieć tylko gdy nic nie mamy
+            collector = self.bot.engine.collector
+            ohlcv = collector.get_history(sig.symbol, "15m", 200)
+            stale = not ohlcv or ohlcv[-1][0] < (time.time() - 2 * 900) * 1000
+            if len(ohlcv) < 50 or stale:
+                ohlcv, _ticker, _ob = await collector.get_market(sig.symbol, "15m", 200)
             png_bytes = self._render_signal_chart_png(
                 ohlcv, sig.symbol, sig.entry, sig.sl, sig.tp1, sig.tp2, sig.tp3
             )
@@ -304,6 +315,20 @@ class Reporter:
 
 # ======================== Selftest text builder ==============================
 
+def _venue_health_text(h: Optional[dict]) -> str:
+    """'✅ p50 120ms · p99 480ms · err 0.0% (n=200)' – ⚪ gdy brak próbek."""
+    if not h or not h.get("n"):
+        return "⚪ (brak danych)"
+    icon = {"closed": "✅", "half_open": "🟡", "open": "❌"}.get(str(h.get("state")), "⚪")
+    txt = (
+        f"{icon} p50 {h['p50_ms']:.0f}ms · p99 {h['p99_ms']:.0f}ms · "
+        f"err {h['err_rate'] * 100:.1f}% (n={h['n']})"
+    )
+    if h.get("state") != "closed":
+        txt += f" [breaker: {h['state']}]"
+    return txt
+
+
 async def build_full_selftest_text(bot) -> str:
     """
     Zwraca tekst używany przez /selftest i przycisk w panelu.
@@ -312,16 +337,17 @@ async def build_full_selftest_text(bot) -> str:
     st = SETTINGS
     lines: list[str] = ["Selftest (live):"]
 
-    # Giełdy (public + auth na podstawie kluczy)
+    # Giełdy: public = zdrowie z VenueRouter (p50/p99/błędy/breaker), auth = klucze
     try:
-        lines.append(f"• Binance public: ✅ | auth: {'✅' if st.binance_key and st.binance_secret else '❌'}")
+        health = bot.engine.collector.router.snapshot()
     except Exception:
-        lines.append("• Binance public: ❌")
-
-    try:
-        lines.append(f"• Bitget public: ✅ | auth: {'✅' if st.bitget_key and st.bitget_secret and st.bitget_password else '❌'}")
-    except Exception:
-        lines.append("• Bitget public: ❌")
+        health = {}
+    auth = {
+        "binance": bool(st.binance_key and st.binance_secret),
+        "bitget": bool(st.bitget_key and st.bitget_secret and st.bitget_password),
+    }
+    for venue, name in (("binance", "Binance"), ("bitget", "Bitget")):
+        lines.append(f"• {name} public: {_venue_health_text(health.get(venue))} | auth: {'✅' if auth[venue] else '❌'}")
 
     # Kanał Discord
     ch_ok = bool(getattr(st, "discord_channel_id", None))
@@ -342,4 +368,32 @@ async def build_full_selftest_text(bot) -> str:
     lines.append(f"• Groq: {gr} (score 0.25)")
     lines.append(f"• HuggingFace: {hf} (score 0.50)")
 
+    # Cache feature'ów (ten sam bar liczony raz)
+    try:
+        fc = bot.engine.feature_cache.snapshot()
+        lines.append(
+            f"• Feature cache: hit {fc['hit_rate']:.0%} ({fc['hits']}/{fc['hits'] + fc['misses']}) · "
+            f"{fc['entries']} wpisów · {fc['bytes'] / 1024:.0f} KB · ewikcje {fc['evictions']}"
+        )
+    except Exception:
+        pass
+
+    # Pipeline feature'ów – najdroższe węzły (średni czas)
+    try:
+        timings = bot.engine.pipeline.timings_snapshot()
+    except Exception:
+        timings = {}
+    top = sorted(timings.items(), key=lambda kv: -kv[1]["avg_ms"])[:5]
+    if top:
+        lines.append("• Pipeline: " + " · ".join(
+            f"{name} {t['avg_ms']:.3f}ms×{int(t['calls'])}" for name, t in top
+        ))
+
+    # Wspólna pula HTTP – liczniki per host
+    for host, h in sorted(http_stats().items(), key=lambda kv: -kv[1]["requests"])[:6]:
+        lines.append(
+            f"• HTTP {host}: {int(h['requests'])} req · śr. {h['lat_ms_avg']:.0f}ms · "
+            f"błędy {int(h['errors'])} · retry {int(h['retries'])}"
+        )
+
     return "\n".join(lines)
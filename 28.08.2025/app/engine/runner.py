@@ -2,22 +2,34 @@
 from __future__ import annotations
 
 import asyncio
+import os
 import time
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 
 from ..config import SETTINGS
 from ..db import connect, init_schema
-from ..exchanges.binance import BinanceX
-from ..exchanges.bitget import BitgetX
+from ..exchanges.binance import BinanceAX
+from ..exchanges.bitget import BitgetAX
 from ..engine.collector import Collector
-from ..features.fvg import fvg_scores, atr
-from ..features.rr import rr_coeff
-from ..features.obi import obi_coeff
-from ..engine.fusion import fuse_edge
+from ..engine.stream import MarketStream, is_binance_url
+from ..engine.orderbook import OrderBookReplicas
+from ..engine.tickers import TickersService
+from ..engine.markets import MarketsCache
+from ..engine.gems_watch import GemsWatch
+from ..engine.candle_archive import CandleArchive
+from ..engine.feature_cache import FEATURE_PARAMS, FeatureCache
+from ..engine.scan_executor import ScanExecutor
+from ..features.pipeline import FeaturePipeline
+from ..datasources.http import close_client
+from ..engine.ratelimit import set_task_priority, PRIO_LIVE, PRIO_AUTOSCAN, PRIO_BACKGROUND
+from ..features.ohlcv import OHLCV
 from ..engine.risk import RiskManager
 from ..engine.planner_ai import plan_openai
 from ..models import Signal
 
+# węzły pipeline trzymane w FeatureCache (reszta liczona per wywołanie)
+BASE_FEATURES = ("atr", "fvg", "obi", "rr_seed")
+
 
 class Engine:
     """
@@ -36,14 +48,77 @@ class Engine:
         self.conn = connect(self.st.db_path)
         init_schema(self.conn)
 
-        # Giełdy
-        self.binance = BinanceX(self.st.binance_key, self.st.binance_secret)
-        self.bitget = BitgetX(self.st.bitget_key, self.st.bitget_secret, self.st.bitget_password)
+        # Giełdy (async ccxt – jedna sesja HTTP na giełdę, zamykana w close())
+        self.binance = BinanceAX(self.st.binance_key, self.st.binance_secret)
+        self.bitget = BitgetAX(self.st.bitget_key, self.st.bitget_secret, self.st.bitget_password)
 
         # Collector / Risk
         self.collector = Collector(self.binance, self.bitget)
         self.risk = RiskManager(self.conn, self.st)
 
+        # Archiwum świec na dysku (mmap) – ciepły start CandleCache + historia dla wykresów
+        self.candle_archive: Optional[CandleArchive] = None
+        if bool(getattr(self.st, "candle_archive_enabled", True)):
+            root = getattr(self.st, "candle_archive_dir", "") or os.path.join(
+                os.path.dirname(self.st.db_path) or ".", "candles"
+            )
+            self.candle_archive = CandleArchive(root)
+            self.collector.candles.archive = self.candle_archive
+
+        # Metadane rynków z dysku (ciepły start), odświeżane w tle
+        self.markets = MarketsCache(
+            self.collector,
+            cache_dir=os.path.join(os.path.dirname(self.st.db_path) or ".", "markets"),
+            ttl_sec=float(getattr(self.st, "markets_ttl_sec", 6 * 3600)),
+        )
+        self.markets.load_disk()
+        self.collector.markets = self.markets
+
+        # Wspólny zrzut fetch_tickers() wszystkich giełd (odkrywanie uniwersum)
+        self.tickers = TickersService(self.collector, ttl_sec=float(getattr(self.st, "tickers_ttl_sec", 60.0)))
+
+        # Pipeline feature'ów (DAG + pluginy z FEATURE_PLUGINS, czasy węzłów)
+        self.pipeline = FeaturePipeline(self.st)
+
+        # Wyniki feature'ów per (venue, symbol, tf, zamknięta świeca) – LRU
+        self.feature_cache = FeatureCache(
+            max_entries=int(getattr(self.st, "feature_cache_entries", 4096)),
+            max_bytes=int(getattr(self.st, "feature_cache_max_kb", 2048)) * 1024,
+            max_age_sec=float(getattr(self.st, "feature_cache_max_age_sec", 60.0)),
+        )
+
+        # Skan wielu par: limit równoległości per giełda + deadline per symbol (wspólny dla /scan i autoskanu)
+        self.scan_executor = ScanExecutor(
+            self.collector,
+            per_venue=int(getattr(self.st, "scan_concurrency_per_venue", 4)),
+            deadline_sec=float(getattr(self.st, "scan_symbol_deadline_sec", 8.0)),
+        )
+
+        # Snapshot par DEX z watchlisty gems (batch Dexscreener, chainy równolegle)
+        self.gems_watch = GemsWatch(self.conn, ttl_sec=float(getattr(self.st, "gems_refresh_sec", 60.0)))
+
+        # Strumień WS – aktualizuje świece/ticker/OB w pamięci Collectora
+        self.stream: Optional[MarketStream] = None
+        self.orderbooks: Optional[OrderBookReplicas] = None
+        if bool(getattr(self.st, "stream_enabled", False)):
+            # replika L2: snapshot REST Binance (1000 poziomów) + diffy ze strumienia;
+            # replay / inny URL nie ma spójnego źródła snapshotu -> partial depth20
+            if bool(getattr(self.st, "stream_l2_replica", True)) and is_binance_url(self.st.stream_url):
+                self.orderbooks = OrderBookReplicas(
+                    lambda sym: self.collector._cex_fetch_order_book(self.binance, sym, 1000)
+                )
+            self.stream = MarketStream(
+                self.collector.candles,
+                url=self.st.stream_url,
+                max_age_sec=float(self.st.stream_max_age_sec),
+                record_path=self.st.stream_record_path or None,
+                orderbooks=self.orderbooks,
+            )
+            self.collector.stream = self.stream
+        # ostatnie uniwersum altów z autoskanu (subskrypcje strumienia)
+        self.autoscan_universe: list[str] = []
+        self.autoscan_last: Dict[str, Any] = {}  # ostatni cykl autoskanu (krok relax, progi, ile sygnałów)
+
         # Reporter (wstrzykiwany z bot.py)
         self.bot = bot
         self.reporter = None
@@ -66,6 +141,27 @@ class Engine:
         self._tasks.append(asyncio.create_task(self.loop_tick()))
         self._tasks.append(asyncio.create_task(self.loop_pending()))
         self._tasks.append(asyncio.create_task(self.loop_autoscan()))  # autoskan altów
+        self._tasks.append(asyncio.create_task(self.tickers.loop_refresh()))
+        self._tasks.append(asyncio.create_task(self.markets.loop_refresh()))
+        self._tasks.append(asyncio.create_task(self.gems_watch.loop_refresh()))
+        if self.candle_archive is not None:
+            self._tasks.append(asyncio.create_task(self.loop_archive_backfill()))
+        if self.stream is not None:
+            self._tasks.append(asyncio.create_task(self._run_stream()))
+            self._tasks.append(asyncio.create_task(self.loop_stream_symbols()))
+
+    async def close(self):
+        """Zatrzymaj pętle w tle i zamknij sesje giełd."""
+        if self.stream is not None:
+            await self.stream.close()
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        await self.collector.close()
+        await close_client()
+        if self.candle_archive is not None:
+            self.candle_archive.close()
 
     async def loop_selftest(self):
         """Self-test źródeł i zapis neutralizacji/health co X minut."""
@@ -105,6 +201,33 @@ class Engine:
 
             await asyncio.sleep(interval)
 
+    async def loop_archive_backfill(self):
+        """Co 15 min uzupełnia dziury w archiwum świec (np. po przerwie w pracy bota)."""
+        set_task_priority(PRIO_BACKGROUND)
+        while True:
+            await asyncio.sleep(15 * 60)
+            try:
+                n = await self.collector.backfill_archive()
+                if n:
+                    print(f"[candles] backfill: +{n} świec")
+            except Exception as e:
+                print(f"[candles] backfill error: {e}")
+
+    async def _run_stream(self):
+        # resync replik OB (snapshot REST) dziedziczy priorytet live
+        set_task_priority(PRIO_LIVE)
+        await self.stream.run()
+
+    async def loop_stream_symbols(self):
+        """Subskrypcje WS podążają za SETTINGS.symbols + uniwersum autoskanu."""
+        while True:
+            try:
+                want = set(getattr(self.st, "symbols", []) or []) | set(self.autoscan_universe)
+                await self.stream.set_symbols(want)
+            except Exception as e:
+                print(f"[stream] set_symbols error: {e}")
+            await asyncio.sleep(30)
+
     async def loop_pending(self):
         """Auto-approve / auto-reject sygnałów w statusie 'pending'."""
         auto_approve_conf = float(getattr(self.st, "auto_approve_conf", 0.80))
@@ -142,6 +265,7 @@ class Engine:
         """
         from ..engine.analyzer import Analyzer
 
+        set_task_priority(PRIO_AUTOSCAN)  # skan ustępuje tickom i komendom w limiterze
         while True:
             try:
                 if not bool(getattr(self.st, "autoscan_enabled", True)):
@@ -164,36 +288,29 @@ class Engine:
 
                 analyzer = Analyzer(engine=self)
 
-                # 1) Próba na twardych progach
-                results = await analyzer.scan_alt_gems(
-                    limit=limit,
-                    min_quote_vol=min_vol,
-                    max_quote_vol=max_vol,
-                    rr_min=rr_min,
-                    edge_th=edge_th,
-                    exclude=exclude
-                )
-
-                # 2) Auto-relax jeśli pusto
-                steps_done = 0
+                # 1) Progi kolejnych kroków: twarde, potem auto-relax
+                #    (−5% min_vol, +5% max_vol, −0.01 EDGE do 0.50, −0.02 RR do 0.80)
+                steps = [(min_vol, max_vol, rr_min, edge_th)]
                 cur_min_vol, cur_max_vol = min_vol, max_vol
                 cur_rr, cur_edge = rr_min, edge_th
-
-                while not results and steps_done < relax_steps:
-                    steps_done += 1
+                for _ in range(max(0, relax_steps)):
                     cur_min_vol *= relax_factor
                     cur_max_vol *= (1.0 / relax_factor)  # lekko rozszerz sufit
                     cur_rr   = max(0.80, cur_rr - relax_rr)
                     cur_edge = max(0.50, cur_edge - relax_edge)
-
-                    results = await analyzer.scan_alt_gems(
-                        limit=limit,
-                        min_quote_vol=cur_min_vol,
-                        max_quote_vol=cur_max_vol,
-                        rr_min=cur_rr,
-                        edge_th=cur_edge,
-                        exclude=exclude
-                    )
+                    steps.append((cur_min_vol, cur_max_vol, cur_rr, cur_edge))
+
+                # 2) Jedna pula (rynki + feature'y raz), progi kroków nakładane lokalnie
+                results, step = await analyzer.scan_alt_gems_relaxed(steps, limit=limit, exclude=exclude)
+                steps_done = max(0, step)
+                self.autoscan_last = {
+                    "ts": time.time(), "step": step, "signals": len(results),
+                    "min_vol": steps[steps_done][0], "max_vol": steps[steps_done][1],
+                    "rr_min": steps[steps_done][2], "edge_th": steps[steps_done][3],
+                    "prefilter_rho": analyzer.prefilter_rho,
+                }
+                if step > 0:
+                    print(f"[autoscan] wynik po {step}x relax: RR≥{steps[step][2]:.2f} EDGE≥{steps[step][3]:.2f}")
 
                 # 3) Jeśli są – zrób sygnały
                 if results and self.reporter:
@@ -231,6 +348,7 @@ class Engine:
         tick_seconds = int(getattr(self.st, "tick_seconds", 60))
         syms = list(self.st.symbols) if getattr(self.st, "symbols", None) else ["BTC/USDT", "ETH/USDT"]
 
+        set_task_priority(PRIO_LIVE)
         while True:
             symbol = syms[idx % len(syms)]
             idx += 1
@@ -243,6 +361,52 @@ class Engine:
     # ------------------------------------------------------------------ #
     #                         Główna analiza                              #
     # ------------------------------------------------------------------ #
+    def macro(self) -> Dict[str, float]:
+        """Bieżące wyniki makro (z selftest/neutral)."""
+        return {
+            "news": float(getattr(self, "news_score", 0.5)),
+            "whale": float(getattr(self, "whale_score", 0.5)),
+            "onchain": float(getattr(self, "onchain_score", 0.5)),
+        }
+
+    def features(
+        self, symbol: str, tf: str, ohlcv, obook, last: float, venue: Optional[str] = None,
+    ) -> Tuple[float, float, float, float, float]:
+        """
+        (atr, f_long, f_short, obi, rr_c) przez FeatureCache – w obrębie tej samej
+        świecy (i max_age) bez przeliczania; liczone przez pipeline (TR -> ATR -> FVG/RR,
+        ATR/FVG z inkrementalnego stanu CandleCache, jeśli opisuje tę serię).
+        obook=None -> OBI neutralne (DEX).
+        """
+        venue = venue or self.collector.last_venue.get(symbol, "?")
+        key = self.feature_cache.key(venue, symbol, tf, ohlcv, FEATURE_PARAMS)
+
+        def _compute():
+            ctx = self.pipeline.run(
+                {"ohlcv": ohlcv, "book": obook, "last": last,
+                 "indicators": self.collector.indicators(symbol, tf, ohlcv)},
+                BASE_FEATURES,
+            )
+            f_long, f_short = ctx["fvg"]
+            return ctx["atr"], f_long, f_short, ctx["obi"], ctx["rr_seed"]
+
+        return self.feature_cache.get_or_compute(key, _compute)
+
+    async def evaluate(
+        self, symbol: str, tf: str, ohlcv, obook, last: float,
+        venue: Optional[str] = None, targets: Tuple[str, ...] = ("edge",),
+    ) -> Dict[str, Any]:
+        """
+        Pełny przebieg pipeline: bazowe feature'y z FeatureCache (features()),
+        reszta (book_feats, pluginy, edge) w DAG. Zwraca ctx z wynikami węzłów.
+        """
+        atr_val, f_long, f_short, obi, rr_c = self.features(symbol, tf, ohlcv, obook, last, venue=venue)
+        return await self.pipeline.arun(
+            {"ohlcv": ohlcv, "book": obook, "last": last, "macro": self.macro(),
+             "atr": atr_val, "fvg": (f_long, f_short), "obi": obi, "rr_seed": rr_c},
+            targets,
+        )
+
     async def _get_last_price(self, ohlcv, ticker) -> Optional[float]:
         """Bezpieczne pobranie ostatniej ceny."""
         try:
@@ -287,22 +451,12 @@ class Engine:
         if last is None:
             return  # brak ceny
 
-        # Feature’y
-        f_long, f_short = fvg_scores(ohlcv)
-        atr_val = atr(ohlcv, 14)
-        obi = obi_coeff(obook)
-        _rr_val, rr_c = rr_coeff(last, last - atr_val * 0.5, last + atr_val * 0.8)
-
-        # Makro (z selftest/neutral)
-        news = float(getattr(self, "news_score", 0.5))
-        whale = float(getattr(self, "whale_score", 0.5))
-        onc = float(getattr(self, "onchain_score", 0.5))
-
-        # Fusion EDGE
-        long_edge, short_edge = fuse_edge(
-            f_long, f_short, rr_c, obi, news, whale, onc,
-            self.st.w_fvg, self.st.w_rr, self.st.w_obi, self.st.w_news, self.st.w_whale, self.st.w_onc
-        )
+        # Feature’y + fusion EDGE (pipeline; bazowe z FeatureCache – ten sam bar liczony raz)
+        fx = await self.evaluate(symbol, '15m', ohlcv, obook, last)
+        atr_val, (f_long, f_short), obi, rr_c = fx["atr"], fx["fvg"], fx["obi"], fx["rr_seed"]
+        news, whale, onc = fx["macro"]["news"], fx["macro"]["whale"], fx["macro"]["onchain"]
+        bf = fx["book_feats"]
+        long_edge, short_edge = fx["edge"]
 
         # Kierunek
         side = 'LONG' if long_edge >= short_edge else 'SHORT'
@@ -324,7 +478,7 @@ class Engine:
             symbol=symbol, side=side, entry=p["entry"], sl=p["sl"],
             tp1=p["tp1"], tp2=p["tp2"], tp3=p["tp3"],
             rr=p["rr"], edge=edge, confidence=p["conf"], success=p["succ"],
-            reason=f"{why}; FVG:{f_long:.2f}/{f_short:.2f} OBI:{obi:.2f} ATR:{atr_val:.5f}",
+            reason=f"{why}; FVG:{f_long:.2f}/{f_short:.2f} OBI:{obi:.2f} WOBI:{bf['wobi']:.2f} SPR:{bf['spread_bps']:.1f}bps ATR:{atr_val:.5f}",
             status='pending', auto_ttl=int(time.time())
         )
         await self.router(sig)
@@ -399,22 +553,12 @@ class Engine:
                 await self.reporter.send_signal(sig_info, mode=self.st.mode, channel_id=channel_id)
             return
 
-        # 2) Feature’y
-        f_long, f_short = fvg_scores(ohlcv)
-        atr_val = atr(ohlcv, 14)
-        obi = obi_coeff(obook)
-        _rr_val, rr_c = rr_coeff(last, last - atr_val * 0.5, last + atr_val * 0.8)
-
-        # 3) Makro
-        news  = float(getattr(self, "news_score",  0.5))
-        whale = float(getattr(self, "whale_score", 0.5))
-        onc   = float(getattr(self, "onchain_score", 0.5))
-
-        # 4) Fusion
-        long_edge, short_edge = fuse_edge(
-            f_long, f_short, rr_c, obi, news, whale, onc,
-            self.st.w_fvg, self.st.w_rr, self.st.w_obi, self.st.w_news, self.st.w_whale, self.st.w_onc
-        )
+        # 2-4) Feature’y, makro, fusion – pipeline (bazowe z FeatureCache)
+        fx = await self.evaluate(symbol, "15m", ohlcv, obook, last)
+        atr_val, (f_long, f_short), obi, rr_c = fx["atr"], fx["fvg"], fx["obi"], fx["rr_seed"]
+        news, whale, onc = fx["macro"]["news"], fx["macro"]["whale"], fx["macro"]["onchain"]
+        bf = fx["book_feats"]
+        long_edge, short_edge = fx["edge"]
 
         # 5) Kierunek
         auto_side = "LONG" if long_edge >= short_edge else "SHORT"
@@ -437,7 +581,7 @@ class Engine:
                     symbol=symbol, side=side_up, entry=p["entry"], sl=p["sl"],
                     tp1=p["tp1"], tp2=p["tp2"], tp3=p["tp3"],
                     rr=p["rr"], edge=edge, confidence=p["conf"], success=p["succ"],
-                    reason=f"[BLOCKED: {why}] FVG:{f_long:.2f}/{f_short:.2f} OBI:{obi:.2f} ATR:{atr_val:.5f}",
+                    reason=f"[BLOCKED: {why}] FVG:{f_long:.2f}/{f_short:.2f} OBI:{obi:.2f} WOBI:{bf['wobi']:.2f} SPR:{bf['spread_bps']:.1f}bps ATR:{atr_val:.5f}",
                     status="pending", auto_ttl=int(time.time())
                 )
                 if self.reporter:
@@ -449,7 +593,7 @@ class Engine:
             symbol=symbol, side=side_up, entry=p["entry"], sl=p["sl"],
             tp1=p["tp1"], tp2=p["tp2"], tp3=p["tp3"],
             rr=p["rr"], edge=edge, confidence=p["conf"], success=p["succ"],
-            reason=f"{why}; FVG:{f_long:.2f}/{f_short:.2f} OBI:{obi:.2f} ATR:{atr_val:.5f}",
+            reason=f"{why}; FVG:{f_long:.2f}/{f_short:.2f} OBI:{obi:.2f} WOBI:{bf['wobi']:.2f} SPR:{bf['spread_bps']:.1f}bps ATR:{atr_val:.5f}",
             status="pending", auto_ttl=int(time.time())
         )
 
@@ -476,43 +620,31 @@ class Engine:
         Pobiera świece 15m, liczy FVG/ATR, fusion EDGE (OBI=0.5), plan i wysyła embed.
         """
         try:
-            import aiohttp
-            from ..datasources.dexscreener import fetch_candles, DEX_HEADERS
-
-            async with aiohttp.ClientSession(headers=DEX_HEADERS) as s:
-                # 12h świec 15m
-                candles = await fetch_candles(s, pair_addr, minutes=12*60, resolution="15")
-                if not candles or len(candles) < 30:
-                    return None
-
-            # ułóż ohlcv: [ts, o,h,l,c, v]
-            ohlcv = []
-            for c in candles[-200:]:
-                ts = int(c.get("t", 0))
-                o  = float(c.get("o", 0))
-                h  = float(c.get("h", 0))
-                l  = float(c.get("l", 0))
-                cl = float(c.get("c", 0))
-                v  = float(c.get("v", 0.0))
-                ohlcv.append([ts, o, h, l, cl, v])
-
-            last = float(ohlcv[-1][4])
-
-            # Feature’y
-            f_long, f_short = fvg_scores(ohlcv)
-            atr_val = atr(ohlcv, 14)
-            obi = 0.5  # neutral – brak order booku na DEX
-
-            # Makro
-            news  = float(getattr(self, "news_score",  0.5))
-            whale = float(getattr(self, "whale_score", 0.5))
-            onc   = float(getattr(self, "onchain_score", 0.5))
-
-            _rr_val, rr_c = rr_coeff(last, last - atr_val * 0.5, last + atr_val * 0.8)
-            long_edge, short_edge = fuse_edge(
-                f_long, f_short, rr_c, obi, news, whale, onc,
-                self.st.w_fvg, self.st.w_rr, self.st.w_obi, self.st.w_news, self.st.w_whale, self.st.w_onc
+            from ..datasources.dexscreener import fetch_candles
+
+            # 12h świec 15m
+            candles = await fetch_candles(pair_addr, minutes=12*60, resolution="15")
+            if not candles or len(candles) < 30:
+                return None
+
+            # ułóż ohlcv: kolumny ts/o/h/l/c/v
+            ohlcv = OHLCV.from_dex(candles[-200:])
+            last = float(ohlcv.close[-1])
+
+            # stan pary ze snapshotu watchlisty (bez dodatkowego zapytania)
+            quote = self.gems_watch.get(pair_addr)
+            if quote is not None:
+                chain = chain or quote.chain
+            dex_info = (
+                f" LIQ:${quote.liquidity_usd:,.0f} VOL24:${quote.volume_h24:,.0f} TX24:{quote.buys_h24}/{quote.sells_h24}"
+                if quote is not None else ""
             )
+
+            # Feature’y + fusion – pipeline (obi/book neutral – brak order booku na DEX)
+            fx = await self.evaluate(f"DEX:{pair_addr}", "15m", ohlcv, None, last, venue="dex")
+            atr_val, (f_long, f_short), obi, rr_c = fx["atr"], fx["fvg"], fx["obi"], fx["rr_seed"]
+            news, whale, onc = fx["macro"]["news"], fx["macro"]["whale"], fx["macro"]["onchain"]
+            long_edge, short_edge = fx["edge"]
             side = "LONG" if long_edge >= short_edge else "SHORT"
             edge = max(long_edge, short_edge)
 
@@ -527,7 +659,7 @@ class Engine:
                 symbol=f"DEX:{pair_addr}", side=side, entry=p["entry"], sl=p["sl"],
                 tp1=p["tp1"], tp2=p["tp2"], tp3=p["tp3"],
                 rr=p["rr"], edge=edge, confidence=p["conf"], success=p["succ"],
-                reason=f"DEX analyze; FVG:{f_long:.2f}/{f_short:.2f} ATR:{atr_val:.5f}",
+                reason=f"DEX analyze; FVG:{f_long:.2f}/{f_short:.2f} ATR:{atr_val:.5f}{dex_info}",
                 status="pending", auto_ttl=int(time.time())
             )
 
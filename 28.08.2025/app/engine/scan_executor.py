@@ -0,0 +1,90 @@
+# app/engine/scan_executor.py
+"""
+Wykonawca skanu: pobiera rynki (OHLCV/ticker/book) dla listy symboli
+z limitem równoległości per giełda i deadlinem per symbol, a wyniki
+oddaje strumieniem (async iterator) w kolejności ukończenia.
+
+    ex = ScanExecutor(collector, per_venue=4, deadline_sec=8.0)
+    async for batch in ex.batches(symbols, "15m"):
+        ...                      # [(symbol, (ohlcv, ticker, book)), ...]
+
+Giełda symbolu = pierwsza z VenueRouter.rank() (tam trafi zapytanie
+bundla), więc wolna/zablokowana giełda nie zjada slotów pozostałym.
+Symbol po deadlinie albo z błędem przychodzi jako (symbol, None) – jeden
+wiszący symbol nie blokuje całego /scan. Przerwanie iteracji (break) anuluje
+zapytania jeszcze nierozpoczęte i te w locie.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+Market = Tuple[object, dict, dict]  # (ohlcv, ticker, orderbook)
+
+
+class ScanExecutor:
+    def __init__(self, collector, per_venue: int = 4, deadline_sec: float = 8.0):
+        self.collector = collector
+        self.per_venue = max(1, int(per_venue))
+        self.deadline_sec = float(deadline_sec)
+        self._sems: Dict[str, asyncio.Semaphore] = {}
+        self.stats = {"ok": 0, "timeouts": 0, "errors": 0, "cancelled": 0}
+
+    def _venue(self, symbol: str) -> str:
+        router = getattr(self.collector, "router", None)
+        if router is not None:
+            # bez allow(): w HALF_OPEN zająłby jedyną próbę breakera; rank() i tak stawia zablokowane na końcu
+            ranked = router.rank(symbol)
+            if ranked:
+                return ranked[0]
+        return self.collector.last_venue.get(symbol, "?")
+
+    def _sem(self, venue: str) -> asyncio.Semaphore:
+        sem = self._sems.get(venue)
+        if sem is None:
+            sem = self._sems[venue] = asyncio.Semaphore(self.per_venue)
+        return sem
+
+    async def _fetch(self, symbol: str, tf: str, limit: int) -> Tuple[str, Optional[Market]]:
+        async with self._sem(self._venue(symbol)):
+            try:
+                # deadline liczony od zdobycia slotu – czekanie w kolejce to nie wina symbolu
+                m = await asyncio.wait_for(
+                    self.collector.get_market(symbol, tf, limit),
+                    self.deadline_sec if self.deadline_sec > 0 else None,
+                )
+            except asyncio.TimeoutError:
+                self.stats["timeouts"] += 1
+                print(f"[scan] {symbol}: deadline {self.deadline_sec:.1f}s")
+                return symbol, None
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.stats["errors"] += 1
+                return symbol, None
+        self.stats["ok"] += 1
+        return symbol, m
+
+    async def stream(self, symbols: Iterable[str], tf: str = "15m", limit: int = 200) -> AsyncIterator[Tuple[str, Optional[Market]]]:
+        """(symbol, market|None) w kolejności ukończenia."""
+        async for batch in self.batches(symbols, tf, limit):
+            for item in batch:
+                yield item
+
+    async def batches(self, symbols: Iterable[str], tf: str = "15m", limit: int = 200) -> AsyncIterator[List[Tuple[str, Optional[Market]]]]:
+        """
+        Jak stream(), ale paczkami: czeka na pierwszy gotowy wynik i dobiera
+        wszystkie, które ukończyły się w międzyczasie – wczesne wyniki idą od
+        razu, a przy zrywie ukończeń batch/NumPy dostaje większą paczkę.
+        """
+        tasks = {asyncio.ensure_future(self._fetch(sym, tf, limit)) for sym in dict.fromkeys(symbols)}
+        try:
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                yield [t.result() for t in done]
+        finally:
+            for t in tasks:
+                t.cancel()
+            if tasks:
+                self.stats["cancelled"] += len(tasks)
+                await asyncio.gather(*tasks, return_exceptions=True)
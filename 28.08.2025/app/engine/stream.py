@@ -0,0 +1,253 @@
+# app/engine/stream.py
+"""
+Strumień danych rynkowych (WebSocket) – kline / ticker / depth.
+
+MarketStream trzyma lokalny stan (świece w CandleCache Collectora, ticker,
+orderbook) aktualizowany przy każdej wiadomości. Collector.get_market czyta
+ten stan zamiast REST, o ile jest świeży – tick_symbol, quick_signal
+i Analyzer.analyze_symbol dostają dane praktycznie bez opóźnienia.
+
+Format: Binance combined streams (`/stream`, ramki {"stream": ..., "data": ...}),
+subskrypcje dynamiczne przez SUBSCRIBE / UNSUBSCRIBE.
+Offline: app/engine/stream_replay.py odtwarza nagrane ramki (record_path).
+
+Z podpiętym OrderBookReplicas depth idzie strumieniem diff (`@depth@100ms`)
+do lokalnej repliki L2 (app/engine/orderbook.py) zamiast partial depth.
+Engine podpina repliki tylko dla strumienia Binance (snapshot REST z tej samej
+giełdy) – replay i inne URL-e zostają przy partial `depth20`.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+
+from .candle_cache import CandleCache
+from .orderbook import OrderBookReplicas
+
+BINANCE_WS_URL = "wss://stream.binance.com:9443/stream"
+
+
+def is_binance_url(url: str) -> bool:
+    """Czy URL to prawdziwy strumień Binance (a nie np. lokalny replay)."""
+    host = (urlparse(url or "").hostname or "").lower()
+    return host == "binance.com" or host.endswith(".binance.com")
+
+
+def to_stream_symbol(symbol: str) -> str:
+    """'BTC/USDT' -> 'btcusdt'."""
+    return symbol.replace("/", "").replace(":", "").lower()
+
+
+class MarketStream:
+    """
+    Klient WS z automatycznym reconnectem i synchronizacją subskrypcji.
+
+    - set_symbols(symbols)  – docelowy zbiór par (diff -> SUBSCRIBE/UNSUBSCRIBE),
+    - run()                 – pętla połączenia (uruchamiana jako task w Engine),
+    - snapshot(sym, tf, n)  – (ohlcv, ticker, orderbook) ze stanu lokalnego lub None.
+    """
+
+    def __init__(
+        self,
+        candles: CandleCache,
+        url: str = BINANCE_WS_URL,
+        venue: str = "binance",
+        tf: str = "15m",
+        depth_levels: int = 20,
+        max_age_sec: float = 5.0,
+        record_path: Optional[str] = None,
+        orderbooks: Optional[OrderBookReplicas] = None,
+    ):
+        self.candles = candles
+        self.url = url
+        self.venue = venue
+        self.tf = tf
+        self.depth_levels = depth_levels
+        self.max_age_sec = max_age_sec
+        self.record_path = record_path
+        self.orderbooks = orderbooks
+
+        self.tickers: Dict[str, Dict[str, Any]] = {}
+        self.books: Dict[str, Dict[str, Any]] = {}
+        # symbol -> {"kline"/"ticker"/"depth": monotonic ts ostatniej wiadomości}
+        self.updated: Dict[str, Dict[str, float]] = {}
+        self.stats = {"messages": 0, "reconnects": 0, "errors": 0}
+
+        self._symbols: Set[str] = set()
+        self._by_stream_sym: Dict[str, str] = {}
+        self._ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self._req_id = 0
+        self._closed = False
+        self._rec_fh = None
+        self._rec_last = 0.0
+
+    # ----------------------- subskrypcje -----------------------
+
+    def streams_for(self, symbol: str) -> List[str]:
+        s = to_stream_symbol(symbol)
+        depth = f"{s}@depth@100ms" if self.orderbooks is not None else f"{s}@depth{self.depth_levels}@100ms"
+        return [f"{s}@kline_{self.tf}", f"{s}@ticker", depth]
+
+    async def _send(self, method: str, streams: List[str]) -> None:
+        if not streams or self._ws is None or self._ws.closed:
+            return
+        self._req_id += 1
+        await self._ws.send_json({"method": method, "params": streams, "id": self._req_id})
+
+    async def set_symbols(self, symbols: Iterable[str]) -> None:
+        """Ustaw docelowy zbiór par (pomija DEX:*). Wysyła tylko różnicę."""
+        want = {s for s in symbols if s and "/" in s and not s.upper().startswith("DEX:")}
+        add, drop = want - self._symbols, self._symbols - want
+        self._symbols = want
+        self._by_stream_sym = {to_stream_symbol(s): s for s in want}
+        for s in drop:
+            self.tickers.pop(s, None)
+            self.books.pop(s, None)
+            self.updated.pop(s, None)
+            if self.orderbooks is not None:
+                self.orderbooks.drop(s)
+        await self._send("UNSUBSCRIBE", [st for s in sorted(drop) for st in self.streams_for(s)])
+        await self._send("SUBSCRIBE", [st for s in sorted(add) for st in self.streams_for(s)])
+
+    # ----------------------- pętla połączenia -----------------------
+
+    async def run(self) -> None:
+        """Połącz, zasubskrybuj aktualny zbiór, czytaj ramki; reconnect z backoffem."""
+        backoff = 1.0
+        if self.record_path:
+            self._rec_fh = open(self.record_path, "a", encoding="utf-8")
+        async with aiohttp.ClientSession() as sess:
+            while not self._closed:
+                try:
+                    async with sess.ws_connect(self.url, heartbeat=20) as ws:
+                        self._ws = ws
+                        backoff = 1.0
+                        await self._send("SUBSCRIBE", [st for s in sorted(self._symbols) for st in self.streams_for(s)])
+                        async for msg in ws:
+                            if msg.type == aiohttp.WSMsgType.TEXT:
+                                self._record(msg.data)
+                                try:
+                                    self.handle(json.loads(msg.data))
+                                except Exception:
+                                    self.stats["errors"] += 1
+                            elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                                break
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"[stream] {self.venue} error: {e}")
+                finally:
+                    self._ws = None
+                if self._closed:
+                    break
+                self.stats["reconnects"] += 1
+                await asyncio.sleep(backoff + random.random())
+                backoff = min(backoff * 2, 60.0)
+
+    async def close(self) -> None:
+        self._closed = True
+        if self._ws is not None and not self._ws.closed:
+            await self._ws.close()
+        if self._rec_fh:
+            self._rec_fh.close()
+            self._rec_fh = None
+
+    def _record(self, raw: str) -> None:
+        if not self._rec_fh:
+            return
+        now = time.monotonic()
+        dt = (now - self._rec_last) if self._rec_last else 0.0
+        self._rec_last = now
+        self._rec_fh.write(json.dumps({"dt": round(dt, 4), "frame": json.loads(raw)}) + "\n")
+
+    # ----------------------- obsługa ramek -----------------------
+
+    def handle(self, msg: Dict[str, Any]) -> None:
+        """Rozdziel ramkę combined-stream do odpowiedniego handlera."""
+        stream = msg.get("stream")
+        data = msg.get("data")
+        if not stream or not isinstance(data, dict):
+            return  # np. {"result": null, "id": 1} – potwierdzenie subskrypcji
+        s_sym, _, kind = stream.partition("@")
+        symbol = self._by_stream_sym.get(s_sym)
+        if symbol is None:
+            return
+        self.stats["messages"] += 1
+        if kind.startswith("kline_"):
+            self._on_kline(symbol, data)
+        elif kind == "ticker":
+            self._on_ticker(symbol, data)
+        elif kind.startswith("depth"):
+            self._on_depth(symbol, data)
+
+    def _touch(self, symbol: str, what: str) -> None:
+        self.updated.setdefault(symbol, {})[what] = time.monotonic()
+
+    def _on_kline(self, symbol: str, data: Dict[str, Any]) -> None:
+        k = data.get("k") or {}
+        bar = [int(k["t"]), float(k["o"]), float(k["h"]), float(k["l"]), float(k["c"]), float(k["v"])]
+        key = (self.venue, symbol, k.get("i") or self.tf)
+        # bez historii (cold start) nie zakładamy bufora – pierwszy REST go wypełni
+        if self.candles.size(key):
+            self.candles.merge(key, [bar])
+        self._touch(symbol, "kline")
+
+    def _on_ticker(self, symbol: str, d: Dict[str, Any]) -> None:
+        last = float(d["c"])
+        self.tickers[symbol] = {
+            "symbol": symbol,
+            "timestamp": int(d.get("E") or time.time() * 1000),
+            "last": last,
+            "close": last,
+            "open": float(d.get("o") or 0.0),
+            "high": float(d.get("h") or 0.0),
+            "low": float(d.get("l") or 0.0),
+            "bid": float(d.get("b") or 0.0),
+            "ask": float(d.get("a") or 0.0),
+            "baseVolume": float(d.get("v") or 0.0),
+            "quoteVolume": float(d.get("q") or 0.0),
+            "percentage": float(d.get("P") or 0.0),
+        }
+        self._touch(symbol, "ticker")
+
+    def _on_depth(self, symbol: str, d: Dict[str, Any]) -> None:
+        if d.get("e") == "depthUpdate":
+            if self.orderbooks is not None:
+                self.orderbooks.on_diff(symbol, d)
+                self._touch(symbol, "depth")
+            return
+        self.books[symbol] = {
+            "bids": [[float(p), float(q)] for p, q in d.get("bids", [])],
+            "asks": [[float(p), float(q)] for p, q in d.get("asks", [])],
+            "nonce": d.get("lastUpdateId"),
+        }
+        self._touch(symbol, "depth")
+
+    # ----------------------- odczyt stanu -----------------------
+
+    def is_fresh(self, symbol: str, max_age: Optional[float] = None) -> bool:
+        upd = self.updated.get(symbol) or {}
+        age = self.max_age_sec if max_age is None else max_age
+        now = time.monotonic()
+        return all(now - upd.get(w, 0.0) <= age for w in ("kline", "ticker", "depth"))
+
+    def snapshot(self, symbol: str, tf: str, limit: int) -> Optional[Tuple[list, dict, dict]]:
+        """
+        (ohlcv, ticker, orderbook) z pamięci lub None, gdy stan jest niepełny/nieświeży
+        – wtedy Collector idzie klasycznie przez REST.
+        """
+        if tf != self.tf or symbol not in self._symbols or not self.is_fresh(symbol):
+            return None
+        key = (self.venue, symbol, tf)
+        if self.candles.size(key) < limit:
+            return None
+        book = self.orderbooks.get(symbol) if self.orderbooks is not None else self.books.get(symbol)
+        if not book:
+            return None
+        return self.candles.get(key, limit), dict(self.tickers[symbol]), book
@@ -0,0 +1,129 @@
+# app/engine/stream_replay.py
+"""
+Lokalny zastępczy serwer WebSocket – odtwarza nagrane ramki (JSONL) tak,
+jakby przychodziły z Binance combined streams. Do testów MarketStream offline.
+
+Plik nagrania (MarketStream(record_path=...)) – jedna linia na ramkę:
+    {"dt": 0.1, "frame": {"stream": "btcusdt@ticker", "data": {...}}}
+
+Uruchom:
+    python -m app.engine.stream_replay data/stream_sample.jsonl --port 8765
+i ustaw STREAM_URL=ws://127.0.0.1:8765/stream
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+from typing import Any, Dict, List, Set
+
+from aiohttp import WSMsgType, web
+
+
+def load_frames(path: str) -> List[Dict[str, Any]]:
+    out: List[Dict[str, Any]] = []
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            if "frame" not in row:  # surowa ramka bez opóźnienia
+                row = {"dt": 0.0, "frame": row}
+            out.append(row)
+    return out
+
+
+class ReplayServer:
+    """
+    Serwer WS pod `/stream`. Obsługuje SUBSCRIBE/UNSUBSCRIBE (odpowiada jak Binance)
+    i wysyła tylko ramki z zasubskrybowanych strumieni.
+    speed > 1 przyspiesza odtwarzanie, loop=True powtarza nagranie w kółko.
+    """
+
+    def __init__(self, frames: List[Dict[str, Any]], speed: float = 1.0, loop: bool = False):
+        self.frames = frames
+        self.speed = max(speed, 1e-6)
+        self.loop = loop
+        self.app = web.Application()
+        self.app.router.add_get("/stream", self._handle)
+        self._runner: web.AppRunner | None = None
+
+    async def _handle(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        subs: Set[str] = set()
+        subscribed = asyncio.Event()
+
+        async def reader():
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                req = json.loads(msg.data)
+                params = set(req.get("params") or [])
+                if req.get("method") == "SUBSCRIBE":
+                    subs.update(params)
+                    subscribed.set()
+                elif req.get("method") == "UNSUBSCRIBE":
+                    subs.difference_update(params)
+                await ws.send_json({"result": None, "id": req.get("id")})
+
+        rd = asyncio.create_task(reader())
+        try:
+            # klient subskrybuje zaraz po połączeniu – nie gub pierwszych ramek
+            try:
+                await asyncio.wait_for(subscribed.wait(), timeout=5.0)
+            except asyncio.TimeoutError:
+                pass
+            while not ws.closed:
+                for row in self.frames:
+                    await asyncio.sleep(float(row.get("dt", 0.0)) / self.speed)
+                    frame = row["frame"]
+                    if ws.closed:
+                        break
+                    if frame.get("stream") in subs:
+                        await ws.send_json(frame)
+                if not self.loop:
+                    break
+            # nagranie skończone – trzymaj połączenie, aż klient sam je zamknie
+            await rd
+        finally:
+            rd.cancel()
+        return ws
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765) -> str:
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        return f"ws://{host}:{port}/stream"
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay nagranych ramek WS (offline).")
+    ap.add_argument("path")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--speed", type=float, default=1.0)
+    ap.add_argument("--loop", action="store_true")
+    args = ap.parse_args()
+
+    async def _run():
+        srv = ReplayServer(load_frames(args.path), speed=args.speed, loop=args.loop)
+        url = await srv.start(args.host, args.port)
+        print(f"[stream_replay] {len(srv.frames)} ramek na {url}")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await srv.stop()
+
+    asyncio.run(_run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# app/engine/tickers.py
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from .ratelimit import set_task_priority, PRIO_BACKGROUND
+
+
+@dataclass
+class TickersSnapshot:
+    """Zrzut fetch_tickers() ze wszystkich giełd + czas pobrania."""
+    ts: float = 0.0
+    by_venue: Dict[str, Dict[str, Dict[str, Any]]] = field(default_factory=dict)
+
+    def age(self) -> float:
+        """Wiek zrzutu w sekundach (inf, jeśli jeszcze nie pobrany)."""
+        return time.time() - self.ts if self.ts else float("inf")
+
+    def items(self) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        """(venue, symbol, ticker) po wszystkich giełdach."""
+        for venue, tickers in self.by_venue.items():
+            for sym, tk in tickers.items():
+                yield venue, sym, tk
+
+
+class TickersService:
+    """
+    Jedno źródło tickerów dla odkrywania/filtrowania/rankingu uniwersum.
+
+    - get(max_age)   – zwraca zrzut z pamięci; odświeża, gdy starszy niż max_age
+                       (równoległe wywołania czekają na jedno odświeżenie),
+    - loop_refresh() – odświeżanie w tle co `ttl_sec` (task w Engine).
+    Błąd jednej giełdy nie kasuje jej poprzednich danych.
+    """
+
+    def __init__(self, collector, ttl_sec: float = 60.0):
+        self.collector = collector
+        self.ttl_sec = float(ttl_sec)
+        self.snapshot = TickersSnapshot()
+        self.stats = {"refreshes": 0, "served": 0, "errors": 0}
+        self._lock = asyncio.Lock()
+
+    async def get(self, max_age: Optional[float] = None) -> TickersSnapshot:
+        limit = self.ttl_sec if max_age is None else float(max_age)
+        if self.snapshot.age() > limit:
+            async with self._lock:
+                if self.snapshot.age() > limit:  # ktoś mógł odświeżyć w międzyczasie
+                    await self._refresh_locked()
+        self.stats["served"] += 1
+        return self.snapshot
+
+    async def refresh(self) -> TickersSnapshot:
+        async with self._lock:
+            await self._refresh_locked()
+        return self.snapshot
+
+    async def _refresh_locked(self) -> None:
+        venues = list(self.collector.venues.items())
+        results = await asyncio.gather(
+            *(self.collector._cex_call(ex, "fetch_tickers") for _, ex in venues),
+            return_exceptions=True,
+        )
+        by_venue = dict(self.snapshot.by_venue)
+        ok = 0
+        for (venue, _), res in zip(venues, results):
+            if isinstance(res, Exception) or not isinstance(res, dict):
+                self.stats["errors"] += 1
+                continue
+            by_venue[venue] = res
+            ok += 1
+        if ok:  # same błędy => zostaw stary zrzut (z jego wiekiem)
+            self.snapshot = TickersSnapshot(ts=time.time(), by_venue=by_venue)
+            self.stats["refreshes"] += 1
+
+    async def loop_refresh(self) -> None:
+        set_task_priority(PRIO_BACKGROUND)
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"[tickers] refresh error: {e}")
+            await asyncio.sleep(max(5.0, self.ttl_sec))
@@ -0,0 +1,216 @@
+# app/engine/venue_router.py
+"""
+Router giełd: zdrowie per (venue, endpoint) + circuit breaker per giełda.
+
+- record(venue, endpoint, lat_ms, ok) – wołane przez Collector._cex_call po każdym zapytaniu,
+- outcome(venue, ok) / abort(venue)   – wynik całego routowanego zapytania (breaker),
+- rank(symbol, endpoints)             – giełdy notujące symbol, od najzdrowszej,
+- allow(venue)                        – czy wolno teraz pytać giełdę (breaker),
+- snapshot()                          – p50/p99/błędy/stan breakera (dla /selftest).
+
+Breaker: `fail_threshold` porażek z rzędu -> open na `cooldown_sec`; potem
+half-open – przepuszcza jedno zapytanie próbne: sukces zamyka, porażka otwiera
+ponownie z dwukrotnie dłuższym cooldownem (max 8x).
+
+(Nie mylić z engine/router.py – to router sygnałów.)
+"""
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def _percentile(sorted_vals: List[float], q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    i = min(len(sorted_vals) - 1, max(0, int(round(q * (len(sorted_vals) - 1)))))
+    return sorted_vals[i]
+
+
+class _Window:
+    """Ostatnie N wyników (latencja ms, ok) jednego endpointu."""
+
+    def __init__(self, size: int):
+        self.samples: Deque[Tuple[float, bool]] = deque(maxlen=size)
+
+    def add(self, lat_ms: float, ok: bool) -> None:
+        self.samples.append((lat_ms, ok))
+
+    def stats(self) -> Dict[str, float]:
+        lats = sorted(l for l, ok in self.samples if ok)
+        n = len(self.samples)
+        errors = sum(1 for _, ok in self.samples if not ok)
+        return {
+            "n": n,
+            "p50_ms": _percentile(lats, 0.50),
+            "p99_ms": _percentile(lats, 0.99),
+            "err_rate": errors / n if n else 0.0,
+        }
+
+
+class _Breaker:
+    def __init__(self, fail_threshold: int, cooldown_sec: float):
+        self.fail_threshold = max(1, int(fail_threshold))
+        self.base_cooldown = float(cooldown_sec)
+        self.cooldown = self.base_cooldown
+        self.state = CLOSED
+        self.fails = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.trips = 0
+
+    def allow(self, now: float) -> bool:
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if now - self.opened_at < self.cooldown:
+                return False
+            self.state = HALF_OPEN
+            self.probing = False
+        if self.probing:
+            return False  # half-open: jedno zapytanie próbne naraz
+        self.probing = True
+        return True
+
+    def available(self, now: float) -> bool:
+        """Jak allow(), ale bez zajmowania próby (do rankingu)."""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            return now - self.opened_at >= self.cooldown
+        return not self.probing
+
+    def on_result(self, ok: bool, now: float) -> None:
+        if ok:
+            self.state = CLOSED
+            self.fails = 0
+            self.probing = False
+            self.cooldown = self.base_cooldown
+            return
+        if self.state == HALF_OPEN:
+            self._open(now, backoff=True)
+        elif self.state == CLOSED:
+            self.fails += 1
+            if self.fails >= self.fail_threshold:
+                self._open(now, backoff=False)
+
+    def abort(self) -> None:
+        """Zapytanie anulowane (np. przegrany wyścig hedged) – zwolnij próbę."""
+        self.probing = False
+
+    def _open(self, now: float, backoff: bool) -> None:
+        if backoff:
+            self.cooldown = min(self.cooldown * 2, self.base_cooldown * 8)
+        self.state = OPEN
+        self.opened_at = now
+        self.probing = False
+        self.trips += 1
+
+
+class VenueRouter:
+    def __init__(
+        self,
+        venues: Iterable[str],
+        markets=None,
+        window: int = 200,
+        fail_threshold: int = 5,
+        cooldown_sec: float = 30.0,
+    ):
+        self.venues: List[str] = list(venues)  # kolejność = priorytet przy remisie
+        self.markets = markets
+        self.window = int(window)
+        self._windows: Dict[Tuple[str, str], _Window] = {}
+        self._breakers: Dict[str, _Breaker] = {v: _Breaker(fail_threshold, cooldown_sec) for v in self.venues}
+
+    # ----------------------- zapis -----------------------
+
+    def record(self, venue: str, endpoint: str, lat_ms: float, ok: bool) -> None:
+        w = self._windows.get((venue, endpoint))
+        if w is None:
+            w = self._windows[(venue, endpoint)] = _Window(self.window)
+        w.add(lat_ms, ok)
+
+    def outcome(self, venue: str, ok: bool) -> None:
+        """Wynik routowanego zapytania (np. pakietu OHLCV+ticker+OB) – steruje breakerem."""
+        br = self._breakers.get(venue)
+        if br is not None:
+            br.on_result(ok, time.monotonic())
+
+    def abort(self, venue: str) -> None:
+        br = self._breakers.get(venue)
+        if br is not None:
+            br.abort()
+
+    # ----------------------- wybór giełdy -----------------------
+
+    def allow(self, venue: str) -> bool:
+        br = self._breakers.get(venue)
+        return br is None or br.allow(time.monotonic())
+
+    def score(self, venue: str, endpoints: Optional[Iterable[str]] = None) -> float:
+        """
+        Niższy = lepszy. Dla kilku endpointów wołanych równolegle liczy się
+        najwolniejszy: max(p50 + p99/4) * (1 + 5 * błędy). Brak danych -> 0
+        (giełda dostanie ruch i szybko zbierze próbki).
+        """
+        eps = list(endpoints) if endpoints else [ep for (v, ep) in self._windows if v == venue]
+        worst = 0.0
+        for ep in eps:
+            w = self._windows.get((venue, ep))
+            if w is None or not w.samples:
+                continue
+            s = w.stats()
+            worst = max(worst, (s["p50_ms"] + s["p99_ms"] / 4.0) * (1.0 + 5.0 * s["err_rate"]))
+        return worst
+
+    def rank(self, symbol: Optional[str] = None, endpoints: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Giełdy notujące symbol (wg MarketsCache, jeśli wczytany), posortowane:
+        dostępne przed zablokowanymi breakerem, potem wg score, potem wg priorytetu.
+        """
+        eps = list(endpoints) if endpoints else None
+        cands = list(self.venues)
+        if symbol and self.markets is not None and self.markets.known():
+            listed = [v for v in cands if self.markets.has(symbol, v)]
+            cands = listed or cands  # symbol spoza indeksu – spróbuj wszędzie
+        now = time.monotonic()
+
+        def key(v: str):
+            br = self._breakers.get(v)
+            blocked = br is not None and not br.available(now)
+            return (blocked, self.score(v, eps), self.venues.index(v))
+
+        return sorted(cands, key=key)
+
+    # ----------------------- raport -----------------------
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        out: Dict[str, Dict[str, object]] = {}
+        for venue in self.venues:
+            br = self._breakers[venue]
+            lats: List[float] = []
+            n = errors = 0
+            endpoints: Dict[str, Dict[str, float]] = {}
+            for (v, ep), w in self._windows.items():
+                if v != venue:
+                    continue
+                endpoints[ep] = w.stats()
+                lats.extend(l for l, ok in w.samples if ok)
+                n += len(w.samples)
+                errors += sum(1 for _, ok in w.samples if not ok)
+            lats.sort()
+            out[venue] = {
+                "state": br.state,
+                "trips": br.trips,
+                "n": n,
+                "p50_ms": _percentile(lats, 0.50),
+                "p99_ms": _percentile(lats, 0.99),
+                "err_rate": errors / n if n else 0.0,
+                "endpoints": endpoints,
+            }
+        return out
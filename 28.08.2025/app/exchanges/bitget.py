@@ -1,5 +1,6 @@
 import ccxt
-from typing import Dict, Any
+import ccxt.async_support as ccxt_async
+from typing import Dict, Any, Optional
 
 class BitgetX:
     def __init__(self, api_key: str='', api_secret: str='', password: str=''):
@@ -10,8 +11,8 @@ class BitgetX:
             'enableRateLimit': True,
         })
 
-    def fetch_ohlcv(self, symbol: str, timeframe: str='15m', limit: int=200):
-        return self.x.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit)
+    def fetch_ohlcv(self, symbol: str, timeframe: str='15m', limit: int=200, since: Optional[int]=None):
+        return self.x.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=limit)
 
     def fetch_ticker(self, symbol: str):
         return self.x.fetch_ticker(symbol)
@@ -19,6 +20,9 @@ class BitgetX:
     def fetch_order_book(self, symbol: str, limit: int=50):
         return self.x.fetch_order_book(symbol, limit=limit)
 
+    def load_markets(self, reload: bool=False) -> Dict[str, Dict[str, Any]]:
+        return self.x.load_markets(reload)
+
     def has_auth(self) -> bool:
         return bool(self.x.apiKey and self.x.secret)
 
@@ -30,3 +34,57 @@ class BitgetX:
             return True
         except Exception:
             return False
+
+
+class BitgetAX:
+    """
+    Wersja async (BitgetX na ccxt.async_support) – dla Engine/Collector.
+    Jedna instancja = jedna sesja HTTP do giełdy; zamykana przez close().
+    """
+    def __init__(self, api_key: str='', api_secret: str='', password: str=''):
+        self.x = ccxt_async.bitget({
+            'apiKey': api_key or None,
+            'secret': api_secret or None,
+            'password': password or None,
+            'enableRateLimit': True,
+        })
+
+    async def fetch_ohlcv(self, symbol: str, timeframe: str='15m', limit: int=200, since: Optional[int]=None):
+        return await self.x.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=limit)
+
+    async def fetch_ticker(self, symbol: str) -> Dict[str, Any]:
+        return await self.x.fetch_ticker(symbol)
+
+    async def fetch_tickers(self) -> Dict[str, Dict[str, Any]]:
+        return await self.x.fetch_tickers()
+
+    async def fetch_order_book(self, symbol: str, limit: int=50):
+        return await self.x.fetch_order_book(symbol, limit=limit)
+
+    async def load_markets(self, reload: bool=False) -> Dict[str, Dict[str, Any]]:
+        return await self.x.load_markets(reload)
+
+    def has_auth(self) -> bool:
+        return bool(self.x.apiKey and self.x.secret)
+
+    async def fetch_balances(self) -> Dict[str, float]:
+        """Salda SPOT (total) > 0: {coin: amount}."""
+        if not self.has_auth():
+            return {}
+        bal = await self.x.fetch_balance()
+        return {c: float(v) for c, v in (bal.get('total') or {}).items() if v}
+
+    async def fetch_balance_safe(self) -> bool:
+        if not self.has_auth():
+            return False
+        try:
+            _ = await self.x.fetch_balance()
+            return True
+        except Exception:
+            return False
+
+    async def close(self):
+        try:
+            await self.x.close()
+        except Exception:
+            pass
@@ -0,0 +1,231 @@
+"""
+Batch (NumPy) wersje atr / fvg_scores / rr_coeff / obi_coeff – cały
+uniwersum symboli w jednym przebiegu zamiast pętli per symbol.
+
+Wejście: tablica (symbole x świece x OHLCV) float64, np. ze stack_ohlcv().
+Wyniki są bit-w-bit równe funkcjom skalarnym z fvg.py / rr.py / obi.py:
+sumy liczymy w tej samej kolejności (pętla po kilkunastu kolumnach,
+wektorowo po symbolach), a nie np.sum (sumowanie parami daje inne bity).
+
+Benchmark: python -m app.features.bench_batch
+"""
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .ohlcv import OHLCV
+
+# ile ostatnich świec potrzebują atr(14) i fvg_scores (atr + 4 ostatnie)
+ATR_PERIOD = 14
+MIN_BARS = ATR_PERIOD + 1
+
+O, H, L, C, V = 1, 2, 3, 4, 5
+
+
+def stack_ohlcv(series: Sequence[List[List[float]]], bars: int = MIN_BARS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Ostatnie `bars` świec każdego symbolu -> (S x bars x 6) + maska `ok`
+    (symbole z krótszą historią mają ok=False – dla nich liczymy skalarnie).
+    Serie OHLCV (features/ohlcv.py) kopiujemy kolumnami prosto z bufora.
+    """
+    if series and all(isinstance(o, OHLCV) and len(o) >= bars for o in series):
+        tails = [o.tail(bars) for o in series]
+        # kolumna po kolumnie: join memoryview -> jeden bufor (S x bars)
+        x = np.stack([
+            np.frombuffer(b"".join(getattr(t, name) for t in tails), dtype=np.float64)
+            for name in ("ts", "open", "high", "low", "close", "volume")
+        ], axis=-1).reshape(len(series), bars, 6)
+        return x, np.ones(len(series), dtype=bool)
+    if all(o is not None and len(o) >= bars for o in series):
+        try:  # szybka ścieżka – jedna konwersja całej listy
+            x = np.array([o[-bars:] for o in series], dtype=np.float64).reshape(len(series), bars, -1)[:, :, :6]
+            if x.shape[2] == 6:
+                return x, np.ones(len(series), dtype=bool)
+        except (TypeError, ValueError):
+            pass
+    x = np.zeros((len(series), bars, 6), dtype=np.float64)
+    ok = np.zeros(len(series), dtype=bool)
+    for i, ohlcv in enumerate(series):
+        if ohlcv is not None and len(ohlcv) >= bars:
+            try:
+                x[i] = ohlcv[-bars:]
+            except (TypeError, ValueError):
+                continue  # np. volume=None z ccxt – ten symbol policzymy skalarnie
+            ok[i] = True
+    return x, ok
+
+
+def atr_batch(x: np.ndarray, period: int = ATR_PERIOD) -> np.ndarray:
+    """Jak fvg.atr: średnia TR z ostatnich `period` świec, od najnowszej."""
+    n_bars = x.shape[1]
+    n = min(n_bars, period + 1) - 1
+    if n <= 0:
+        return np.zeros(x.shape[0])
+    acc = np.zeros(x.shape[0])
+    for i in range(1, n + 1):
+        cur, prev = x[:, -i], x[:, -i - 1]
+        hi, lo, cp = cur[:, H], cur[:, L], prev[:, C]
+        tr = np.maximum(np.maximum(hi - lo, np.abs(hi - cp)), np.abs(lo - cp))
+        acc = acc + tr
+    return acc / n
+
+
+def fvg_scores_batch(x: np.ndarray, atr_vals: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Jak fvg.fvg_scores: (f_long, f_short) dla każdego symbolu."""
+    s = x.shape[0]
+    if x.shape[1] < 5:
+        return np.full(s, 0.5), np.full(s, 0.5)
+    a = atr_batch(x, ATR_PERIOD) if atr_vals is None else atr_vals
+    a = np.where(a == 0.0, 1e-6, a)  # `atr(...) or 1e-6`
+    long_gap = np.zeros(s)
+    short_gap = np.zeros(s)
+    for i in range(2, 5):
+        c0, c1 = x[:, -i], x[:, -i + 1]
+        gap_up = np.maximum(0.0, c1[:, O] - c0[:, H])
+        gap_dn = np.maximum(0.0, c0[:, L] - c1[:, H])
+        long_gap = np.maximum(long_gap, gap_up)
+        short_gap = np.maximum(short_gap, gap_dn)
+    f_long = np.maximum(0.0, np.minimum(1.0, long_gap / a))
+    f_short = np.maximum(0.0, np.minimum(1.0, short_gap / a))
+    return 0.5 + (f_long - 0.5) * 0.8, 0.5 + (f_short - 0.5) * 0.8
+
+
+def rr_coeff_batch(entry: np.ndarray, sl: np.ndarray, tp1: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Jak rr.rr_coeff: (rr, coeff)."""
+    risk = np.abs(entry - sl)
+    reward = np.abs(tp1 - entry)
+    rr = np.where(risk > 0, reward / (risk + 1e-9), 0.0)
+    coeff = np.maximum(0.0, np.minimum(1.0, rr / 3.0))
+    return rr, coeff
+
+
+def book_sizes(orderbooks: Sequence[Optional[dict]], depth: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+    """Ilości top-`depth` poziomów (S x depth) dla bid/ask; brakujące poziomy = 0."""
+    bids = np.zeros((len(orderbooks), depth))
+    asks = np.zeros((len(orderbooks), depth))
+    for i, ob in enumerate(orderbooks):
+        if not ob:
+            continue
+        b = [lvl[1] for lvl in (ob.get("bids") or [])[:depth]]
+        a = [lvl[1] for lvl in (ob.get("asks") or [])[:depth]]
+        bids[i, :len(b)] = b
+        asks[i, :len(a)] = a
+    return bids, asks
+
+
+def obi_coeff_batch(bids: np.ndarray, asks: np.ndarray) -> np.ndarray:
+    """Jak obi.obi_coeff na top-20 (sumy po kolei od najlepszego poziomu)."""
+    b = np.zeros(bids.shape[0])
+    a = np.zeros(asks.shape[0])
+    for j in range(bids.shape[1]):
+        b = b + bids[:, j]
+        a = a + asks[:, j]
+    total = b + a + 1e-9
+    bias = (b - a) / total
+    coeff = 0.5 * (bias + 1.0)
+    return np.maximum(0.0, np.minimum(1.0, coeff))
+
+
+def features_batch(
+    series: Sequence[List[List[float]]],
+    orderbooks: Optional[Sequence[Optional[dict]]] = None,
+    last: Optional[np.ndarray] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    atr / f_long / f_short / obi / rr_seed (jak w Analyzer: SL 0.5xATR, TP 0.8xATR,
+    `last` = cena z tickera, domyślnie close ostatniej świecy) dla listy symboli.
+    `ok` = False -> historia za krótka, wartości nieważne.
+    """
+    x, ok = stack_ohlcv(series, MIN_BARS)
+    atr_v = atr_batch(x, ATR_PERIOD)
+    f_long, f_short = fvg_scores_batch(x, atr_v)
+    if last is None:
+        last = x[:, -1, C]
+    _rr, rr_c = rr_coeff_batch(last, last - atr_v * 0.5, last + atr_v * 0.8)
+    out = {"ok": ok, "atr": atr_v, "f_long": f_long, "f_short": f_short, "rr_seed": rr_c}
+    if orderbooks is not None:
+        out["obi"] = obi_coeff_batch(*book_sizes(orderbooks, 20))
+    return out
+
+
+# ----------------------- fusion macierzowo -----------------------
+# fuse_edge (engine/fusion.py) dla całej macierzy feature'ów naraz –
+# tutaj, żeby skalarna ścieżka fusion nie zależała od NumPy.
+
+# kolumny macierzy feature'ów: (nazwa, strona, waga w SETTINGS)
+#   "long"/"short" – tylko po jednej stronie, "sym" – LONG: v, SHORT: 1-v (jak fuse_edge)
+FUSION_COLUMNS: Tuple[Tuple[str, str, str], ...] = (
+    ("fvg_long", "long", "w_fvg"),
+    ("fvg_short", "short", "w_fvg"),
+    ("rr", "sym", "w_rr"),
+    ("obi", "sym", "w_obi"),
+    ("news", "sym", "w_news"),
+    ("whale", "sym", "w_whale"),
+    ("onchain", "sym", "w_onc"),
+    ("wobi", "sym", "w_wobi"),
+    ("depth", "sym", "w_depth"),
+    ("micro", "sym", "w_micro"),
+)
+
+
+class FusionWeights:
+    """
+    Wagi jako macierz (kolumny x 2): E = X @ W, long = E[:,0], short = E[:,1] + const.
+    Dla kolumn "sym" SHORT = w*(1-v) = w - w*v, więc stała trafia do `const`.
+    Dodatkowe kolumny (np. węzły pipeline z FEATURE_WEIGHTS) są zawsze "sym".
+    """
+
+    def __init__(self, st, extra: Optional[Mapping[str, float]] = None):
+        cols = [(name, side, float(getattr(st, key, 0.0))) for name, side, key in FUSION_COLUMNS]
+        cols += [(name, "sym", float(w)) for name, w in (extra or {}).items()]
+        self.columns: Tuple[str, ...] = tuple(c[0] for c in cols)
+        self.W = np.zeros((len(cols), 2))
+        self.const = 0.0
+        for i, (_name, side, w) in enumerate(cols):
+            if side in ("long", "sym"):
+                self.W[i, 0] = w
+            if side == "short":
+                self.W[i, 1] = w
+            elif side == "sym":
+                self.W[i, 1] = -w
+                self.const += w
+
+
+def feature_matrix(
+    rows: Sequence[Mapping[str, float]],
+    columns: Sequence[str],
+    defaults: Optional[Mapping[str, float]] = None,
+) -> np.ndarray:
+    """
+    (symbole x kolumny) z listy dictów. Brakujące pole -> `defaults` (np. globalne
+    makro), a potem 0.5 (neutral) – wiersz może nadpisać dowolną kolumnę
+    (np. para DEX z obi=0.5 albo własnym news).
+    """
+    base = [float((defaults or {}).get(c, 0.5)) for c in columns]
+    X = np.empty((len(rows), len(columns)))
+    for i, r in enumerate(rows):
+        X[i] = [float(r[c]) if c in r else base[j] for j, c in enumerate(columns)]
+    return X
+
+
+def fuse_edge_batch(X: np.ndarray, fw: FusionWeights) -> Tuple[np.ndarray, np.ndarray]:
+    """fuse_edge dla całej macierzy naraz -> (long_edge, short_edge) jako wektory."""
+    E = X @ fw.W
+    return E[:, 0], E[:, 1] + fw.const
+
+
+def edge_upper_bound(
+    fw: FusionWeights,
+    bounds: Optional[Mapping[str, Tuple[float, float]]] = None,
+) -> float:
+    """
+    Górne ograniczenie max(long, short) z fuse_edge_batch, gdy kolumny są tylko
+    ograniczone przedziałami `bounds` {kolumna: (lo, hi)} (znana wartość = (v, v));
+    brakujące kolumny – pełne [0, 1]. Liniowe, więc max w końcach przedziałów.
+    """
+    long_ub = short_ub = 0.0
+    for i, name in enumerate(fw.columns):
+        lo, hi = (bounds or {}).get(name, (0.0, 1.0))
+        long_ub += max(fw.W[i, 0] * lo, fw.W[i, 0] * hi)
+        short_ub += max(fw.W[i, 1] * lo, fw.W[i, 1] * hi)
+    return max(long_ub, short_ub + fw.const)
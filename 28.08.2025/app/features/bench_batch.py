@@ -0,0 +1,129 @@
+"""
+Benchmark: skalarne atr/fvg_scores/rr_coeff/obi_coeff (pętla po symbolach)
+vs app/features/batch.py (NumPy, jeden przebieg) + kontrola zgodności bit-w-bit,
+oraz fuse_edge w pętli (engine/fusion.py) vs fuse_edge_batch (features/batch.py).
+
+    python -m app.features.bench_batch            # 50 / 500 / 5000 symboli
+    python -m app.features.bench_batch 100 1000
+"""
+import random
+import sys
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+from .batch import (
+    MIN_BARS, FusionWeights, atr_batch, book_sizes, features_batch, fuse_edge_batch,
+    fvg_scores_batch, obi_coeff_batch, rr_coeff_batch, stack_ohlcv,
+)
+from .fvg import atr, fvg_scores
+from .obi import obi_coeff
+from .rr import rr_coeff
+from ..engine.fusion import fuse_edge
+
+
+def _fake_market(rng: random.Random, bars: int = 200) -> Tuple[List[List[float]], dict]:
+    px = rng.uniform(0.01, 50_000.0)
+    ohlcv = []
+    ts = 1_700_000_000_000
+    for _ in range(bars):
+        o = px
+        c = max(1e-8, o * (1 + rng.gauss(0, 0.01)))
+        h = max(o, c) * (1 + abs(rng.gauss(0, 0.004)))
+        l = min(o, c) * (1 - abs(rng.gauss(0, 0.004)))
+        ohlcv.append([ts, o, h, l, c, rng.uniform(1, 1e6)])
+        ts += 900_000
+        # czasem luka, żeby FVG nie były same zera
+        px = c * (1 + (rng.choice((-1, 1)) * rng.uniform(0.002, 0.02) if rng.random() < 0.15 else 0.0))
+    book = {
+        "bids": [[px * (1 - 0.0005 * i), rng.uniform(0.1, 50)] for i in range(1, 101)],
+        "asks": [[px * (1 + 0.0005 * i), rng.uniform(0.1, 50)] for i in range(1, 101)],
+    }
+    return ohlcv, book
+
+
+def _scalar(series, books):
+    out = []
+    for ohlcv, ob in zip(series, books):
+        last = ohlcv[-1][4]
+        a = atr(ohlcv, 14)
+        fl, fs = fvg_scores(ohlcv)
+        _rr, rr_c = rr_coeff(last, last - a * 0.5, last + a * 0.8)
+        out.append((a, fl, fs, rr_c, obi_coeff(ob)))
+    return out
+
+
+def run(n_symbols: int, repeat: int = 3) -> None:
+    rng = random.Random(n_symbols)
+    data = [_fake_market(rng) for _ in range(n_symbols)]
+    series = [d[0] for d in data]
+    books = [d[1] for d in data]
+
+    t_scalar = min(_timeit(lambda: _scalar(series, books)) for _ in range(repeat))
+    t_batch = min(_timeit(lambda: features_batch(series, books)) for _ in range(repeat))
+
+    # same obliczenia na gotowych tablicach (bez konwersji list -> ndarray)
+    x, _ok = stack_ohlcv(series, MIN_BARS)
+    bids, asks = book_sizes(books, 20)
+
+    def _compute():
+        a = atr_batch(x)
+        fvg_scores_batch(x, a)
+        last = x[:, -1, 4]
+        rr_coeff_batch(last, last - a * 0.5, last + a * 0.8)
+        obi_coeff_batch(bids, asks)
+
+    t_compute = min(_timeit(_compute) for _ in range(repeat))
+
+    ref = np.array(_scalar(series, books))
+    got = features_batch(series, books)
+    vec = np.stack([got["atr"], got["f_long"], got["f_short"], got["rr_seed"], got["obi"]], axis=1)
+    exact = bool(np.array_equal(ref, vec)) and bool(got["ok"].all())
+
+    print(
+        f"{n_symbols:6d} symboli | scalar {t_scalar * 1000:8.2f} ms | batch {t_batch * 1000:8.2f} ms "
+        f"(x{t_scalar / max(t_batch, 1e-9):5.1f}) | same obliczenia {t_compute * 1000:7.2f} ms "
+        f"(x{t_scalar / max(t_compute, 1e-9):6.1f}) | identyczne: {'TAK' if exact else 'NIE'}"
+    )
+
+
+class _W:
+    w_fvg, w_rr, w_obi, w_news, w_whale, w_onc = 0.35, 0.25, 0.15, 0.10, 0.10, 0.05
+    w_wobi = w_depth = w_micro = 0.0
+
+
+def run_fusion(n_symbols: int, repeat: int = 3) -> None:
+    rng = np.random.default_rng(n_symbols)
+    X = rng.random((n_symbols, 10))
+    st = _W()
+    fw = FusionWeights(st)
+    w = (st.w_fvg, st.w_rr, st.w_obi, st.w_news, st.w_whale, st.w_onc)
+    rows = X.tolist()
+
+    def _scalar():
+        return [fuse_edge(*r[:7], *w, *r[7:10]) for r in rows]
+
+    t_scalar = min(_timeit(_scalar) for _ in range(repeat))
+    t_batch = min(_timeit(lambda: fuse_edge_batch(X, fw)) for _ in range(repeat))
+    ref = np.array(_scalar())
+    lo, sh = fuse_edge_batch(X, fw)
+    err = float(max(np.abs(ref[:, 0] - lo).max(), np.abs(ref[:, 1] - sh).max()))
+    print(
+        f"{n_symbols:6d} symboli | fuse_edge {t_scalar * 1e6:9.1f} us | batch {t_batch * 1e6:7.1f} us "
+        f"(x{t_scalar / max(t_batch, 1e-9):6.1f}) | max różnica {err:.1e}"
+    )
+
+
+def _timeit(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [50, 500, 5000]
+    for n in sizes:
+        run(n)
+    for n in sizes:
+        run_fusion(n)
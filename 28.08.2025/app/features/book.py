@@ -0,0 +1,91 @@
+"""
+Feature'y order booka z jednego snapshotu – jeden przebieg NumPy:
+
+- wobi     – imbalance ważony odległością od mid (waga exp(-dist_bps / decay_bps)),
+             poziomy daleko od ceny prawie nie liczą się, więc płytki book wystarcza,
+- depth    – notional bid/ask w paśmie ±band_pct% od mid + coeff (bid vs ask),
+- spread   – w bps,
+- micro    – microprice (best bid/ask ważone ilością po przeciwnej stronie)
+             i jego położenie w spreadzie jako coeff 0..1.
+
+Wszystkie *_coeff są w skali obi_coeff: 0.5 = neutral, >0.5 = przewaga kupujących.
+Działa na dict ccxt i na LocalOrderBook (engine/orderbook.py).
+"""
+from typing import Dict, Tuple
+
+import numpy as np
+
+NEUTRAL_BOOK: Dict[str, float] = {
+    "mid": 0.0, "spread_bps": 0.0, "microprice": 0.0,
+    "wobi": 0.5, "depth_bid": 0.0, "depth_ask": 0.0, "depth_coeff": 0.5, "micro_coeff": 0.5,
+}
+
+
+def book_arrays(orderbook, depth: int = 100) -> Tuple[np.ndarray, np.ndarray]:
+    """(bids, asks) jako tablice (n x 2) [cena, ilość], najlepszy poziom pierwszy."""
+    def side(key: str) -> np.ndarray:
+        lv = (orderbook.get(key) or [])[:depth] if orderbook else []
+        if not lv:
+            return np.empty((0, 2))
+        return np.asarray([l[:2] for l in lv], dtype=np.float64)
+    return side("bids"), side("asks")
+
+
+def _coeff(a: float, b: float) -> float:
+    return max(0.0, min(1.0, 0.5 * ((a - b) / (a + b + 1e-9) + 1.0)))
+
+
+def book_features(
+    orderbook,
+    depth: int = 100,
+    band_pct: float = 0.5,
+    decay_bps: float = 10.0,
+) -> Dict[str, float]:
+    bids, asks = book_arrays(orderbook, depth)
+    if not len(bids) or not len(asks):
+        return dict(NEUTRAL_BOOK)
+
+    bb, bq = bids[0]
+    ba, aq = asks[0]
+    mid = 0.5 * (bb + ba)
+    if mid <= 0:
+        return dict(NEUTRAL_BOOK)
+    spread = ba - bb
+
+    # odległość od mid w bps (obie strony naraz)
+    px = np.concatenate((bids[:, 0], asks[:, 0]))
+    qty = np.concatenate((bids[:, 1], asks[:, 1]))
+    dist_bps = np.abs(px - mid) / mid * 1e4
+    is_bid = np.arange(len(px)) < len(bids)
+
+    w = np.exp(-dist_bps / max(decay_bps, 1e-9)) * qty
+    wb, wa = float(w[is_bid].sum()), float(w[~is_bid].sum())
+
+    notional = np.where(dist_bps <= band_pct * 100.0, px * qty, 0.0)
+    db, da = float(notional[is_bid].sum()), float(notional[~is_bid].sum())
+
+    micro = (bb * aq + ba * bq) / (bq + aq) if (bq + aq) > 0 else mid
+    micro_coeff = 0.5 + (micro - mid) / spread if spread > 0 else 0.5
+
+    return {
+        "mid": float(mid),
+        "spread_bps": float(spread / mid * 1e4),
+        "microprice": float(micro),
+        "wobi": _coeff(wb, wa),
+        "depth_bid": db,
+        "depth_ask": da,
+        "depth_coeff": _coeff(db, da),
+        "micro_coeff": max(0.0, min(1.0, float(micro_coeff))),
+    }
+
+
+def book_features_or_neutral(orderbook, st=None) -> Dict[str, float]:
+    """book_features z ustawieniami (book_band_pct / book_decay_bps); błąd -> neutral."""
+    try:
+        return book_features(
+            orderbook,
+            band_pct=float(getattr(st, "book_band_pct", 0.5)),
+            decay_bps=float(getattr(st, "book_decay_bps", 10.0)),
+        )
+    except Exception:
+        return dict(NEUTRAL_BOOK)
@@ -1,7 +1,12 @@
-from typing import Tuple, List
+from typing import Tuple, List, Optional
 import math
 
-def atr(ohlcv: List[List[float]], period: int=14) -> float:
+from .ohlcv import OHLCV
+
+def true_ranges(ohlcv: List[List[float]], period: int=14) -> List[float]:
+    """TR ostatnich `period` świec, od najnowszej (wspólne dla atr() i pipeline)."""
+    if isinstance(ohlcv, OHLCV):
+        return _true_ranges_cols(ohlcv, period)
     trs = []
     for i in range(1, min(len(ohlcv), period+1)):
         prev = ohlcv[-i-1]
@@ -9,23 +14,47 @@ def atr(ohlcv: List[List[float]], period: int=14) -> float:
         high, low, close_prev = cur[2], cur[3], prev[4]
         tr = max(high-low, abs(high-close_prev), abs(low-close_prev))
         trs.append(tr)
+    return trs
+
+def _true_ranges_cols(ohlcv: OHLCV, period: int) -> List[float]:
+    """true_ranges() na kolumnach OHLCV – bez budowania wierszy."""
+    hi, lo, cl = ohlcv.high, ohlcv.low, ohlcv.close
+    trs = []
+    for i in range(1, min(len(ohlcv), period+1)):
+        high, low, close_prev = hi[-i], lo[-i], cl[-i-1]
+        tr = max(high-low, abs(high-close_prev), abs(low-close_prev))
+        trs.append(tr)
+    return trs
+
+def atr_from_tr(trs: List[float]) -> float:
     if not trs:
         return 0.0
     return sum(trs)/len(trs)
 
-def fvg_scores(ohlcv: List[List[float]]) -> Tuple[float, float]:
+def atr(ohlcv: List[List[float]], period: int=14) -> float:
+    return atr_from_tr(true_ranges(ohlcv, period))
+
+# zakres wyniku fvg_scores po normalizacji 0.5 + (x-0.5)*0.8
+FVG_RANGE = (0.1, 0.9)
+
+def fvg_scores(ohlcv: List[List[float]], atr_val: Optional[float] = None) -> Tuple[float, float]:
     """Return (fvg_long, fvg_short) in [0..1].
     Very compact heuristic: look for most recent gap vs ATR.
+    `atr_val` – gotowe ATR(14), żeby nie liczyć go drugi raz.
     """
     if len(ohlcv) < 5:
         return 0.5, 0.5
-    a = atr(ohlcv, 14) or 1e-6
+    a = (atr(ohlcv, 14) if atr_val is None else atr_val) or 1e-6
+    return fvg_from_window(ohlcv[-4:], a)
+
+def fvg_from_window(last4: List[List[float]], a: float) -> Tuple[float, float]:
+    """fvg_scores na 4 ostatnich świecach i gotowym ATR (też dla engine/indicators.py)."""
     # Use last 3 candles for 'freshness'
     long_gap = 0.0
     short_gap = 0.0
     for i in range(2, 5):
-        c0 = ohlcv[-i]     # older
-        c1 = ohlcv[-i+1]   # newer
+        c0 = last4[-i]     # older
+        c1 = last4[-i+1]   # newer
         # Bull FVG when c0.high < c1.low (gap up) → long context
         gap_up = max(0.0, c1[1] - c0[2])
         # Bear FVG when c0.low > c1.high (gap down) → short context
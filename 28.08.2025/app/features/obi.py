@@ -1,7 +1,11 @@
 from typing import Dict
 def obi_coeff(orderbook: Dict) -> float:
-    bids = sum(x[1] for x in orderbook.get('bids', [])[:20]) if orderbook else 0.0
-    asks = sum(x[1] for x in orderbook.get('asks', [])[:20]) if orderbook else 0.0
+    if orderbook and hasattr(orderbook, 'top_sums'):
+        # lokalna replika L2 (engine/orderbook.py) – sumy bez kopiowania poziomów
+        bids, asks = orderbook.top_sums(20)
+    else:
+        bids = sum(x[1] for x in orderbook.get('bids', [])[:20]) if orderbook else 0.0
+        asks = sum(x[1] for x in orderbook.get('asks', [])[:20]) if orderbook else 0.0
     total = bids + asks + 1e-9
     bias = (bids - asks) / total  # -1..1
     coeff = 0.5 * (bias + 1.0)    # 0..1
@@ -0,0 +1,120 @@
+# app/features/ohlcv.py
+"""
+Kompaktowy kontener OHLCV – 6 kolumn array('d') zamiast listy list.
+
+Jeden bar to 48 B w ciągłych tablicach (zamiast listy + 6 obiektów float),
+a slicing (`ohlcv[-100:]`, tail(n)) zwraca widok na te same tablice – bez
+kopiowania. Kolumny (ts/open/high/low/close/volume) to memoryview, więc
+np.frombuffer / matplotlib / batch.py czytają je bez konwersji.
+
+Dla zgodności z resztą kodu zachowuje się jak sekwencja wierszy ccxt:
+`len(x)`, `x[-1][4]`, `for b in x` działają jak dla List[List[float]]
+(wiersz budowany dopiero przy odczycie).
+"""
+from __future__ import annotations
+
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+COLUMNS = ("ts", "open", "high", "low", "close", "volume")
+
+
+class OHLCV:
+    __slots__ = ("_cols", "_start", "_stop")
+
+    def __init__(self, cols: Optional[Sequence[array]] = None, start: int = 0, stop: Optional[int] = None):
+        self._cols = tuple(cols) if cols is not None else tuple(array("d") for _ in COLUMNS)
+        n = len(self._cols[0])
+        self._start = start
+        self._stop = n if stop is None else stop
+
+    # ----------------------- budowanie -----------------------
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence[Any]]) -> "OHLCV":
+        """Z wierszy ccxt [ts, o, h, l, c, v] (brakujący/None volume -> 0)."""
+        if isinstance(rows, OHLCV):
+            return rows
+        cols = tuple(array("d") for _ in COLUMNS)
+        ts, o, h, l, c, v = cols
+        for r in rows:
+            ts.append(float(r[0]))
+            o.append(float(r[1]))
+            h.append(float(r[2]))
+            l.append(float(r[3]))
+            c.append(float(r[4]))
+            v.append(float(r[5] or 0.0) if len(r) > 5 else 0.0)
+        return cls(cols)
+
+    @classmethod
+    def from_dex(cls, candles: Iterable[Dict[str, Any]]) -> "OHLCV":
+        """Ze świec Dexscreenera ({t, o, h, l, c, v})."""
+        return cls.from_rows(
+            (b.get("t", 0), b.get("o", 0), b.get("h", 0), b.get("l", 0), b.get("c", 0), b.get("v", 0.0))
+            for b in candles
+        )
+
+    # ----------------------- kolumny (zero-copy) -----------------------
+
+    def _col(self, i: int) -> memoryview:
+        return memoryview(self._cols[i])[self._start:self._stop]
+
+    @property
+    def ts(self) -> memoryview:
+        return self._col(0)
+
+    @property
+    def open(self) -> memoryview:
+        return self._col(1)
+
+    @property
+    def high(self) -> memoryview:
+        return self._col(2)
+
+    @property
+    def low(self) -> memoryview:
+        return self._col(3)
+
+    @property
+    def close(self) -> memoryview:
+        return self._col(4)
+
+    @property
+    def volume(self) -> memoryview:
+        return self._col(5)
+
+    def tail(self, n: int) -> "OHLCV":
+        """Widok na ostatnie n świec."""
+        return OHLCV(self._cols, max(self._start, self._stop - int(n)), self._stop)
+
+    # ----------------------- sekwencja wierszy -----------------------
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def _row(self, i: int) -> List[float]:
+        c = self._cols
+        return [int(c[0][i]), c[1][i], c[2][i], c[3][i], c[4][i], c[5][i]]
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            start, stop, step = idx.indices(len(self))
+            if step != 1:
+                return [self._row(self._start + i) for i in range(start, stop, step)]
+            return OHLCV(self._cols, self._start + start, self._start + max(start, stop))
+        n = len(self)
+        if idx < 0:
+            idx += n
+        if not 0 <= idx < n:
+            raise IndexError("OHLCV index out of range")
+        return self._row(self._start + idx)
+
+    def __iter__(self) -> Iterator[List[float]]:
+        for i in range(self._start, self._stop):
+            yield self._row(i)
+
+    def to_rows(self) -> List[List[float]]:
+        return list(self)
+
+    def __repr__(self) -> str:
+        return f"OHLCV({len(self)} bars)"
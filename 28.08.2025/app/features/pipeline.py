@@ -0,0 +1,229 @@
+"""
+Pipeline feature'ów jako DAG: każdy feature deklaruje wejścia, silnik
+liczy tylko to, czego potrzebują cele, każdy węzeł raz (TR -> ATR -> FVG/RR,
+book -> OBI/book_feats) i mierzy czas każdego węzła.
+
+Wejścia (ctx):  ohlcv, book, last, st, macro {news, whale, onchain},
+                indicators (IndicatorState z CandleCache albo None).
+Wynik węzła może też przyjść z zewnątrz (np. FeatureCache, batch NumPy) –
+wtedy węzeł jest pomijany.
+
+Nowy feature:
+    from app.features.pipeline import feature
+
+    @feature("vol_z", deps=("ohlcv",), edge_input=True)
+    def vol_z(ohlcv):
+        ...                      # coeff 0..1, 0.5 = neutral
+    FEATURE_PLUGINS=mojpakiet.vol_feats   FEATURE_WEIGHTS=vol_z=0.05
+
+Węzły z edge_input=True wchodzą do `edge` z wagą z FEATURE_WEIGHTS (LONG: w*v,
+SHORT: w*(1-v)). Równolegle (gather w arun()) lecą tylko węzły async (korutyny,
+np. plugin pobierający dane) z tego samego poziomu DAG; węzły synchroniczne –
+czyli wszystkie bazowe – liczą się po kolei (to mikrosekundy, wątek kosztowałby więcej).
+"""
+from __future__ import annotations
+
+import asyncio
+import importlib
+import inspect
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .book import book_features_or_neutral
+from .fvg import atr_from_tr, fvg_scores, true_ranges
+from .obi import obi_coeff
+from .rr import rr_coeff
+from ..engine.fusion import book_inputs, fuse_edge
+
+INPUTS = ("ohlcv", "book", "last", "st", "macro", "indicators", "weights")
+NEUTRAL_MACRO = {"news": 0.5, "whale": 0.5, "onchain": 0.5}
+
+
+@dataclass
+class Node:
+    name: str
+    fn: Callable[..., Any]
+    deps: Tuple[str, ...]
+    edge_input: bool = False
+
+
+REGISTRY: Dict[str, Node] = {}
+
+
+def feature(name: str, deps: Sequence[str] = (), edge_input: bool = False):
+    """Dekorator rejestrujący węzeł. Funkcja dostaje zależności jako kwargs."""
+    def deco(fn):
+        REGISTRY[name] = Node(name, fn, tuple(deps), edge_input)
+        return fn
+    return deco
+
+
+# ----------------------- węzły bazowe -----------------------
+
+@feature("tr", deps=("ohlcv", "indicators"))
+def _tr(ohlcv, indicators):
+    # ze stanem inkrementalnym ATR jest gotowe – TR niepotrzebne
+    return None if indicators is not None else true_ranges(ohlcv, 14)
+
+
+@feature("atr", deps=("tr", "indicators"))
+def _atr(tr, indicators):
+    return indicators.atr.value if indicators is not None else atr_from_tr(tr)
+
+
+@feature("fvg", deps=("ohlcv", "atr", "indicators"))
+def _fvg(ohlcv, atr, indicators):
+    return indicators.fvg_scores() if indicators is not None else fvg_scores(ohlcv, atr)
+
+
+@feature("rr_seed", deps=("last", "atr"))
+def _rr_seed(last, atr):
+    return rr_coeff(last, last - atr * 0.5, last + atr * 0.8)[1]
+
+
+@feature("obi", deps=("book",))
+def _obi(book):
+    return obi_coeff(book) if book is not None else 0.5  # DEX – brak booka
+
+
+@feature("book_feats", deps=("book", "st"))
+def _book_feats(book, st):
+    return book_features_or_neutral(book, st)
+
+
+@feature("edge", deps=("fvg", "rr_seed", "obi", "book_feats", "macro", "st", "weights"))
+def _edge(fvg, rr_seed, obi, book_feats, macro, st, weights, **extra):
+    f_long, f_short = fvg
+    long_edge, short_edge = fuse_edge(
+        f_long, f_short, rr_seed, obi, macro["news"], macro["whale"], macro["onchain"],
+        st.w_fvg, st.w_rr, st.w_obi, st.w_news, st.w_whale, st.w_onc,
+        **book_inputs(book_feats, st)
+    )
+    for name, v in extra.items():
+        w = weights.get(name, 0.0)
+        long_edge += w * v
+        short_edge += w * (1.0 - v)
+    return long_edge, short_edge
+
+
+# ----------------------- silnik -----------------------
+
+def _parse_weights(spec: str) -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    for part in (spec or "").split(","):
+        name, _, w = part.partition("=")
+        if name.strip() and w.strip():
+            try:
+                out[name.strip()] = float(w)
+            except ValueError:
+                print(f"[pipeline] zła waga: {part!r}")
+    return out
+
+
+class FeaturePipeline:
+    def __init__(self, st=None, plugins: Optional[Iterable[str]] = None):
+        self.st = st
+        mods = plugins if plugins is not None else (getattr(st, "feature_plugins", "") or "").split(",")
+        for mod in (m.strip() for m in mods):
+            if not mod:
+                continue
+            try:
+                importlib.import_module(mod)  # moduł rejestruje węzły przez @feature
+            except Exception as e:
+                print(f"[pipeline] plugin {mod} error: {e}")
+        self.weights = _parse_weights(getattr(st, "feature_weights", ""))
+        self.timings: Dict[str, Dict[str, float]] = {}
+        self._plans: Dict[Tuple[Tuple[str, ...], frozenset], List[List[Node]]] = {}
+
+    def edge_inputs(self) -> Tuple[str, ...]:
+        """Węzły edge_input z niezerową wagą (dodatkowe kolumny fusion)."""
+        return tuple(n for n, nd in REGISTRY.items() if nd.edge_input and self.weights.get(n))
+
+    def _deps(self, node: Node) -> Tuple[str, ...]:
+        if node.name != "edge":
+            return node.deps
+        return node.deps + self.edge_inputs()
+
+    def plan(self, targets: Sequence[str], given: Iterable[str] = ()) -> List[List[Node]]:
+        """Poziomy DAG (węzły w poziomie niezależne) potrzebne do `targets`."""
+        key = (tuple(targets), frozenset(given))
+        if key in self._plans:
+            return self._plans[key]
+        have = set(INPUTS) | set(given)
+        level: Dict[str, int] = {}
+
+        def visit(name: str, stack: Tuple[str, ...] = ()) -> int:
+            if name in have:
+                return -1
+            if name in level:
+                return level[name]
+            if name in stack:
+                raise ValueError(f"cykl w pipeline: {' -> '.join(stack + (name,))}")
+            node = REGISTRY.get(name)
+            if node is None:
+                raise KeyError(f"nieznany feature: {name}")
+            lv = 1 + max((visit(d, stack + (name,)) for d in self._deps(node)), default=-1)
+            level[name] = lv
+            return lv
+
+        for t in targets:
+            visit(t)
+        levels: List[List[Node]] = [[] for _ in range(max(level.values(), default=-1) + 1)]
+        for name, lv in level.items():
+            levels[lv].append(REGISTRY[name])
+        self._plans[key] = levels
+        return levels
+
+    def _ctx(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        ctx = {"book": None, "indicators": None, "macro": NEUTRAL_MACRO, "st": self.st, "weights": self.weights}
+        ctx.update(values)
+        return ctx
+
+    def _record(self, name: str, t0: float) -> None:
+        ms = (time.perf_counter() - t0) * 1000.0
+        t = self.timings.get(name)
+        if t is None:
+            t = self.timings[name] = {"calls": 0, "total_ms": 0.0, "max_ms": 0.0}
+        t["calls"] += 1
+        t["total_ms"] += ms
+        t["max_ms"] = max(t["max_ms"], ms)
+
+    def _call(self, node: Node, ctx: Dict[str, Any]) -> Any:
+        return node.fn(**{d: ctx[d] for d in self._deps(node)})
+
+    def run(self, values: Dict[str, Any], targets: Sequence[str] = ("edge",)) -> Dict[str, Any]:
+        """Synchronicznie (węzły async niedozwolone). Zwraca ctx z wynikami."""
+        ctx = self._ctx(values)
+        for nodes in self.plan(targets, values):
+            for node in nodes:
+                t0 = time.perf_counter()
+                ctx[node.name] = self._call(node, ctx)
+                self._record(node.name, t0)
+        return ctx
+
+    async def arun(self, values: Dict[str, Any], targets: Sequence[str] = ("edge",)) -> Dict[str, Any]:
+        """Jak run(), ale węzły-korutyny z jednego poziomu idą równolegle (gather); synchroniczne po kolei."""
+        ctx = self._ctx(values)
+        for nodes in self.plan(targets, values):
+            pending = []
+            for node in nodes:
+                t0 = time.perf_counter()
+                res = self._call(node, ctx)
+                if inspect.isawaitable(res):
+                    pending.append((node, t0, res))
+                else:
+                    ctx[node.name] = res
+                    self._record(node.name, t0)
+            if pending:
+                results = await asyncio.gather(*(p[2] for p in pending))
+                for (node, t0, _), res in zip(pending, results):
+                    ctx[node.name] = res
+                    self._record(node.name, t0)
+        return ctx
+
+    def timings_snapshot(self) -> Dict[str, Dict[str, float]]:
+        return {
+            name: dict(t, avg_ms=t["total_ms"] / max(1, t["calls"]))
+            for name, t in self.timings.items()
+        }
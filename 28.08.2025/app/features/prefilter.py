@@ -0,0 +1,74 @@
+"""
+Tani prefiltr skanu – etap 1 z jednego zrzutu fetch_tickers(), bez OHLCV/booka:
+
+- change  – |zmiana 24h %| (ruch w dowolną stronę),
+- range   – położenie last w zakresie 24h high/low; liczy się skrajność (|2*pos-1|),
+- spread  – (ask-bid)/mid w bps, kara; powyżej max_spread_bps para odpada (score 0),
+- volume  – z-score log(quoteVolume) względem całego rynku.
+
+Składowe jako z-score po całym rynku, suma ważona -> ranga percentylowa 0..1.
+Etap 2 (pełna analiza) dostaje tylko najlepsze wg prefiltra; score zostaje
+w AnalysisRow.prefilter, a rank_corr() mierzy, jak dobrze etap 1 przewiduje EDGE.
+"""
+from typing import Dict, Mapping, Sequence
+
+import numpy as np
+
+PREFILTER_WEIGHTS = {"change": 0.35, "range": 0.25, "volume": 0.25, "spread": -0.15}
+
+
+def _num(tk: Mapping, key: str) -> float:
+    try:
+        v = tk.get(key)
+        return float(v) if v is not None else np.nan
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _z(x: np.ndarray) -> np.ndarray:
+    x = np.where(np.isfinite(x), x, np.nanmedian(x) if np.isfinite(x).any() else 0.0)
+    sd = x.std()
+    return (x - x.mean()) / sd if sd > 0 else np.zeros_like(x)
+
+
+def _ranks(x: np.ndarray) -> np.ndarray:
+    """Rangi 0..n-1, remisy dostają średnią rangę."""
+    r = np.empty(len(x))
+    r[np.argsort(x, kind="stable")] = np.arange(len(x))
+    _, inv, cnt = np.unique(x, return_inverse=True, return_counts=True)
+    return np.bincount(inv, weights=r)[inv] / cnt[inv]
+
+
+def ticker_prefilter(tickers: Mapping[str, Mapping], max_spread_bps: float = 50.0) -> Dict[str, float]:
+    """{symbol: score 0..1} dla słownika tickerów ccxt (jeden wpis na symbol)."""
+    syms = list(tickers)
+    if not syms:
+        return {}
+    cols = {k: np.array([_num(tickers[s], k) for s in syms]) for k in
+            ("percentage", "last", "high", "low", "bid", "ask", "quoteVolume")}
+
+    rng = cols["high"] - cols["low"]
+    pos = np.where(rng > 0, (cols["last"] - cols["low"]) / np.where(rng > 0, rng, 1.0), np.nan)
+    mid = 0.5 * (cols["bid"] + cols["ask"])
+    spread_bps = np.where(mid > 0, (cols["ask"] - cols["bid"]) / np.where(mid > 0, mid, 1.0) * 1e4, np.nan)
+
+    raw = (
+        PREFILTER_WEIGHTS["change"] * _z(np.abs(cols["percentage"]))
+        + PREFILTER_WEIGHTS["range"] * _z(np.abs(2.0 * pos - 1.0))
+        + PREFILTER_WEIGHTS["volume"] * _z(np.log1p(np.maximum(cols["quoteVolume"], 0.0)))
+        + PREFILTER_WEIGHTS["spread"] * _z(np.log1p(np.maximum(spread_bps, 0.0)))
+    )
+    score = _ranks(raw) / max(1, len(syms) - 1)
+    score = np.where(spread_bps > max_spread_bps, 0.0, score)  # NaN (brak bid/ask) przechodzi
+    return {s: float(v) for s, v in zip(syms, score)}
+
+
+def rank_corr(a: Sequence[float], b: Sequence[float]) -> float:
+    """Korelacja rang Spearmana (np. prefilter vs EDGE); NaN dla < 3 par."""
+    if len(a) < 3 or len(a) != len(b):
+        return float("nan")
+    ra, rb = _ranks(np.asarray(a, dtype=float)), _ranks(np.asarray(b, dtype=float))
+    ra -= ra.mean()
+    rb -= rb.mean()
+    den = np.sqrt((ra * ra).sum() * (rb * rb).sum())
+    return float((ra * rb).sum() / den) if den > 0 else float("nan")
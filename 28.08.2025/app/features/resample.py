@@ -0,0 +1,64 @@
+from typing import List, Optional
+
+from ..engine.candle_cache import tf_to_ms
+
+# tydzień na giełdach zaczyna się w poniedziałek 00:00 UTC, epoka (1970-01-01) to czwartek
+_WEEK_OFFSET_MS = 4 * 86_400_000
+
+
+def bucket_start(ts_ms: int, dst_ms: int) -> int:
+    """Początek kubełka wyrównany do UTC (1h/4h/1d od północy, 1w od poniedziałku)."""
+    off = _WEEK_OFFSET_MS if dst_ms % 604_800_000 == 0 else 0
+    return (ts_ms - off) // dst_ms * dst_ms + off
+
+
+def resample_ohlcv(
+    ohlcv: List[List[float]],
+    src_tf: str,
+    dst_tf: str,
+    keep_partial_tail: bool = True,
+) -> List[List[float]]:
+    """
+    Składa świece `src_tf` (np. 15m) w `dst_tf` (1h/4h/1d) bez zapytań do giełdy.
+
+    - kubełki wyrównane do UTC jak na giełdzie (ts kubełka = jego początek),
+    - pierwszy kubełek, jeśli okno danych zaczyna się w jego środku, jest odrzucany
+      (niepełny open/high/low),
+    - ostatni (niedomknięty) kubełek zostaje jak bieżąca świeca na giełdzie,
+      chyba że keep_partial_tail=False,
+    - ts w ms lub w s (DEX) – jednostka wyjścia = jednostka wejścia.
+    """
+    if not ohlcv:
+        return []
+    src_ms, dst_ms = tf_to_ms(src_tf), tf_to_ms(dst_tf)
+    if dst_ms == src_ms:
+        return [list(b) for b in ohlcv]
+    if dst_ms < src_ms or dst_ms % src_ms:
+        raise ValueError(f"nie da się złożyć {src_tf} -> {dst_tf}")
+
+    scale = 1000 if ohlcv[-1][0] < 1e11 else 1  # ts w sekundach?
+    out: List[List[float]] = []
+    cur: Optional[List[float]] = None
+    head_partial = False
+    for b in ohlcv:
+        ts = int(b[0]) * scale
+        start = bucket_start(ts, dst_ms)
+        if cur is None or start != cur[0]:
+            if cur is not None and not head_partial:
+                out.append(cur)
+            head_partial = cur is None and ts != start
+            cur = [start, float(b[1]), float(b[2]), float(b[3]), float(b[4]), float(b[5])]
+        else:
+            cur[2] = max(cur[2], float(b[2]))
+            cur[3] = min(cur[3], float(b[3]))
+            cur[4] = float(b[4])
+            cur[5] += float(b[5])
+    if cur is not None and not head_partial:
+        last_ts = int(ohlcv[-1][0]) * scale
+        complete = last_ts + src_ms >= cur[0] + dst_ms
+        if complete or keep_partial_tail:
+            out.append(cur)
+    if scale != 1:
+        for b in out:
+            b[0] = b[0] // scale
+    return out
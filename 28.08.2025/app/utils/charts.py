@@ -1,20 +1,26 @@
 # app/utils/charts.py
 from __future__ import annotations
 from io import BytesIO
-from typing import List, Dict
+from typing import List, Dict, Union
 import matplotlib
 matplotlib.use("Agg")  # render bez okna
 import matplotlib.pyplot as plt
 
-def render_candles_png(candles: List[Dict], width: int = 900, height: int = 300) -> bytes:
+from ..features.ohlcv import OHLCV
+
+def render_candles_png(candles: Union[OHLCV, List[Dict]], width: int = 900, height: int = 300) -> bytes:
     """
-    Prosty wykres linii na podstawie close z listy świec Dexscreener (t,o,h,l,c).
+    Prosty wykres linii na podstawie close – OHLCV (kolumna close bez kopii)
+    albo lista świec Dexscreener (t,o,h,l,c).
     Nie ustawiamy kolorów ani stylów – zgodnie z wytycznymi.
     """
     if not candles:
         return b""
 
-    closes = [float(c["c"]) for c in candles if "c" in c]
+    if isinstance(candles, OHLCV):
+        closes = candles.close
+    else:
+        closes = [float(c["c"]) for c in candles if "c" in c]
     if len(closes) < 3:
         return b""
 